@@ -7,7 +7,7 @@ from core.worker import DeviceWorker
 from core.device_manager import DeviceManager
 from core.logger import DeviceLogger
 
-def log_callback(log_entry):
+def log_callback(log_entry, seq):
     """日志回调：输出到控制台"""
     print(log_entry)
 
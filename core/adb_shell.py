@@ -0,0 +1,136 @@
+"""
+adb_shell.py - 常驻ADB shell通道
+每台设备保持一个长连接的 sh 会话（adb exec:sh），input/am/dumpsys/wm 等命令复用同一条连接顺序执行，
+每条命令的输出以唯一结束标记分帧并带回退出码，省去每次 device.shell() 建立ADB连接的开销
+"""
+import os
+import time
+import socket
+import threading
+from typing import Optional, Tuple
+
+
+class ShellError(Exception):
+    """常驻shell通道不可用（连接失败、断开或超时）"""
+
+
+class ShellTimeout(ShellError):
+    """命令超时（会话已丢弃，下一次调用重建）"""
+
+
+class PersistentShell:
+    """
+    常驻shell会话
+    run(cmd) 返回 (输出, 退出码)；会话断开时下一次调用自动重建，仍失败则抛出 ShellError
+    """
+
+    def __init__(self, adb_device, timeout: float = 10.0):
+        """
+        初始化shell会话（首次执行命令时才建立连接）
+
+        Args:
+            adb_device: adbutils.AdbDevice（如 u2.Device.adb_device）
+            timeout: 单条命令的默认超时（秒）
+        """
+        self.adb_device = adb_device
+        self.timeout = timeout
+
+        self._conn = None
+        self._sock: Optional[socket.socket] = None
+        self._lock = threading.Lock()          # 同一会话内命令串行执行
+        self._token = os.urandom(4).hex()      # 结束标记前缀，避免与命令输出冲突
+        self._seq = 0
+        self.last_ms = 0                       # 最近一条命令的耗时
+
+    @property
+    def alive(self) -> bool:
+        """会话是否已建立"""
+        return self._sock is not None
+
+    def _open(self):
+        """建立 exec:sh 连接（无伪终端：不回显输入，输出不做换行转换）"""
+        try:
+            conn = self.adb_device.open_transport()
+            conn.send_command("exec:sh")
+            conn.check_okay()
+        except Exception as e:
+            raise ShellError(f"打开shell会话失败: {e}") from e
+        self._conn = conn
+        self._sock = conn.conn
+
+    def close(self):
+        """关闭会话"""
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        conn, self._conn, self._sock = self._conn, None, None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def run(self, cmd: str, timeout: Optional[float] = None) -> Tuple[str, int]:
+        """
+        执行一条shell命令
+
+        Args:
+            cmd: 命令（单行；标准输入重定向为 /dev/null，标准错误合并到输出）
+            timeout: 超时秒数（默认使用会话超时）
+
+        Returns:
+            (输出, 退出码)
+
+        Raises:
+            ShellError: 会话建立失败或断开
+            ShellTimeout: 命令超时（不重试，避免重复执行有副作用的命令）
+        """
+        with self._lock:
+            start_time = time.time()
+            try:
+                result = self._run_once(cmd, timeout)
+            except ShellTimeout:
+                raise
+            except ShellError:
+                # 会话可能已被设备端关闭（如 adbd 重启），重建一次
+                self._close()
+                result = self._run_once(cmd, timeout)
+            self.last_ms = int((time.time() - start_time) * 1000)
+            return result
+
+    def _run_once(self, cmd: str, timeout: Optional[float]) -> Tuple[str, int]:
+        if self._sock is None:
+            self._open()
+
+        self._seq += 1
+        marker = f"__shell_end_{self._token}_{self._seq}__".encode()
+        # 输出末尾可能没有换行，结束标记前固定补一个换行，解析时去掉
+        script = f"{{ {cmd}\n}} </dev/null 2>&1; printf '\\n%s %d\\n' {marker.decode()} $?\n"
+
+        try:
+            self._sock.settimeout(timeout or self.timeout)
+            self._sock.sendall(script.encode('utf-8'))
+
+            buffer = b""
+            frame_end = b"\n" + marker + b" "
+            while True:
+                idx = buffer.find(frame_end)
+                if idx != -1 and buffer.endswith(b"\n"):
+                    tail = buffer[idx + len(frame_end):].strip()
+                    output = buffer[:idx].decode('utf-8', errors='replace')
+                    return output, int(tail) if tail.lstrip(b"-").isdigit() else -1
+                chunk = self._sock.recv(65536)
+                if not chunk:
+                    raise ShellError("shell会话已断开")
+                buffer += chunk
+        except ShellError:
+            self._close()
+            raise
+        except socket.timeout as e:
+            # 超时后会话状态未知（命令可能仍在输出），直接丢弃
+            self._close()
+            raise ShellTimeout(f"shell命令超时: {cmd}") from e
+        except OSError as e:
+            self._close()
+            raise ShellError(f"shell命令失败: {e}") from e
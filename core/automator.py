@@ -2,11 +2,28 @@
 automator.py - uiautomator2 设备操作封装
 提供设备连接、App启动/停止、滑动等基础操作
 """
+import re
 import time
 from typing import Optional, Tuple
 import uiautomator2 as u2
 
 from core.logger import DeviceLogger
+from core.connection_pool import get_connection_pool
+from core.adb_shell import PersistentShell, ShellError, ShellTimeout
+from core.screen_probe import ScreenProbe, ScreenState
+
+
+# parse_hierarchy 及结构化采集实际读取的节点属性；filtered 模式下其余属性在解析前删除
+DUMP_KEEP_ATTRIBUTES = ("text", "resource-id", "class", "bounds", "content-desc", "selected")
+_UNUSED_ATTR_RE = re.compile(
+    r'\s(?!(?:' + "|".join(re.escape(a) for a in DUMP_KEEP_ATTRIBUTES) + r')=)[\w:-]+="[^"]*"'
+)
+_TEXT_ATTR_RE = re.compile(r'\stext="([^"]*)"')
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]')
+# 错误页特征文本（"重新加载"按钮、"网络悄悄跑到外星球去了"）
+_ERROR_MARKERS = ("重新加载", "外星球")
+# dumpsys window 中的前台窗口，如 mCurrentFocus=Window{... u0 com.sankuai.meituan/com.xxx.MainActivity}
+_FOCUS_RE = re.compile(r'mCurrentFocus=Window\{[^}]*?\s([\w.]+)/([\w.$]+)\}')
 
 
 class DeviceAutomator:
@@ -28,44 +45,97 @@ class DeviceAutomator:
         self.logger = logger
         self.config = config
         self.device: Optional[u2.Device] = None
+        self._screen_size: Optional[Tuple[int, int]] = None  # 连接后缓存，屏幕尺寸不会变化
         
         # 加载配置
         self.app_config = config.get("app", {})
         self.scroll_config = config.get("scroll", {})
         self.timeout_config = config.get("timeouts", {})
+        
+        # 连接池：Worker 重启/风控恢复时复用已就绪的连接
+        self.use_pool = config.get("connection", {}).get("pool", True)
+        
+        # 常驻shell通道：input/am/dumpsys/wm 命令复用一条ADB连接；不可用时回退到 device.shell()
+        self.use_persistent_shell = config.get("connection", {}).get("persistent_shell", True)
+        self._shell: Optional[PersistentShell] = None
+        
+        # 层级 dump 模式：full（原样）/ filtered（删除未使用的属性）/ compressed（服务端精简层级 + 删除属性）
+        self.dump_mode = config.get("dump", {}).get("mode", "filtered")
+        self._compressed_ok: Optional[bool] = None  # None: 尚未验证；False: 服务端不支持，已回退
+        self.last_xml_bytes = 0                     # 最近一次 dump 得到的XML大小（UTF-8 字节，非线上传输量）
+        self.last_dump_ms = 0                       # 最近一次 dump 耗时
+        self.dump_stats = {"count": 0, "xml_bytes": 0, "kept_bytes": 0, "ms": 0}
+        
+        # 截图探测：白屏/错误页/画面是否稳定先用缩略截图判断，只在需要时 dump 确认
+        probe_config = config.get("screen_probe", {})
+        self.screen_probe: Optional[ScreenProbe] = None
+        if probe_config.get("enabled", True):
+            self.screen_probe = ScreenProbe(
+                scale=probe_config.get("scale", 0.1),
+                quality=probe_config.get("quality", 30)
+            )
+        self._last_probe: Optional[ScreenState] = None
+        self._last_probe_time = 0.0
+        # 最近一次经XML确认为正常内容（无错误页文本、文字足够）的截图探测结果
+        self._confirmed_probe: Optional[ScreenState] = None
     
     def connect(self) -> bool:
         """
-        连接设备
+        连接设备（启用连接池时优先复用池中已就绪的连接）
         
         Returns:
             是否连接成功
         """
         try:
             self.logger.step("连接设备", self.device_serial)
-            self.device = u2.connect(self.device_serial)
+            start_time = time.time()
             
-            # 验证连接
-            info = self.device.info
-            self.logger.info(f"设备已连接: {info.get('productName', 'Unknown')}")
+            if self.use_pool:
+                self.device, info, reused = get_connection_pool().acquire(self.device_serial)
+            else:
+                self.device = u2.connect(self.device_serial)
+                info = self.device.info  # 验证连接
+                reused = False
+            
+            self._screen_size = (info['displayWidth'], info['displayHeight'])
+            elapsed_ms = int((time.time() - start_time) * 1000)
+            self.logger.info(
+                f"设备已连接: {info.get('productName', 'Unknown')} "
+                f"({'复用连接' if reused else '新建连接'}, {elapsed_ms}ms)"
+            )
             return True
         except Exception as e:
             self.logger.exception("连接设备", e)
             return False
     
-    def disconnect(self):
-        """断开设备连接"""
+    def disconnect(self, failed: bool = False):
+        """
+        断开设备连接（启用连接池时连接归还到池中，不关闭）
+        
+        Args:
+            failed: 因异常（如ADB断开）结束时为 True，池中连接下次复用前强制检查
+        """
+        if self._shell is not None:
+            self._shell.close()
+            self._shell = None
+        if self.use_pool and self.device is not None:
+            get_connection_pool().release(self.device_serial, failed=failed)
         self.device = None
+        self._screen_size = None
         self.logger.info("设备已断开连接")
     
     def is_connected(self) -> bool:
-        """检查设备是否已连接"""
+        """检查设备是否已连接（检查失败时池中连接作废并在后台重连）"""
         if not self.device:
             return False
         try:
             self.device.info
+            if self.use_pool:
+                get_connection_pool().mark_ok(self.device_serial)
             return True
         except:
+            if self.use_pool:
+                get_connection_pool().invalidate(self.device_serial)
             return False
     
     def start_app(self) -> bool:
@@ -86,16 +156,22 @@ class DeviceAutomator:
         try:
             self.logger.step("启动App", package_name)
             
+            # 命令失败（如 Activity 不存在）时同样回退到 uiautomator2
             if activity:
-                self.device.app_start(package_name, activity)
+                launched = self.shell(f"am start -n {package_name}/{activity}", check=True)
             else:
-                self.device.app_start(package_name)
+                launched = self.shell(f"monkey -p {package_name} -c android.intent.category.LAUNCHER 1", check=True)
+            if launched is None:
+                if activity:
+                    self.device.app_start(package_name, activity)
+                else:
+                    self.device.app_start(package_name)
             
             # 等待App启动
             time.sleep(wait_seconds)
             
             # 验证App是否在前台
-            current_app = self.device.app_current()
+            current_app = self.current_app()
             if current_app.get("package") == package_name:
                 self.logger.info(f"App已启动: {package_name}")
                 return True
@@ -121,7 +197,8 @@ class DeviceAutomator:
         
         try:
             self.logger.step("停止App", package_name)
-            self.device.app_stop(package_name)
+            if self.shell(f"am force-stop {package_name}", check=True) is None:
+                self.device.app_stop(package_name)
             return True
         except Exception as e:
             self.logger.exception("停止App", e)
@@ -129,7 +206,7 @@ class DeviceAutomator:
     
     def get_screen_size(self) -> Tuple[int, int]:
         """
-        获取屏幕尺寸
+        获取屏幕尺寸（首次读取后缓存）
         
         Returns:
             (width, height)
@@ -137,18 +214,23 @@ class DeviceAutomator:
         if not self.device:
             return (1080, 1920)
         
+        if self._screen_size:
+            return self._screen_size
+        
         try:
             info = self.device.info
-            return (info['displayWidth'], info['displayHeight'])
+            self._screen_size = (info['displayWidth'], info['displayHeight'])
+            return self._screen_size
         except:
             return (1080, 1920)
     
-    def swipe_up(self, duration: float = 0.5):
+    def swipe_up(self, duration: float = 0.5, distance: float = 0.40):
         """
         向上滑动（用于滚动列表）
         
         Args:
             duration: 滑动持续时间(秒)
+            distance: 滑动距离（占屏幕高度比例，默认 0.75h -> 0.35h）
         """
         if not self.device:
             return
@@ -158,7 +240,7 @@ class DeviceAutomator:
         # 从屏幕中下部向上滑动
         start_x = width // 2
         start_y = int(height * 0.75)
-        end_y = int(height * 0.35)
+        end_y = int(height * max(0.10, 0.75 - distance))
         
         try:
             self.device.swipe(start_x, start_y, start_x, end_y, duration=duration)
@@ -166,12 +248,13 @@ class DeviceAutomator:
         except Exception as e:
             self.logger.warning(f"滑动失败: {e}")
     
-    def swipe_down(self, duration: float = 0.5):
+    def swipe_down(self, duration: float = 0.5, distance: float = 0.40):
         """
         向下滑动
         
         Args:
             duration: 滑动持续时间(秒)
+            distance: 滑动距离（占屏幕高度比例，默认 0.35h -> 0.75h）
         """
         if not self.device:
             return
@@ -180,7 +263,7 @@ class DeviceAutomator:
         
         start_x = width // 2
         start_y = int(height * 0.35)
-        end_y = int(height * 0.75)
+        end_y = int(height * min(0.90, 0.35 + distance))
         
         try:
             self.device.swipe(start_x, start_y, start_x, end_y, duration=duration)
@@ -286,9 +369,13 @@ class DeviceAutomator:
             self.logger.warning(f"截图保存失败: {e}")
             return False
     
-    def get_page_source(self) -> str:
+    def get_page_source(self, full_tree: bool = False) -> str:
         """
-        获取当前页面XML源码（用于调试）
+        获取当前页面XML源码（按 dump 模式精简，并记录XML大小/耗时）
+        
+        Args:
+            full_tree: 需要完整父子结构时为 True（不使用服务端精简层级，只删除属性）；
+                沿祖先链查找卡片容器等依赖层级的解析必须使用
         
         Returns:
             页面XML
@@ -297,11 +384,58 @@ class DeviceAutomator:
             return ""
         
         try:
-            return self.device.dump_hierarchy()
+            start_time = time.time()
+            if self.dump_mode == "compressed" and self._compressed_ok is not False and not full_tree:
+                xml_content = self._dump_compressed()
+            else:
+                xml_content = self.device.dump_hierarchy()
+            
+            self.last_dump_ms = int((time.time() - start_time) * 1000)
+            self.last_xml_bytes = len(xml_content.encode('utf-8')) if xml_content else 0
+            
+            if self.dump_mode in ("filtered", "compressed") and xml_content:
+                xml_content = self.filter_attributes(xml_content)
+            
+            self.dump_stats["count"] += 1
+            self.dump_stats["xml_bytes"] += self.last_xml_bytes
+            self.dump_stats["kept_bytes"] += len(xml_content.encode('utf-8')) if xml_content else 0
+            self.dump_stats["ms"] += self.last_dump_ms
+            return xml_content
         except Exception as e:
             self.logger.warning(f"获取页面源码失败: {e}")
             return ""
     
+    def _dump_compressed(self) -> str:
+        """
+        请求服务端的精简层级（compressed=True，跳过无障碍不重要的视图）
+        首次使用时与完整 dump 对比文本节点，有丢失或服务端不支持时回退到完整 dump
+        """
+        try:
+            xml_content = self.device.dump_hierarchy(compressed=True)
+        except Exception as e:
+            self.logger.warning(f"服务端不支持精简层级dump，回退到完整dump: {e}")
+            self._compressed_ok = False
+            return self.device.dump_hierarchy()
+        
+        if self._compressed_ok is None:
+            full_content = self.device.dump_hierarchy()
+            missing = set(_TEXT_ATTR_RE.findall(full_content)) - set(_TEXT_ATTR_RE.findall(xml_content or ""))
+            if missing:
+                self.logger.warning(f"精简层级dump丢失 {len(missing)} 个文本节点，回退到完整dump")
+                self._compressed_ok = False
+                return full_content
+            self._compressed_ok = True
+            self.logger.info(
+                f"启用精简层级dump: {len(xml_content.encode('utf-8'))} / {len(full_content.encode('utf-8'))} 字节"
+            )
+        
+        return xml_content
+    
+    @staticmethod
+    def filter_attributes(xml_content: str) -> str:
+        """删除解析用不到的节点属性（checkable/focusable/password/package 等），减小后续解析开销"""
+        return _UNUSED_ATTR_RE.sub('', xml_content)
+    
     def input_text_via_adb(self, text: str):
         """
         通过ADB命令输入文本（备用方案）
@@ -315,10 +449,73 @@ class DeviceAutomator:
         try:
             # 使用adb shell input text，需要处理中文
             # uiautomator2的set_text更可靠，这里作为备用
-            self.device.shell(f'input text "{text}"')
+            if self.shell(f'input text "{text}"') is None:
+                self.device.shell(f'input text "{text}"')
         except Exception as e:
             self.logger.warning(f"ADB输入失败: {e}")
     
+    def shell(self, cmd: str, timeout: Optional[float] = None, check: bool = False) -> Optional[str]:
+        """
+        通过常驻shell通道执行命令（input/am/dumpsys/wm 等）
+        
+        Args:
+            cmd: shell命令（单行）
+            timeout: 超时秒数（默认使用 timeouts.short_timeout）
+            check: 为 True 时命令失败（退出码非0，或输出含 am/monkey 的 "Error:"/"aborted"）也返回None
+        
+        Returns:
+            命令输出；通道不可用（或 check 时命令失败）返回None（调用方应回退到 device.shell() / uiautomator2）
+        """
+        if not self.device or not self.use_persistent_shell:
+            return None
+        
+        try:
+            if self._shell is None:
+                self._shell = PersistentShell(
+                    self.device.adb_device,
+                    timeout=self.timeout_config.get("short_timeout", 5)
+                )
+            output, exit_code = self._shell.run(cmd, timeout)
+            self.logger.debug(f"shell[{self._shell.last_ms}ms] {cmd} -> {exit_code}")
+            if check and (exit_code != 0 or "Error:" in output or "aborted" in output):
+                self.logger.warning(f"shell命令失败(退出码 {exit_code}): {cmd} -> {output.strip()[:200]}")
+                return None
+            return output
+        except ShellTimeout as e:
+            self.logger.warning(str(e))
+            return None
+        except ShellError as e:
+            # 设备不支持 exec: 或连接异常：本次会话内不再尝试
+            self.logger.warning(f"常驻shell通道不可用，回退到单次shell调用: {e}")
+            self.use_persistent_shell = False
+            self._shell = None
+            return None
+        except Exception as e:
+            self.logger.warning(f"shell命令失败: {e}")
+            return None
+    
+    def current_app(self) -> dict:
+        """
+        获取前台App（优先用常驻shell读取 dumpsys window，失败时回退到 uiautomator2）
+        
+        Returns:
+            {"package": 包名, "activity": Activity}，获取失败返回空字典
+        """
+        if not self.device:
+            return {}
+        
+        output = self.shell("dumpsys window | grep mCurrentFocus")
+        if output:
+            match = _FOCUS_RE.search(output)
+            if match:
+                return {"package": match.group(1), "activity": match.group(2)}
+        
+        try:
+            return self.device.app_current()
+        except Exception as e:
+            self.logger.warning(f"获取前台App失败: {e}")
+            return {}
+    
     def clear_app_cache(self) -> bool:
         """
         清除App缓存
@@ -339,10 +536,87 @@ class DeviceAutomator:
             self.logger.warning(f"清除缓存失败: {e}")
             return False
     
+    def probe_screen(self, max_age: float = 0.0) -> Optional[ScreenState]:
+        """
+        缩略截图探测（见 ScreenProbe）
+        
+        Args:
+            max_age: 上一次探测结果在该秒数内时直接复用
+        
+        Returns:
+            探测结果；未启用或截图失败返回None
+        """
+        if not self.device or self.screen_probe is None:
+            return None
+        
+        if self._last_probe is not None and time.time() - self._last_probe_time <= max_age:
+            return self._last_probe
+        
+        state = self.screen_probe.capture(self.device)
+        self._last_probe = state
+        self._last_probe_time = time.time()
+        return state
+    
+    def wait_settled(self, max_wait: float, interval: float = 0.3) -> bool:
+        """
+        等待画面稳定：连续两帧缩略截图无变化且内容正常时提前返回，否则最多等待 max_wait 秒
+        （白屏同样不变，不算稳定，避免加载中途提前返回）
+        
+        Args:
+            max_wait: 最长等待秒数
+            interval: 探测间隔
+        
+        Returns:
+            是否在超时前稳定
+        """
+        if self.screen_probe is None:
+            time.sleep(max_wait)
+            return False
+        
+        deadline = time.time() + max_wait
+        previous = None
+        while time.time() < deadline:
+            current = self.probe_screen()
+            if current is None:
+                # 截图不可用：退回固定等待
+                time.sleep(max(0.0, deadline - time.time()))
+                return False
+            if current.kind == ScreenState.CONTENT and not self.screen_probe.changed(previous, current):
+                self.logger.debug(f"画面已稳定: {current}")
+                return True
+            previous = current
+            time.sleep(min(interval, max(0.0, deadline - time.time())))
+        return False
+    
+    def _probe_confirmed(self) -> Tuple[Optional[ScreenState], bool]:
+        """
+        截图探测，并判断画面是否与最近一次经XML确认的正常页面相同
+        （带插图的错误页也会被判为内容正常，只凭探测结果不能跳过XML检查）
+        
+        Returns:
+            (探测结果, 是否可跳过XML检查)
+        """
+        state = self.probe_screen(max_age=0.5)
+        confirmed = (
+            state is not None and state.kind == ScreenState.CONTENT
+            and self._confirmed_probe is not None
+            and not self.screen_probe.changed(self._confirmed_probe, state)
+        )
+        return state, confirmed
+    
+    def _confirm_content(self, state: Optional[ScreenState], xml_content: str, min_chinese_chars: int = 10):
+        """XML中没有错误页文本且文字足够时，记住该帧的探测结果（之后画面不变即可跳过XML检查）"""
+        if (state is not None and state.kind == ScreenState.CONTENT
+                and not any(marker in xml_content for marker in _ERROR_MARKERS)
+                and len(_CJK_RE.findall(xml_content)) >= min_chinese_chars):
+            self._confirmed_probe = state
+        else:
+            self._confirmed_probe = None
+    
     def is_page_loaded(self, min_chinese_chars: int = 10) -> bool:
         """
         检测页面是否正常加载（非白屏）
-        通过统计页面XML中的中文字符数来判断
+        画面与最近一次经XML确认的正常页面相同时直接返回；否则统计页面XML中的中文字符数确认
         
         Args:
             min_chinese_chars: 最少中文字符数，低于此值视为白屏
@@ -354,14 +628,14 @@ class DeviceAutomator:
             return False
         
         try:
-            # 使用 dump_hierarchy 一次性获取页面内容，避免遍历元素的多次 RPC 调用
-            xml_content = self.device.dump_hierarchy()
+            state, confirmed = self._probe_confirmed()
+            if confirmed:
+                self.logger.debug(f"页面正常加载(画面未变化): {state}")
+                return True
             
-            # 简单的字符串统计，比解析XML更快且足够有效
-            chinese_count = 0
-            for char in xml_content:
-                if '\u4e00' <= char <= '\u9fff':
-                    chinese_count += 1
+            xml_content = self.get_page_source()
+            self._confirm_content(state, xml_content, min_chinese_chars)
+            chinese_count = len(_CJK_RE.findall(xml_content))
             
             if chinese_count < min_chinese_chars:
                 self.logger.warning(f"检测到白屏/加载不全: 中文字符数={chinese_count} (阈值={min_chinese_chars})")
@@ -387,7 +661,8 @@ class DeviceAutomator:
             True表示页面最终加载成功，False表示重试后仍失败
         """
         for attempt in range(max_retries):
-            time.sleep(wait_seconds)
+            # 画面稳定且内容正常时提前结束等待
+            self.wait_settled(wait_seconds)
             
             # 优先检查是否有错误页面并处理
             if self.handle_error_screens():
@@ -419,8 +694,13 @@ class DeviceAutomator:
             return False
             
         try:
-            # 使用 dump_hierarchy 快速检查页面内容
-            xml_content = self.device.dump_hierarchy()
+            # 画面与已确认的正常页面相同时不可能是错误页，省去 dump
+            state, confirmed = self._probe_confirmed()
+            if confirmed:
+                return False
+            
+            xml_content = self.get_page_source()
+            self._confirm_content(state, xml_content)
             
             # 检测"重新加载"按钮
             if "重新加载" in xml_content:
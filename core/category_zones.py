@@ -0,0 +1,104 @@
+"""
+category_zones.py - 分类区间表
+每帧由商品区的分类标题建立一次：标题Y坐标升序数组 + bisect 查找商品所属分类，
+没有标题时退回分界线规则（分界线下方归下一分类，顶部35%保护归当前分类）。
+查找同时给出置信度：商品紧贴标题/分界线、或位于"当前分类"标题上方时判定不可靠，
+调用方可据此延后判定（交给后续帧的证据），而不是直接猜测
+"""
+from bisect import bisect_right
+from typing import List, Optional, Tuple
+
+
+# 置信度
+CONFIDENT = 1.0     # 位于区间内部 / 无任何边界证据时的当前分类
+AMBIGUOUS = 0.5     # 紧贴标题或分界线、被顶部保护改判、位于当前分类标题上方
+UNKNOWN = 0.0       # 分界线下方但不知道下一分类（不应采集）
+
+
+class CategoryZoneTable:
+    """
+    单帧分类区间表（只读）
+    区间为 [标题Y, 下一标题Y)，第一个标题上方归当前分类，最后一个区间延伸到屏幕底部
+    """
+
+    def __init__(
+        self,
+        titles: List[dict],
+        current_category: str,
+        screen_height: int,
+        boundary_y: int = 0,
+        next_category: str = "",
+        margin: int = 60,
+        top_protect_ratio: float = 0.35
+    ):
+        """
+        建立区间表
+
+        Args:
+            titles: 商品区的分类标题 [{"name", "y"}, ...]（_detect_all_category_titles_on_screen 的结果）
+            current_category: 当前分类（第一个标题上方、无边界证据时的归属）
+            screen_height: 屏幕高度
+            boundary_y: 分界线Y坐标（0 表示无分界线；有标题时不使用）
+            next_category: 分界线下方的分类
+            margin: 距标题/分界线不超过该像素视为不可靠
+            top_protect_ratio: 无标题时屏幕顶部该比例内的商品始终归当前分类
+        """
+        ordered = sorted(titles, key=lambda t: t['y'])
+        self.names = [t['name'] for t in ordered]
+        self.starts = [t['y'] for t in ordered]
+
+        self.current_category = current_category
+        self.screen_height = screen_height
+        self.boundary_y = boundary_y
+        self.next_category = next_category or ""
+        self.margin = margin
+        self.top_protect_y = screen_height * top_protect_ratio
+
+    @property
+    def zoned(self) -> bool:
+        """是否有分类标题（智能区间生效）"""
+        return bool(self.starts)
+
+    def lookup(self, y: int) -> Tuple[Optional[str], float]:
+        """
+        查找Y坐标所属分类
+
+        Args:
+            y: 商品的Y坐标（价格中心）
+
+        Returns:
+            (分类名, 置信度)；分类名为 None 表示不应采集（分界线下方且下一分类未知）
+        """
+        if self.starts:
+            i = bisect_right(self.starts, y) - 1
+            if i < 0:
+                # 第一个标题上方：若该标题就是当前分类，上方的商品其实属于上一分类
+                first_is_current = self.names[0] == self.current_category
+                near = self.starts[0] - y <= self.margin
+                return self.current_category, AMBIGUOUS if (first_is_current or near) else CONFIDENT
+
+            near = y - self.starts[i] <= self.margin
+            if i + 1 < len(self.starts):
+                near = near or self.starts[i + 1] - y <= self.margin
+            return self.names[i], AMBIGUOUS if near else CONFIDENT
+
+        if self.boundary_y > 0 and y >= self.boundary_y:
+            if y < self.top_protect_y:
+                # 前排保护：分界线在顶部时仍归当前分类，但证据不可靠
+                return self.current_category, AMBIGUOUS
+            if not self.next_category:
+                return None, UNKNOWN
+            return self.next_category, AMBIGUOUS if y - self.boundary_y <= self.margin else CONFIDENT
+
+        if self.boundary_y > 0 and self.boundary_y - y <= self.margin:
+            return self.current_category, AMBIGUOUS
+        return self.current_category, CONFIDENT
+
+    def describe(self) -> str:
+        """区间表的文字描述（调试日志用）"""
+        if not self.starts:
+            if self.boundary_y > 0:
+                return f"分界线 Y={self.boundary_y} -> {self.next_category or '未知'}"
+            return f"无区间 -> {self.current_category}"
+        ends = self.starts[1:] + [self.screen_height]
+        return ", ".join(f"{name}({start}-{end})" for name, start, end in zip(self.names, self.starts, ends))
@@ -0,0 +1,361 @@
+"""
+config.py - 配置加载模块
+config.json 每个进程只读取一次（get_config），所有设备的 Worker / SelectorHelper 共享同一个实例。
+滚动、功能开关/阈值、超时、重试四个配置段解析为带类型的对象（加载时校验类型和取值范围），
+选择器预编译为 SelectorMatcher；其余配置段仍按字典读取（config.get(段名, {})）。
+启用热加载时后台线程按修改时间检测文件变化并重新加载：校验通过才整体替换，
+滚动间隔、阈值、选择器等在循环中读取的参数无需重启即可生效
+"""
+import os
+import re
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ConfigError(ValueError):
+    """配置内容无效（选择器定义错误等）"""
+
+
+def _coerce(data: dict, name: str, kind: type, default, low, high, errors: List[str], section: str):
+    """读取一个字段并校验类型和范围，无效时记录错误并返回默认值"""
+    if name not in data:
+        return default
+    value = data[name]
+    if kind is bool:
+        valid = isinstance(value, bool)
+    elif kind is int:
+        valid = isinstance(value, int) and not isinstance(value, bool)
+    else:
+        valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+        if valid:
+            value = float(value)
+    if not valid:
+        errors.append(f"{section}.{name}: 应为 {kind.__name__}，实际为 {value!r}")
+        return default
+    if (low is not None and value < low) or (high is not None and value > high):
+        errors.append(f"{section}.{name}: {value} 超出范围 [{low}, {high}]")
+        return default
+    return value
+
+
+class _Section:
+    """
+    带类型的配置段（只读，重新加载时整体替换）
+    子类用 FIELDS 声明字段: {字段名: (类型, 默认值, 下限, 上限)}
+    """
+
+    FIELDS: Dict[str, tuple] = {}
+    __slots__ = ()
+
+    def __init__(self, data: dict, errors: List[str], section: str):
+        for name, (kind, default, low, high) in self.FIELDS.items():
+            setattr(self, name, _coerce(data, name, kind, default, low, high, errors, section))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+
+class ScrollConfig(_Section):
+    """scroll 配置段（旧键 pause_seconds 视为 scroll_pause）"""
+
+    FIELDS = {
+        "max_scroll_times": (int, 100, 1, None),
+        "scroll_duration": (float, 0.5, 0.05, 5.0),
+        "scroll_pause": (float, 1.5, 0.0, 30.0),
+        "boundary_mode_pause": (float, 1.5, 0.0, 30.0),
+        "verify_mode_pause": (float, 1.0, 0.0, 30.0),
+        "no_new_data_threshold": (int, 3, 1, None),
+        "enable_overlap_detection": (bool, True, None, None),
+        "adaptive_swipe": (bool, True, None, None),
+        "swipe_distance": (float, 0.40, 0.05, 0.95),
+        "min_swipe_distance": (float, 0.20, 0.05, 0.95),
+        "max_swipe_distance": (float, 0.60, 0.05, 0.95),
+        "min_overlap_cards": (int, 1, 1, None),
+    }
+    __slots__ = tuple(FIELDS)
+
+    def __init__(self, data: dict, errors: List[str], section: str = "scroll"):
+        if "pause_seconds" in data and "scroll_pause" not in data:
+            data = dict(data, scroll_pause=data["pause_seconds"])
+        super().__init__(data, errors, section)
+        if not self.min_swipe_distance <= self.swipe_distance <= self.max_swipe_distance:
+            errors.append(
+                f"{section}: 需满足 min_swipe_distance <= swipe_distance <= max_swipe_distance"
+                f"（{self.min_swipe_distance} / {self.swipe_distance} / {self.max_swipe_distance}）"
+            )
+
+
+class FeatureConfig(_Section):
+    """features 配置段"""
+
+    FIELDS = {
+        "enable_boundary_mode": (bool, True, None, None),
+        "boundary_mode_strict": (bool, True, None, None),
+        "verify_screen_threshold": (int, 10, 1, None),
+        "enable_shop_cache": (bool, True, None, None),
+        "shop_cache_min_match": (int, 2, 1, None),
+        "enable_sidebar_model": (bool, True, None, None),
+        "correction_window": (int, 8, 1, None),
+        "category_confirm_frames": (int, 2, 1, None),
+        "zone_min_confidence": (float, 0.75, 0.0, 1.0),
+    }
+    __slots__ = tuple(FIELDS)
+
+
+class TimeoutConfig(_Section):
+    """timeouts 配置段（秒）"""
+
+    FIELDS = {
+        "default_timeout": (float, 10.0, 0.1, None),
+        "long_timeout": (float, 20.0, 0.1, None),
+        "short_timeout": (float, 5.0, 0.1, None),
+    }
+    __slots__ = tuple(FIELDS)
+
+
+class RetryConfig(_Section):
+    """retry 配置段"""
+
+    FIELDS = {
+        "max_retries": (int, 3, 1, None),
+        "retry_delay": (float, 2.0, 0.0, None),
+    }
+    __slots__ = tuple(FIELDS)
+
+
+# uiautomator2 选择器支持的字段及其取值类型
+SELECTOR_FIELDS: Dict[str, type] = {
+    "text": str, "textContains": str, "textMatches": str, "textStartsWith": str,
+    "className": str, "classNameMatches": str,
+    "description": str, "descriptionContains": str, "descriptionMatches": str, "descriptionStartsWith": str,
+    "resourceId": str, "resourceIdMatches": str,
+    "packageName": str, "packageNameMatches": str,
+    "checkable": bool, "checked": bool, "clickable": bool, "longClickable": bool, "scrollable": bool,
+    "enabled": bool, "focusable": bool, "focused": bool, "selected": bool,
+    "index": int, "instance": int,
+}
+
+
+class SelectorMatcher:
+    """
+    预编译的选择器（加载配置时校验字段和正则，查找时直接构建 uiautomator2 选择器）
+    """
+
+    __slots__ = ("kwargs", "patterns", "label")
+
+    def __init__(self, selector_def: dict):
+        """
+        编译选择器定义
+
+        Args:
+            selector_def: 选择器定义，如 {"text": "外卖"} 或 {"textMatches": "^¥?\\d+$"}
+
+        Raises:
+            ConfigError: 字段未知、类型不符或正则无法编译
+        """
+        if not isinstance(selector_def, dict) or not selector_def:
+            raise ConfigError(f"选择器定义应为非空对象: {selector_def!r}")
+
+        patterns = {}
+        for key, value in selector_def.items():
+            kind = SELECTOR_FIELDS.get(key)
+            if kind is None:
+                raise ConfigError(f"未知的选择器字段: {key}")
+            if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+                raise ConfigError(f"选择器字段 {key} 应为 {kind.__name__}: {value!r}")
+            if key.endswith("Matches"):
+                try:
+                    patterns[key] = re.compile(value)
+                except re.error as e:
+                    raise ConfigError(f"选择器正则 {key}={value!r} 无效: {e}")
+
+        self.kwargs = dict(selector_def)
+        self.patterns = patterns
+        self.label = ", ".join(f"{k}={v!r}" for k, v in selector_def.items())
+
+    def build(self, device):
+        """构建 uiautomator2 选择器对象"""
+        return device(**self.kwargs)
+
+    def __repr__(self) -> str:
+        return f"SelectorMatcher({self.label})"
+
+
+def compile_selectors(data: dict, errors: List[str]) -> Dict[str, Tuple[SelectorMatcher, ...]]:
+    """
+    编译 selectors 配置段
+
+    Args:
+        data: {选择器键名: [选择器定义, ...]}
+        errors: 错误列表（无效的候选会被跳过并记录）
+
+    Returns:
+        {选择器键名: (SelectorMatcher, ...)}
+    """
+    compiled = {}
+    for key, candidates in data.items():
+        if not isinstance(candidates, list):
+            errors.append(f"selectors.{key}: 应为候选列表")
+            continue
+        matchers = []
+        for selector_def in candidates:
+            try:
+                matchers.append(SelectorMatcher(selector_def))
+            except ConfigError as e:
+                errors.append(f"selectors.{key}: {e}")
+        compiled[key] = tuple(matchers)
+    return compiled
+
+
+class AppConfig:
+    """
+    进程内共享的配置对象
+    typed 段: scroll / features / timeouts / retry / selectors；get() 兼容字典读取其余配置段。
+    重新加载时各段整体替换，循环中每次读取 config.scroll.xxx 即可拿到最新值；version 每次加载成功后加一
+    """
+
+    def __init__(self, path: str = "config.json"):
+        """
+        加载配置文件（文件缺失或格式错误时使用默认值）
+
+        Args:
+            path: 配置文件路径
+        """
+        self.path = path
+        self.version = 0
+        self.errors: List[str] = []
+
+        self._lock = threading.Lock()
+        self._mtime = 0.0
+        self._watch_thread: Optional[threading.Thread] = None
+        self._watch_stop = threading.Event()
+
+        raw = self._read() or {}
+        errors: List[str] = []
+        self._apply(raw, self._compile(raw, errors), errors)
+        for error in errors:
+            print(f"配置项无效，使用默认值: {error}")
+
+    def _read(self) -> Optional[dict]:
+        """读取配置文件，失败返回None"""
+        try:
+            self._mtime = os.path.getmtime(self.path)
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise ConfigError("顶层应为对象")
+            return data
+        except Exception as e:
+            print(f"加载配置失败: {e}")
+            return None
+
+    @staticmethod
+    def _compile(raw: dict, errors: List[str]) -> tuple:
+        """解析各 typed 配置段"""
+        def section(name: str) -> dict:
+            data = raw.get(name, {})
+            if not isinstance(data, dict):
+                errors.append(f"{name}: 应为对象")
+                return {}
+            return data
+
+        return (
+            ScrollConfig(section("scroll"), errors),
+            FeatureConfig(section("features"), errors, "features"),
+            TimeoutConfig(section("timeouts"), errors, "timeouts"),
+            RetryConfig(section("retry"), errors, "retry"),
+            compile_selectors(section("selectors"), errors),
+        )
+
+    def _apply(self, raw: dict, sections: tuple, errors: List[str]):
+        self.raw = raw
+        self.scroll, self.features, self.timeouts, self.retry, self.selectors = sections
+        self.errors = errors
+        self.version += 1
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """按字典方式读取配置段（兼容原有的 config.get("段名", {}) 写法）"""
+        return self.raw.get(key, default)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.raw
+
+    def reload(self) -> bool:
+        """
+        重新加载配置文件
+        文件无法解析或存在无效配置项时保留当前配置（运行中的设备不会因手误退回默认值）
+
+        Returns:
+            是否已替换为新配置
+        """
+        with self._lock:
+            raw = self._read()
+            if raw is None:
+                return False
+            errors: List[str] = []
+            sections = self._compile(raw, errors)
+            if errors:
+                print(f"配置未重新加载（{len(errors)} 项无效）: {'; '.join(errors)}")
+                return False
+            self._apply(raw, sections, errors)
+            print(f"配置已重新加载: {self.path} (v{self.version})")
+            return True
+
+    def check_reload(self) -> bool:
+        """文件修改时间变化时重新加载，返回是否已替换"""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        return self.reload()
+
+    def start_watch(self, interval: float = 2.0):
+        """启动后台线程，每 interval 秒检测一次文件变化（重复调用无效）"""
+        if self._watch_thread is not None and self._watch_thread.is_alive():
+            return
+        self._watch_stop.clear()
+
+        def watch():
+            while not self._watch_stop.wait(interval):
+                try:
+                    self.check_reload()
+                except Exception as e:
+                    print(f"配置热加载失败: {e}")
+
+        self._watch_thread = threading.Thread(target=watch, name="config-watch", daemon=True)
+        self._watch_thread.start()
+
+    def stop_watch(self):
+        """停止文件检测线程"""
+        self._watch_stop.set()
+        self._watch_thread = None
+
+
+_configs: Dict[str, AppConfig] = {}
+_config_lock = threading.Lock()
+
+
+def get_config(path: str = "config.json") -> AppConfig:
+    """
+    获取进程内共享的配置（每个文件只加载一次）
+    配置中 hot_reload.enabled 为 true 时同时启动文件检测线程
+
+    Args:
+        path: 配置文件路径
+
+    Returns:
+        配置对象
+    """
+    key = os.path.abspath(path)
+    with _config_lock:
+        config = _configs.get(key)
+        if config is None:
+            config = AppConfig(path)
+            _configs[key] = config
+            reload_config = config.get("hot_reload", {})
+            if reload_config.get("enabled", False):
+                config.start_watch(reload_config.get("interval", 2.0))
+        return config
@@ -0,0 +1,194 @@
+"""
+connection_pool.py - uiautomator2 连接池
+进程内按序列号保留已就绪的 u2.Device 句柄：Worker 重启、风控恢复时直接复用，不再重复启动/校验 uiautomator 服务
+复用前做轻量健康检查（最近成功过则跳过），ADB 断开后在后台线程重连
+"""
+import time
+import threading
+from typing import Dict, Optional, Tuple
+
+
+class _PoolEntry:
+    """单台设备的连接"""
+
+    __slots__ = ("device", "info", "last_ok", "lock", "reconnecting")
+
+    def __init__(self):
+        self.device = None
+        self.info: Dict = {}
+        self.last_ok = 0.0                # 最近一次确认可用的时间
+        self.lock = threading.Lock()      # 串行化同一设备的连接/检查
+        self.reconnecting = False
+
+
+class ConnectionPool:
+    """
+    设备连接池（多台设备共享一个实例，见 get_connection_pool）
+    acquire 返回 (device, info)，info 为 device.info（含屏幕尺寸）
+    """
+
+    def __init__(self, check_interval: float = 10.0, reconnect_attempts: int = 5, reconnect_delay: float = 3.0):
+        """
+        初始化连接池
+
+        Args:
+            check_interval: 距最近一次成功不超过该秒数时跳过健康检查
+            reconnect_attempts: 后台重连最大尝试次数
+            reconnect_delay: 后台重连初始间隔（秒，逐次翻倍）
+        """
+        self.check_interval = check_interval
+        self.reconnect_attempts = reconnect_attempts
+        self.reconnect_delay = reconnect_delay
+
+        self._entries: Dict[str, _PoolEntry] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, serial: str) -> _PoolEntry:
+        with self._lock:
+            entry = self._entries.get(serial)
+            if entry is None:
+                entry = _PoolEntry()
+                self._entries[serial] = entry
+            return entry
+
+    @staticmethod
+    def _connect(serial: str):
+        """新建连接（可能启动 uiautomator 服务，耗时较长）"""
+        import uiautomator2 as u2
+        return u2.connect(serial)
+
+    def acquire(self, serial: str) -> Tuple[object, Dict, bool]:
+        """
+        获取设备连接（池中句柄可用时直接复用）
+
+        Args:
+            serial: 设备序列号
+
+        Returns:
+            (device, info, 是否复用)
+
+        Raises:
+            连接失败时抛出 uiautomator2 的异常
+        """
+        entry = self._entry(serial)
+        with entry.lock:
+            if entry.device is not None and self._check(entry):
+                return entry.device, entry.info, True
+
+            device = self._connect(serial)
+            entry.info = device.info
+            entry.device = device
+            entry.last_ok = time.time()
+            return device, entry.info, False
+
+    def _check(self, entry: _PoolEntry) -> bool:
+        """轻量健康检查：最近成功过则跳过，否则读一次 device.info（需持有 entry.lock）"""
+        if time.time() - entry.last_ok < self.check_interval:
+            return True
+        try:
+            entry.info = entry.device.info
+            entry.last_ok = time.time()
+            return True
+        except Exception:
+            entry.device = None
+            return False
+
+    def release(self, serial: str, failed: bool = False):
+        """
+        归还连接：句柄留在池中
+        归还本身不代表连接可用，不刷新 last_ok（只在健康检查/操作成功后刷新）
+
+        Args:
+            serial: 设备序列号
+            failed: 调用方因连接异常而放弃时为 True，下次复用前强制健康检查
+        """
+        with self._lock:
+            entry = self._entries.get(serial)
+        if entry and failed:
+            entry.last_ok = 0.0
+
+    def mark_ok(self, serial: str):
+        """调用方确认连接可用（如刚成功执行过操作），下次复用时可跳过检查"""
+        with self._lock:
+            entry = self._entries.get(serial)
+        if entry:
+            entry.last_ok = time.time()
+
+    def invalidate(self, serial: str, reconnect: bool = True):
+        """
+        连接失效（ADB 断开等）：丢弃句柄，可选在后台重连
+
+        Args:
+            serial: 设备序列号
+            reconnect: 是否启动后台重连
+        """
+        entry = self._entry(serial)
+        entry.device = None
+        entry.last_ok = 0.0
+        if reconnect:
+            self.reconnect_async(serial)
+
+    def reconnect_async(self, serial: str):
+        """在后台线程重连（同一设备同时只有一个重连线程；重连期间 acquire 会等待其完成）"""
+        entry = self._entry(serial)
+        with self._lock:
+            if entry.reconnecting:
+                return
+            entry.reconnecting = True
+
+        threading.Thread(target=self._reconnect_loop, args=(serial, entry), daemon=True).start()
+
+    def _reconnect_loop(self, serial: str, entry: _PoolEntry):
+        delay = self.reconnect_delay
+        try:
+            for attempt in range(1, self.reconnect_attempts + 1):
+                with entry.lock:
+                    if entry.device is not None and self._check(entry):
+                        return
+                    try:
+                        device = self._connect(serial)
+                        entry.info = device.info
+                        entry.device = device
+                        entry.last_ok = time.time()
+                        return
+                    except Exception as e:
+                        print(f"后台重连失败 {serial} (第{attempt}次): {e}")
+                time.sleep(delay)
+                delay *= 2
+        finally:
+            with self._lock:
+                entry.reconnecting = False
+
+    def on_device_state(self, serial: str, online: bool):
+        """
+        设备状态变化通知（如设备列表监听）：池中已有的设备重新上线时后台预热连接，离线时丢弃句柄
+
+        Args:
+            serial: 设备序列号
+            online: 是否在线
+        """
+        with self._lock:
+            if serial not in self._entries:
+                return
+        if online:
+            self.reconnect_async(serial)
+        else:
+            self.invalidate(serial, reconnect=False)
+
+    def discard(self, serial: str):
+        """移除设备连接"""
+        with self._lock:
+            self._entries.pop(serial, None)
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_connection_pool() -> ConnectionPool:
+    """获取进程内共享的连接池"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool()
+        return _pool
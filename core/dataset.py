@@ -0,0 +1,205 @@
+"""
+dataset.py - 汇总数据集模块
+把所有设备、所有店铺的采集结果增量写入一个按 日期/设备 分区的列式数据集，并提供读取接口
+日期为本轮任务的开始日期（由调用方传入），跨天/断点续跑的任务仍写入同一分区
+有 pyarrow 时写 Parquet，否则写 CSV；每个店铺一个分段文件，重新导出同一店铺时原子替换
+目录结构: output/dataset/date=YYYY-MM-DD/device={serial}/{shop}_{task_id}.parquet|csv
+"""
+import os
+import csv
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from core import paths
+from core.exporter import ExcelExporter, ShopExport
+
+# pyarrow 可选：未安装时使用 CSV
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+# 数据列（与 xlsx 表头一致）；分区列 date/device 由目录名给出，读取时附加
+COLUMNS = ExcelExporter.HEADERS
+PART_EXTENSIONS = (".parquet", ".csv")
+
+
+class ResultDataset:
+    """
+    汇总数据集
+    写入: append(serial, job)；读取: partitions / iter_records / read / to_dataframe
+    """
+
+    def __init__(self, base_output_dir: str = "output", file_format: str = "auto"):
+        """
+        初始化数据集
+
+        Args:
+            base_output_dir: 输出根目录（如 "output"）
+            file_format: "parquet" / "csv" / "auto"（有 pyarrow 时用 parquet）
+        """
+        self.base_output_dir = base_output_dir
+        if file_format == "auto":
+            file_format = "parquet" if HAS_PYARROW else "csv"
+        if file_format == "parquet" and not HAS_PYARROW:
+            print("未安装 pyarrow，汇总数据集改用 CSV 格式")
+            file_format = "csv"
+        self.file_format = file_format
+
+    @property
+    def root(self) -> str:
+        """数据集根目录"""
+        return os.path.join(self.base_output_dir, "dataset")
+
+    def append(self, serial: str, job: ShopExport, date: Optional[str] = None) -> Optional[str]:
+        """
+        写入一个店铺的记录（临时文件 + 重命名，原子替换同名分段）
+
+        Args:
+            serial: 设备序列号
+            job: 导出任务
+            date: 分区日期（本轮任务的开始日期，默认今天）
+
+        Returns:
+            分段文件路径，失败返回None
+        """
+        if not job.records:
+            return None
+
+        date = date or datetime.now().strftime("%Y-%m-%d")
+        part_dir = paths.dataset_partition_dir(self.base_output_dir, date, serial)
+        filename = f"{paths.sanitize_filename(job.shop_name)}_{job.task_id}.{self.file_format}"
+        filepath = os.path.join(part_dir, filename)
+        tmp_file = filepath + ".tmp"
+
+        rows = [
+            [job.task_id, job.poi, job.shop_name] + record.to_list()
+            for record in job.records
+        ]
+
+        try:
+            if self.file_format == "parquet":
+                columns = {name: [row[i] for row in rows] for i, name in enumerate(COLUMNS)}
+                pq.write_table(pa.table(columns), tmp_file)
+            else:
+                with open(tmp_file, 'w', encoding='utf-8', newline='') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(COLUMNS)
+                    writer.writerows(rows)
+            os.replace(tmp_file, filepath)
+            return filepath
+        except Exception as e:
+            print(f"写入汇总数据集失败: {e}")
+            return None
+
+    def partitions(self, date: Optional[str] = None, device: Optional[str] = None) -> List[Tuple[str, str, str]]:
+        """
+        列出分区
+
+        Args:
+            date: 只列出该日期（可选）
+            device: 只列出该设备（可选）
+
+        Returns:
+            [(日期, 设备, 分区目录), ...]，按日期、设备排序
+        """
+        result = []
+        if not os.path.isdir(self.root):
+            return result
+
+        for date_name in sorted(os.listdir(self.root)):
+            if not date_name.startswith("date="):
+                continue
+            part_date = date_name[len("date="):]
+            if date and part_date != date:
+                continue
+            date_dir = os.path.join(self.root, date_name)
+            if not os.path.isdir(date_dir):
+                continue
+            for device_name in sorted(os.listdir(date_dir)):
+                if not device_name.startswith("device="):
+                    continue
+                part_device = device_name[len("device="):]
+                if device and part_device != paths.sanitize_filename(device):
+                    continue
+                result.append((part_date, part_device, os.path.join(date_dir, device_name)))
+        return result
+
+    def dates(self) -> List[str]:
+        """已有数据的日期（升序）"""
+        return sorted({date for date, _, _ in self.partitions()})
+
+    def latest_dates(self, device: Optional[str] = None) -> Dict[str, str]:
+        """
+        各设备最近一轮任务的分区日期
+
+        Args:
+            device: 只看该设备（可选）
+
+        Returns:
+            {设备: 日期}
+        """
+        # partitions 按日期升序，后出现的覆盖先出现的
+        return {part_device: part_date for part_date, part_device, _ in self.partitions(device=device)}
+
+    def iter_records(
+        self,
+        date: Optional[str] = None,
+        device: Optional[str] = None,
+        shop: Optional[str] = None
+    ) -> Iterator[Dict]:
+        """
+        流式读取记录
+
+        Args:
+            date: 日期过滤（可选）
+            device: 设备过滤（可选）
+            shop: 店铺名过滤（可选）
+
+        Yields:
+            {"date", "device", "定位ID", "定位点", "店铺名字", "商品分类", "商品名字", "月销量", "价格"}
+        """
+        for part_date, part_device, part_dir in self.partitions(date, device):
+            for filename in sorted(os.listdir(part_dir)):
+                if not filename.endswith(PART_EXTENSIONS):
+                    continue
+                for row in self._read_part(os.path.join(part_dir, filename)):
+                    if shop and row.get("店铺名字") != shop:
+                        continue
+                    row["date"] = part_date
+                    row["device"] = part_device
+                    yield row
+
+    def read(self, date: Optional[str] = None, device: Optional[str] = None, shop: Optional[str] = None) -> List[Dict]:
+        """读取全部匹配记录（参数同 iter_records）"""
+        return list(self.iter_records(date, device, shop))
+
+    def to_dataframe(self, date: Optional[str] = None, device: Optional[str] = None, shop: Optional[str] = None):
+        """读取为 pandas.DataFrame（需要 pandas，参数同 iter_records）"""
+        import pandas as pd
+        return pd.DataFrame(self.read(date, device, shop), columns=["date", "device"] + COLUMNS)
+
+    @staticmethod
+    def _read_part(filepath: str) -> Iterator[Dict]:
+        """读取单个分段文件"""
+        try:
+            if filepath.endswith(".parquet"):
+                if not HAS_PYARROW:
+                    print(f"未安装 pyarrow，跳过分段: {filepath}")
+                    return
+                data = pq.read_table(filepath).to_pydict()
+                names = list(data.keys())
+                for values in zip(*(data[name] for name in names)):
+                    yield dict(zip(names, values))
+            else:
+                with open(filepath, 'r', encoding='utf-8', newline='') as f:
+                    for row in csv.DictReader(f):
+                        # CSV 无类型：定位ID 还原为整数，与 Parquet 一致
+                        if row.get("定位ID", "").isdigit():
+                            row["定位ID"] = int(row["定位ID"])
+                        yield row
+        except Exception as e:
+            print(f"读取数据集分段失败 {filepath}: {e}")
@@ -1,10 +1,14 @@
 """
 device_manager.py - 设备管理模块
 使用 adbutils 获取设备列表，管理设备状态
+设备状态由一次 host 查询获得，型号/SDK/分辨率等静态属性按序列号缓存，新设备在线程池中并行探测；
+刷新返回变化的设备（供界面增量更新），可选用 ADB track-devices 监听设备变化代替轮询
 """
-from typing import List, Dict, Optional
-from dataclasses import dataclass
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from enum import Enum
+from typing import Callable, List, Dict, Optional
 
 # 使用 adbutils 替代 subprocess 调用 adb（更可靠，不依赖PATH）
 try:
@@ -28,6 +32,8 @@ class DeviceInfo:
     serial: str                          # 设备序列号
     status: DeviceStatus = DeviceStatus.UNKNOWN  # 设备状态
     model: str = ""                      # 设备型号
+    sdk: str = ""                        # Android SDK 版本
+    resolution: str = ""                 # 屏幕分辨率（宽x高）
     task_status: str = "空闲"             # 任务状态
     task_file: str = ""                  # 任务文件路径
     progress: str = "0/0"                # 进度
@@ -37,6 +43,8 @@ class DeviceInfo:
             "serial": self.serial,
             "status": self.status.value,
             "model": self.model,
+            "sdk": self.sdk,
+            "resolution": self.resolution,
             "task_status": self.task_status,
             "task_file": self.task_file,
             "progress": self.progress
@@ -49,9 +57,40 @@ class DeviceManager:
     管理多台Android设备的连接和状态
     """
     
-    def __init__(self):
-        """初始化设备管理器"""
+    # adb 状态 -> 设备状态
+    STATE_MAPPING = {
+        "device": DeviceStatus.ONLINE,
+        "offline": DeviceStatus.OFFLINE,
+        "unauthorized": DeviceStatus.UNAUTHORIZED,
+    }
+    
+    def __init__(self, max_workers: int = 8, host: str = "127.0.0.1", port: int = 5037):
+        """
+        初始化设备管理器
+        
+        Args:
+            max_workers: 并行探测设备属性的线程数
+            host: adb server 地址
+            port: adb server 端口
+        """
         self.devices: Dict[str, DeviceInfo] = {}
+        self.host = host
+        self.port = port
+        
+        # 静态属性缓存：serial -> {"model", "sdk", "resolution"}（设备重新插拔不会变化）
+        self._props: Dict[str, Dict[str, str]] = {}
+        
+        self._lock = threading.RLock()            # 保护 devices（刷新可能在后台线程执行）
+        self._refresh_lock = threading.Lock()     # 串行化刷新
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="adb-probe")
+        
+        # track-devices 监听
+        self._watch_thread: Optional[threading.Thread] = None
+        self._watch_stop = threading.Event()
+    
+    def _client(self):
+        """adb 客户端"""
+        return adbutils.AdbClient(host=self.host, port=self.port)
     
     def refresh_devices(self) -> List[DeviceInfo]:
         """
@@ -61,65 +100,149 @@ class DeviceManager:
         Returns:
             设备信息列表
         """
+        self.refresh_changes()
+        return self.list_devices()
+    
+    def refresh_changes(self) -> List[DeviceInfo]:
+        """
+        刷新设备列表并返回发生变化的设备（可在后台线程调用）
+        
+        Returns:
+            新增或状态/属性有变化的设备（副本）
+        """
         if not HAS_ADBUTILS:
             print("adbutils 未安装，请运行: pip install adbutils")
-            return list(self.devices.values())
+            return []
         
-        try:
-            # 获取 adb 客户端
-            adb = adbutils.AdbClient(host="127.0.0.1", port=5037)
-            device_list = adb.device_list()
-            
-            # 记录当前在线的设备
-            current_serials = set()
-            
-            for d in device_list:
-                serial = d.serial
-                current_serials.add(serial)
+        with self._refresh_lock:
+            try:
+                adb = self._client()
+                
+                # 一次 host 查询得到全部设备及状态
+                states = {info.serial: info.state for info in adb.list()}
                 
-                # 确定设备状态
-                try:
-                    state = d.get_state()
-                    if state == "device":
-                        status = DeviceStatus.ONLINE
-                    elif state == "offline":
-                        status = DeviceStatus.OFFLINE
-                    elif state == "unauthorized":
-                        status = DeviceStatus.UNAUTHORIZED
-                    else:
-                        status = DeviceStatus.UNKNOWN
-                except:
-                    status = DeviceStatus.ONLINE  # 默认在线
+                # 新上线且未缓存属性的设备：并行探测
+                to_probe = [
+                    serial for serial, state in states.items()
+                    if state == "device" and serial not in self._props
+                ]
+                if to_probe:
+                    for serial, props in zip(to_probe, self._pool.map(self._probe_props, [adb] * len(to_probe), to_probe)):
+                        if props:
+                            self._props[serial] = props
                 
-                # 获取型号
-                model = ""
-                try:
-                    model = d.prop.model or ""
-                except:
-                    pass
+                return self._apply(states)
                 
-                # 更新或添加设备
-                if serial in self.devices:
-                    self.devices[serial].status = status
-                    if model:
-                        self.devices[serial].model = model
+            except Exception as e:
+                print(f"刷新设备列表失败: {e}")
+                return []
+    
+    @staticmethod
+    def _probe_props(adb, serial: str) -> Optional[Dict[str, str]]:
+        """
+        读取设备静态属性（在探测线程中执行）
+        
+        Returns:
+            {"model", "sdk", "resolution"}，设备无响应时返回None
+        """
+        try:
+            d = adb.device(serial=serial)
+            props = {"model": d.prop.model or "", "sdk": d.getprop("ro.build.version.sdk") or "", "resolution": ""}
+            try:
+                width, height = d.window_size()
+                props["resolution"] = f"{width}x{height}"
+            except Exception:
+                pass
+            return props
+        except Exception as e:
+            print(f"读取设备属性失败 {serial}: {e}")
+            return None
+    
+    def _apply(self, states: Dict[str, str]) -> List[DeviceInfo]:
+        """
+        合并本次查询结果，返回变化的设备
+        
+        Args:
+            states: serial -> adb 状态
+        """
+        changed = []
+        with self._lock:
+            for serial, state in states.items():
+                status = self.STATE_MAPPING.get(state, DeviceStatus.UNKNOWN)
+                props = self._props.get(serial, {})
+                
+                device = self.devices.get(serial)
+                if device is None:
+                    device = DeviceInfo(serial=serial)
+                    self.devices[serial] = device
+                    is_new = True
                 else:
-                    self.devices[serial] = DeviceInfo(
-                        serial=serial,
-                        status=status,
-                        model=model
-                    )
+                    is_new = False
+                
+                before = (device.status, device.model, device.sdk, device.resolution)
+                device.status = status
+                device.model = props.get("model") or device.model
+                device.sdk = props.get("sdk") or device.sdk
+                device.resolution = props.get("resolution") or device.resolution
+                
+                if is_new or before != (device.status, device.model, device.sdk, device.resolution):
+                    changed.append(replace(device))
             
             # 标记离线设备
-            for serial in list(self.devices.keys()):
-                if serial not in current_serials:
-                    self.devices[serial].status = DeviceStatus.OFFLINE
-            
-            return list(self.devices.values())
+            for serial, device in self.devices.items():
+                if serial not in states and device.status != DeviceStatus.OFFLINE:
+                    device.status = DeviceStatus.OFFLINE
+                    changed.append(replace(device))
+        
+        return changed
+    
+    def watch(self, on_change: Callable[[List[DeviceInfo]], None]) -> bool:
+        """
+        启动 ADB track-devices 监听：设备插拔/状态变化时刷新，并回调变化的设备（回调在监听线程中执行）
+        
+        Args:
+            on_change: 变化回调
             
-        except Exception as e:
-            print(f"刷新设备列表失败: {e}")
-            return list(self.devices.values())
+        Returns:
+            是否启动成功（adbutils 不可用或不支持时返回 False，调用方应回退到轮询）
+        """
+        if not HAS_ADBUTILS or not hasattr(adbutils.AdbClient, "track_devices"):
+            return False
+        if self._watch_thread and self._watch_thread.is_alive():
+            return True
+        
+        self._watch_stop.clear()
+        self._watch_thread = threading.Thread(target=self._watch_loop, args=(on_change,), daemon=True)
+        self._watch_thread.start()
+        return True
+    
+    def _watch_loop(self, on_change: Callable[[List[DeviceInfo]], None]):
+        """监听线程：adb server 断开时稍后重连"""
+        while not self._watch_stop.is_set():
+            try:
+                for _ in self._client().track_devices():
+                    if self._watch_stop.is_set():
+                        return
+                    changes = self.refresh_changes()
+                    if changes:
+                        on_change(changes)
+            except Exception as e:
+                print(f"设备监听中断，稍后重连: {e}")
+            self._watch_stop.wait(3)
+    
+    def stop_watch(self):
+        """停止监听（监听线程在下一次事件或重连时退出）"""
+        self._watch_stop.set()
+    
+    @property
+    def watching(self) -> bool:
+        """track-devices 监听是否在运行"""
+        return bool(self._watch_thread and self._watch_thread.is_alive() and not self._watch_stop.is_set())
+    
+    def list_devices(self) -> List[DeviceInfo]:
+        """当前设备列表（副本）"""
+        with self._lock:
+            return [replace(device) for device in self.devices.values()]
     
     def get_device(self, serial: str) -> Optional[DeviceInfo]:
         """
@@ -135,7 +258,8 @@ class DeviceManager:
     
     def get_online_devices(self) -> List[DeviceInfo]:
         """获取所有在线设备"""
-        return [d for d in self.devices.values() if d.status == DeviceStatus.ONLINE]
+        with self._lock:
+            return [d for d in self.devices.values() if d.status == DeviceStatus.ONLINE]
     
     def update_device_task_status(
         self, 
@@ -153,12 +277,13 @@ class DeviceManager:
             progress: 进度
             task_file: 任务文件
         """
-        if serial in self.devices:
-            self.devices[serial].task_status = task_status
-            if progress:
-                self.devices[serial].progress = progress
-            if task_file:
-                self.devices[serial].task_file = task_file
+        with self._lock:
+            if serial in self.devices:
+                self.devices[serial].task_status = task_status
+                if progress:
+                    self.devices[serial].progress = progress
+                if task_file:
+                    self.devices[serial].task_file = task_file
     
     def get_device_count(self) -> int:
         """获取设备数量"""
@@ -170,4 +295,5 @@ class DeviceManager:
     
     def clear(self):
         """清空设备列表"""
-        self.devices.clear()
+        with self._lock:
+            self.devices.clear()
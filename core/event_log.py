@@ -0,0 +1,201 @@
+"""
+event_log.py - 结构化事件日志模块
+与 {serial}.log 文本日志并行输出 JSON Lines 事件流，便于分析脚本流式读取
+支持按大小/按时间轮转，旧分段自动 gzip 压缩，保留份数有上限
+"""
+import os
+import gzip
+import json
+import time
+import shutil
+import logging
+from logging.handlers import RotatingFileHandler
+from datetime import datetime
+from typing import Optional, Dict, Any, Iterator
+
+from core import paths
+
+
+class SizeTimeRotatingHandler(RotatingFileHandler):
+    """
+    同时按文件大小和时间间隔轮转的处理器
+    轮转出的旧分段命名为 events.jsonl.1.gz, events.jsonl.2.gz ...（数字越大越旧）
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        max_bytes: int,
+        interval_seconds: float,
+        backup_count: int,
+        compress: bool = True
+    ):
+        """
+        初始化轮转处理器
+
+        Args:
+            filename: 当前日志文件路径
+            max_bytes: 单个分段最大字节数（0 表示不按大小轮转）
+            interval_seconds: 时间轮转间隔秒数（0 表示不按时间轮转）
+            backup_count: 保留的旧分段数量
+            compress: 旧分段是否 gzip 压缩
+        """
+        super().__init__(
+            filename,
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding='utf-8',
+            delay=True
+        )
+        self.interval_seconds = interval_seconds
+
+        # 已有文件时以其修改时间为起点，避免重启后时间轮转被无限推迟
+        start = os.path.getmtime(filename) if os.path.exists(filename) else time.time()
+        self.rollover_at = start + interval_seconds
+
+        if compress:
+            self.namer = self._gzip_namer
+            self.rotator = self._gzip_rotator
+
+    @staticmethod
+    def _gzip_namer(name: str) -> str:
+        return name + ".gz"
+
+    @staticmethod
+    def _gzip_rotator(source: str, dest: str):
+        """压缩旧分段并删除原文件"""
+        with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(source)
+
+    def shouldRollover(self, record) -> int:
+        if self.interval_seconds > 0 and time.time() >= self.rollover_at:
+            return 1
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = time.time() + self.interval_seconds
+
+
+class EventLogger:
+    """
+    设备结构化事件记录器
+    每条事件一行 JSON: {"ts", "event", "serial", "shop", ...自定义字段}
+    """
+
+    def __init__(self, device_serial: str, base_output_dir: str = "output", config: Optional[dict] = None):
+        """
+        初始化事件记录器
+
+        Args:
+            device_serial: 设备序列号
+            base_output_dir: 输出根目录（如 "output"）
+            config: config.json 中的 event_log 配置段
+        """
+        config = config or {}
+        self.device_serial = device_serial
+        self.enabled = config.get("enabled", True)
+
+        # 事件文件: output/{serial}/logs/events.jsonl
+        self.log_file = paths.events_log_path(base_output_dir, device_serial)
+
+        # 公共上下文字段（店铺等），由 bind() 更新
+        self._context: Dict[str, Any] = {"serial": device_serial}
+
+        self.logger = logging.getLogger(f"events_{device_serial}")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        for handler in self.logger.handlers:
+            handler.close()
+        self.logger.handlers.clear()
+
+        if self.enabled:
+            handler = SizeTimeRotatingHandler(
+                self.log_file,
+                max_bytes=int(config.get("max_bytes", 10 * 1024 * 1024)),
+                interval_seconds=float(config.get("rotate_hours", 24)) * 3600,
+                backup_count=int(config.get("backup_count", 20)),
+                compress=config.get("compress", True)
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self.logger.addHandler(handler)
+
+    def bind(self, **fields):
+        """设置后续事件共用的上下文字段（值为 None 时移除该字段）"""
+        for name, value in fields.items():
+            if value is None:
+                self._context.pop(name, None)
+            else:
+                self._context[name] = value
+
+    def emit(self, event: str, **fields):
+        """
+        记录一条事件
+
+        Args:
+            event: 事件类型（如 item / frame / category_switch）
+            **fields: 事件字段
+        """
+        if not self.enabled:
+            return
+
+        entry = {
+            "ts": datetime.now().isoformat(timespec='milliseconds'),
+            "event": event
+        }
+        entry.update(self._context)
+        entry.update(fields)
+
+        try:
+            self.logger.info(json.dumps(entry, ensure_ascii=False, default=str))
+        except Exception as e:
+            print(f"写入事件日志失败: {e}")
+
+    def close(self):
+        """关闭文件句柄"""
+        for handler in self.logger.handlers:
+            handler.close()
+
+
+def iter_events(base_output_dir: str, serial: str) -> Iterator[Dict[str, Any]]:
+    """
+    按时间顺序流式读取设备的全部事件（含已压缩的旧分段）
+
+    Args:
+        base_output_dir: 输出根目录
+        serial: 设备序列号
+
+    Yields:
+        事件字典
+    """
+    log_file = paths.events_log_path(base_output_dir, serial)
+
+    # 旧分段：编号越大越旧，先读旧的
+    segments = []
+    index = 1
+    while os.path.exists(f"{log_file}.{index}.gz") or os.path.exists(f"{log_file}.{index}"):
+        segments.append(index)
+        index += 1
+
+    files = []
+    for index in reversed(segments):
+        if os.path.exists(f"{log_file}.{index}.gz"):
+            files.append(f"{log_file}.{index}.gz")
+        else:
+            files.append(f"{log_file}.{index}")
+    if os.path.exists(log_file):
+        files.append(log_file)
+
+    for file_path in files:
+        opener = gzip.open if file_path.endswith(".gz") else open
+        with opener(file_path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # 进程被强杀时最后一行可能不完整
+                    continue
@@ -0,0 +1,95 @@
+"""
+export_service.py - 后台导出服务
+店铺采集结束后，导出任务（连同记录列表）交给一个小线程池写出xlsx，
+设备可立即导航到下一个店铺；完成/失败通过回调回报给提交方
+"""
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, List, Optional
+
+from core.exporter import ShopExport
+
+
+class ExportService:
+    """
+    导出线程池（多台设备共享一个实例，见 get_export_service）
+    回调在导出线程中执行: on_done(job, filepath, elapsed_ms)，失败时 filepath 为 None
+    """
+
+    def __init__(self, max_workers: int = 2):
+        """
+        初始化导出服务
+
+        Args:
+            max_workers: 并行写出的最大店铺数
+        """
+        self.max_workers = max(1, max_workers)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="export")
+
+    def submit(
+        self,
+        write: Callable[[ShopExport], Optional[str]],
+        job: ShopExport,
+        on_done: Optional[Callable[[ShopExport, Optional[str], int], None]] = None
+    ) -> Future:
+        """
+        提交导出任务
+
+        Args:
+            write: 写出函数（如 ExcelExporter.write）
+            job: 导出任务（提交后不应再修改其记录列表）
+            on_done: 完成回调
+
+        Returns:
+            Future，结果为导出文件路径（失败为 None）
+        """
+        def run() -> Optional[str]:
+            start_time = time.time()
+            filepath = None
+            try:
+                filepath = write(job)
+            except Exception as e:
+                print(f"后台导出失败: {e}")
+            if on_done:
+                try:
+                    on_done(job, filepath, int((time.time() - start_time) * 1000))
+                except Exception as e:
+                    print(f"导出回调失败: {e}")
+            return filepath
+
+        return self._pool.submit(run)
+
+    @staticmethod
+    def wait(futures: List[Future], timeout: Optional[float] = None) -> bool:
+        """
+        等待一组导出任务完成
+
+        Args:
+            futures: submit 返回的 Future 列表
+            timeout: 超时秒数（None 表示一直等待）
+
+        Returns:
+            是否全部完成
+        """
+        if not futures:
+            return True
+        _, not_done = wait(futures, timeout=timeout)
+        return not not_done
+
+    def shutdown(self, wait_done: bool = True):
+        """关闭线程池"""
+        self._pool.shutdown(wait=wait_done)
+
+
+_service: Optional[ExportService] = None
+_service_lock = threading.Lock()
+
+
+def get_export_service(max_workers: int = 2) -> ExportService:
+    """获取进程内共享的导出服务（首次调用时按 max_workers 创建）"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ExportService(max_workers)
+        return _service
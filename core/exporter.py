@@ -1,31 +1,53 @@
 """
 exporter.py - Excel 导出模块
 以店铺名生成xlsx文件，按需求模板格式输出
+也可选择 CSV/TSV（UTF-8 BOM）格式：记录到达时逐行写入，店铺结束时只需改名；xlsx 按需由其转换生成
+openpyxl 只在真正写 xlsx 时才导入
 """
 import os
 import re
+import csv
+import sys
 from typing import List, Dict, Optional
 from datetime import datetime
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 
 from core.logger import DeviceLogger
+from core.text_norm import clean_price, parse_sales, price_to_cents, format_price
 
 
 class DrugRecord:
-    """药品记录"""
+    """
+    药品记录
+    月销和价格以整数保存（sales 为数量，price_cents 为分，None 表示无价格），便于排序、汇总和比价；
+    "月售N" 和价格文本只在导出时生成。分类名驻留（同一店铺成千上万条记录共享少量分类字符串）
+    """
+    
+    __slots__ = ("category_name", "drug_name", "sales", "price_cents")
     
     def __init__(
         self,
         category_name: str,
         drug_name: str,
-        monthly_sales: str,
-        price: str
+        sales: int = 0,
+        price_cents: Optional[int] = None
     ):
-        self.category_name = category_name
+        self.category_name = sys.intern(category_name)
         self.drug_name = drug_name
-        self.monthly_sales = monthly_sales
-        self.price = price
+        self.sales = sales
+        self.price_cents = price_cents
+    
+    @property
+    def monthly_sales(self) -> str:
+        """月销文本（"月售123"）"""
+        return f"月售{self.sales}"
+    
+    @property
+    def price(self) -> str:
+        """价格文本（"19.8"）"""
+        return format_price(self.price_cents)
+    
+    def __repr__(self) -> str:
+        return f"DrugRecord({self.category_name}, {self.drug_name}, {self.sales}, {self.price_cents})"
     
     def to_dict(self) -> Dict[str, str]:
         return {
@@ -44,17 +66,133 @@ class DrugRecord:
         ]
 
 
+class ShopExport:
+    """一次店铺导出任务（记录列表的所有权随任务转移，可交给后台线程写出）"""
+
+    def __init__(
+        self,
+        shop_name: str,
+        poi: str,
+        task_id: int,
+        records: List[DrugRecord],
+        filepath: str,
+        stream_path: str = ""
+    ):
+        self.shop_name = shop_name
+        self.poi = poi
+        self.task_id = task_id
+        self.records = records
+        self.filepath = filepath
+        self.stream_path = stream_path  # CSV/TSV 模式下逐行写入的临时文件（写出时改名为 filepath）
+
+
+# CSV/TSV 分隔符
+DELIMITERS = {"csv": ",", "tsv": "\t"}
+
+
+def write_xlsx(filepath: str, headers: List[str], rows) -> int:
+    """
+    按需求模板样式写出xlsx（失败时抛出异常）
+    
+    Args:
+        filepath: 输出路径
+        headers: 表头
+        rows: 数据行（可迭代，每行与表头等长）
+        
+    Returns:
+        写入的数据行数
+    """
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, Alignment, PatternFill
+    
+    # 创建工作簿
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "药品数据"
+    
+    # 设置表头样式
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    header_alignment = Alignment(horizontal="center", vertical="center")
+    
+    # 写入表头
+    for col, header in enumerate(headers, 1):
+        cell = ws.cell(row=1, column=col, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = header_alignment
+    
+    # 写入数据
+    # 按需求模板：每一行都要填充定位ID、定位点、店铺名字；商品数据从第4列开始
+    count = 0
+    for row_num, row in enumerate(rows, 2):
+        for col, value in enumerate(row, 1):
+            cell = ws.cell(row=row_num, column=col, value=value)
+            if col >= 4:
+                cell.alignment = Alignment(horizontal="left", vertical="center")
+        count += 1
+    
+    # 调整列宽
+    column_widths = [10, 35, 25, 15, 40, 12, 12]
+    for col, width in enumerate(column_widths, 1):
+        if col <= len(column_widths):
+            ws.column_dimensions[chr(64 + col)].width = width
+    
+    # 冻结首行
+    ws.freeze_panes = 'A2'
+    
+    # 保存
+    wb.save(filepath)
+    wb.close()
+    return count
+
+
+def csv_to_xlsx(csv_path: str, xlsx_path: Optional[str] = None) -> Optional[str]:
+    """
+    将导出的 CSV/TSV 文件转换为同格式的xlsx（按需生成）
+    
+    Args:
+        csv_path: CSV/TSV 文件路径（.tsv 按制表符分隔）
+        xlsx_path: 输出路径（默认同名 .xlsx）
+        
+    Returns:
+        xlsx文件路径，失败返回None
+    """
+    xlsx_path = xlsx_path or os.path.splitext(csv_path)[0] + ".xlsx"
+    delimiter = DELIMITERS["tsv"] if csv_path.endswith(".tsv") else DELIMITERS["csv"]
+    try:
+        with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.reader(f, delimiter=delimiter)
+            headers = next(reader, None)
+            if not headers:
+                return None
+            # 定位ID 还原为数字，与直接导出的xlsx一致
+            rows = ([int(row[0]) if row[0].isdigit() else row[0]] + row[1:] for row in reader)
+            write_xlsx(xlsx_path, headers, rows)
+        return xlsx_path
+    except Exception as e:
+        print(f"CSV转换xlsx失败: {e}")
+        return None
+
+
 class ExcelExporter:
     """
     Excel导出器
-    将采集的药品数据导出为xlsx文件
+    将采集的药品数据导出为xlsx文件（或逐行写入的 CSV/TSV 文件）
     按需求模板格式：定位ID、定位点、店铺名字、商品分类、商品名字、月销量、价格
     """
     
     # 表头（按需求模板）
     HEADERS = ["定位ID", "定位点", "店铺名字", "商品分类", "商品名字", "月销量", "价格"]
     
-    def __init__(self, device_serial: str, base_output_dir: str = "output", logger: Optional[DeviceLogger] = None):
+    def __init__(
+        self,
+        device_serial: str,
+        base_output_dir: str = "output",
+        logger: Optional[DeviceLogger] = None,
+        file_format: str = "xlsx",
+        xlsx_copy: bool = False
+    ):
         """
         初始化导出器
         
@@ -62,10 +200,19 @@ class ExcelExporter:
             device_serial: 设备序列号
             base_output_dir: 输出根目录（如 "output"）
             logger: 日志器
+            file_format: 导出格式 "xlsx" / "csv" / "tsv"
+            xlsx_copy: CSV/TSV 格式下是否在导出时额外生成xlsx
         """
         self.device_serial = device_serial
         self.base_output_dir = base_output_dir
         self.logger = logger
+        self.file_format = file_format if file_format in ("xlsx", "csv", "tsv") else "xlsx"
+        self.xlsx_copy = xlsx_copy
+        
+        # CSV/TSV 逐行写入的文件
+        self._stream = None
+        self._stream_writer = None
+        self._stream_path = ""
         
         # 使用 paths 模块创建目录: output/{serial}/results
         from core import paths
@@ -119,11 +266,58 @@ class ExcelExporter:
             poi: 定位点地址
             task_id: 任务ID（定位ID）
         """
+        self._close_stream(discard=True)
         self.records = []
         self.current_shop_name = shop_name
         self.current_poi = poi
         self.current_task_id = task_id
         self._log(f"开始记录店铺数据: {shop_name}")
+        
+        if self.file_format in DELIMITERS:
+            self._open_stream()
+    
+    def _output_path(self, shop_name: str) -> str:
+        """店铺输出文件路径: output/{serial}/results/{shop_name}_{task_id}.{format}"""
+        safe_name = self.sanitize_filename(shop_name)
+        return os.path.join(self.results_dir, f"{safe_name}_{self.current_task_id}.{self.file_format}")
+    
+    def _open_stream(self):
+        """打开 CSV/TSV 逐行写入文件（写入中的文件以 .part 结尾）"""
+        self._stream_path = self._output_path(self.current_shop_name) + ".part"
+        try:
+            self._stream = open(self._stream_path, 'w', encoding='utf-8-sig', newline='')
+            self._stream_writer = csv.writer(self._stream, delimiter=DELIMITERS[self.file_format])
+            self._stream_writer.writerow(self.HEADERS)
+            self._stream.flush()
+        except Exception as e:
+            self._log(f"打开逐行导出文件失败: {e}", "error")
+            self._close_stream(discard=True)
+    
+    def _close_stream(self, discard: bool = False):
+        """
+        关闭逐行写入文件
+        
+        Args:
+            discard: 是否删除该文件（未导出的店铺/无数据）
+        """
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except Exception:
+                pass
+        if discard and self._stream_path and os.path.exists(self._stream_path):
+            try:
+                os.remove(self._stream_path)
+            except Exception:
+                pass
+        self._stream = None
+        self._stream_writer = None
+        if discard:
+            self._stream_path = ""
+    
+    def _row(self, record: DrugRecord) -> list:
+        """一条记录对应的输出行（与 HEADERS 顺序一致）"""
+        return [self.current_task_id, self.current_poi, self.current_shop_name] + record.to_list()
     
     def add_record(self, record: DrugRecord):
         """
@@ -133,6 +327,13 @@ class ExcelExporter:
             record: 药品记录
         """
         self.records.append(record)
+        if self._stream_writer is not None:
+            try:
+                self._stream_writer.writerow(self._row(record))
+                self._stream.flush()
+            except Exception as e:
+                self._log(f"逐行写入失败: {e}", "error")
+                self._close_stream(discard=True)
     
     def add_records(self, records: List[DrugRecord]):
         """
@@ -141,11 +342,12 @@ class ExcelExporter:
         Args:
             records: 记录列表
         """
-        self.records.extend(records)
+        for record in records:
+            self.add_record(record)
     
     def export(self, shop_name: Optional[str] = None) -> Optional[str]:
         """
-        导出当前店铺数据到xlsx
+        导出当前店铺数据到xlsx（同步写出）
         
         Args:
             shop_name: 店铺名（可选，不传则使用start_shop时设置的名称）
@@ -153,6 +355,22 @@ class ExcelExporter:
         Returns:
             导出文件路径，失败返回None
         """
+        job = self.build_job(shop_name)
+        if job is None:
+            return None
+        return self.write(job)
+    
+    def build_job(self, shop_name: Optional[str] = None, detach: bool = False) -> Optional[ShopExport]:
+        """
+        生成当前店铺的导出任务
+        
+        Args:
+            shop_name: 店铺名（可选，不传则使用start_shop时设置的名称）
+            detach: 是否移交记录列表（移交后导出器从空列表重新开始，任务可在后台写出）
+            
+        Returns:
+            导出任务；未设置店铺名或无数据时返回None
+        """
         shop_name = shop_name or self.current_shop_name
         
         if not shop_name:
@@ -163,59 +381,60 @@ class ExcelExporter:
             self._log(f"店铺 [{shop_name}] 无数据，跳过导出", "warning")
             return None
         
-        # 生成安全的文件名: output/{serial}/results/{shop_name}_{task_id}.xlsx
-        safe_name = self.sanitize_filename(shop_name)
-        filename = f"{safe_name}_{self.current_task_id}.xlsx"
-        filepath = os.path.join(self.results_dir, filename)
+        # 生成安全的文件名: output/{serial}/results/{shop_name}_{task_id}.{format}
+        filepath = self._output_path(shop_name)
+        
+        # 逐行写入的文件已包含全部记录，关闭后随任务移交
+        stream_path = ""
+        if self._stream_path:
+            self._close_stream()
+            stream_path = self._stream_path
+            self._stream_path = ""
+        
+        records = self.records
+        if detach:
+            self.records = []
+        
+        return ShopExport(shop_name, self.current_poi, self.current_task_id, records, filepath, stream_path)
+    
+    def write(self, job: ShopExport) -> Optional[str]:
+        """
+        将导出任务写为xlsx文件（只读取任务自身的数据，可在后台线程调用）
+        
+        Args:
+            job: 导出任务
+            
+        Returns:
+            导出文件路径，失败返回None
+        """
+        filepath = job.filepath
         
         try:
             self._log(f"正在导出: {filepath}")
+            rows = [[job.task_id, job.poi, job.shop_name] + record.to_list() for record in job.records]
             
-            # 创建工作簿
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "药品数据"
-            
-            # 设置表头样式
-            header_font = Font(bold=True, color="FFFFFF")
-            header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-            header_alignment = Alignment(horizontal="center", vertical="center")
-            
-            # 写入表头
-            for col, header in enumerate(self.HEADERS, 1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = header_alignment
-            
-            # 写入数据
-            # 按需求模板：每一行都要填充定位ID、定位点、店铺名字
-            for row_num, record in enumerate(self.records, 2):
-                # 每一行都写入前三列
-                ws.cell(row=row_num, column=1, value=self.current_task_id)
-                ws.cell(row=row_num, column=2, value=self.current_poi)
-                ws.cell(row=row_num, column=3, value=shop_name)
-
-                # 商品数据从第4列开始
-                data = record.to_list()  # [分类, 商品名, 月销, 价格]
-                for col, value in enumerate(data, 4):
-                    cell = ws.cell(row=row_num, column=col, value=value)
-                    cell.alignment = Alignment(horizontal="left", vertical="center")
-            
-            # 调整列宽
-            column_widths = [10, 35, 25, 15, 40, 12, 12]
-            for col, width in enumerate(column_widths, 1):
-                if col <= len(column_widths):
-                    ws.column_dimensions[chr(64 + col)].width = width
+            if filepath.endswith(".xlsx"):
+                write_xlsx(filepath, self.HEADERS, rows)
+            elif job.stream_path and os.path.exists(job.stream_path):
+                # 逐行写入的文件即为结果，改名即可
+                os.replace(job.stream_path, filepath)
+            else:
+                # 逐行写入不可用时一次性写出
+                delimiter = DELIMITERS["tsv"] if filepath.endswith(".tsv") else DELIMITERS["csv"]
+                tmp_file = filepath + ".tmp"
+                with open(tmp_file, 'w', encoding='utf-8-sig', newline='') as f:
+                    writer = csv.writer(f, delimiter=delimiter)
+                    writer.writerow(self.HEADERS)
+                    writer.writerows(rows)
+                os.replace(tmp_file, filepath)
             
-            # 冻结首行
-            ws.freeze_panes = 'A2'
+            self._log(f"导出成功: {filepath} (共{len(job.records)}条记录)")
             
-            # 保存
-            wb.save(filepath)
-            wb.close()
+            if self.xlsx_copy and not filepath.endswith(".xlsx"):
+                xlsx_path = csv_to_xlsx(filepath)
+                if xlsx_path:
+                    self._log(f"已生成xlsx: {xlsx_path}")
             
-            self._log(f"导出成功: {filepath} (共{len(self.records)}条记录)")
             return filepath
             
         except Exception as e:
@@ -228,6 +447,7 @@ class ExcelExporter:
     
     def clear(self):
         """清空记录"""
+        self._close_stream(discard=True)
         self.records = []
         self.current_shop_name = ""
         self.current_poi = ""
@@ -252,24 +472,10 @@ def create_drug_record(
     Returns:
         DrugRecord对象
     """
-    # 清理月销数据
-    # 强制格式：月售 + 数字
-    if not monthly_sales or monthly_sales.strip() == "":
-        num = "0"
-    else:
-        # 提取数字
-        sales_match = re.search(r'(\d+)', monthly_sales)
-        num = sales_match.group(1) if sales_match else "0"
-
-    monthly_sales = f"月售{num}"
-    
-    # 清理价格数据
-    if price:
-        price = price.strip().replace('¥', '').replace('￥', '')
-    
+    # 月销和价格解析为整数（数量 / 分），解析结果按原始文本缓存
     return DrugRecord(
         category_name=category_name.strip(),
         drug_name=drug_name.strip(),
-        monthly_sales=monthly_sales,
-        price=price
+        sales=parse_sales(monthly_sales),
+        price_cents=price_to_cents(clean_price(price))
     )
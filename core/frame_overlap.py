@@ -0,0 +1,62 @@
+"""
+frame_overlap.py - 帧间重叠检测模块
+将第N+1帧的商品卡片序列与第N帧对齐（上一帧的尾部 == 本帧的头部），
+只提取新滚入屏幕的卡片（滑动距离由 swipe_controller 根据重叠情况规划）
+本帧有卡片未能采集时用 truncate() 截断记录，下一帧不会因重叠而跳过这些卡片
+"""
+from typing import List, Tuple
+
+
+class FrameOverlapDetector:
+    """
+    帧间商品序列对齐器
+    卡片以 (价格Y坐标, 商品名) 表示，只记录价格已可见的完整卡片
+    """
+
+    def __init__(self):
+        """初始化重叠检测器"""
+        self._prev_cards: List[Tuple[int, str]] = []
+        self.last_overlap = 0
+        self.last_ratio = 0.0
+
+    def reset(self):
+        """清除上一帧（点击分类、跳转页面等非滑动操作之后调用）"""
+        self._prev_cards = []
+        self.last_overlap = 0
+        self.last_ratio = 0.0
+
+    def align(self, cards: List[Tuple[int, str]]) -> int:
+        """
+        将本帧卡片与上一帧对齐
+
+        Args:
+            cards: 本帧从上到下的完整卡片 [(价格Y坐标, 商品名), ...]
+
+        Returns:
+            截止Y坐标：价格Y坐标不大于该值的卡片上一帧已处理过（0 表示全部需要提取）
+        """
+        names = [name for _, name in cards]
+        prev = [name for _, name in self._prev_cards]
+
+        # 最长的"上一帧后缀 == 本帧前缀"
+        overlap = 0
+        for k in range(min(len(prev), len(names)), 0, -1):
+            if prev[-k:] == names[:k]:
+                overlap = k
+                break
+
+        self._prev_cards = list(cards)
+        self.last_overlap = overlap
+        self.last_ratio = overlap / len(names) if names else 0.0
+
+        return cards[overlap - 1][0] if overlap else 0
+
+    def truncate(self, y: int):
+        """
+        本帧价格Y坐标不小于 y 的卡片未能采集（无法归类、找不到卡片容器等）：
+        只保留其上方连续已处理的卡片，下一帧与之重叠的部分才会被跳过
+
+        Args:
+            y: 第一张未采集卡片的价格Y坐标
+        """
+        self._prev_cards = [card for card in self._prev_cards if card[0] < y]
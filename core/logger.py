@@ -4,8 +4,9 @@ logger.py - 设备独立日志模块
 """
 import os
 import logging
+import threading
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from core import paths
 
@@ -52,27 +53,33 @@ class DeviceLogger:
         # 内存日志缓存（用于UI显示）
         self.log_buffer: list[str] = []
         self.max_buffer_size = 1000
+        # 日志序号：写入缓存时递增，UI据此丢弃已包含在快照中的行
+        self._seq = 0
+        self._buffer_lock = threading.Lock()
         
         # 日志回调（用于通知UI更新）
         self.on_log_callback = None
     
     def set_log_callback(self, callback):
-        """设置日志回调函数，用于实时更新UI"""
+        """设置日志回调函数，用于实时更新UI: callback(log_entry, seq)"""
         self.on_log_callback = callback
     
     def _add_to_buffer(self, level: str, message: str):
         """添加日志到缓存"""
         timestamp = datetime.now().strftime('%H:%M:%S')
         log_entry = f"[{timestamp}][{level}] {message}"
-        self.log_buffer.append(log_entry)
-        
-        # 限制缓存大小
-        if len(self.log_buffer) > self.max_buffer_size:
-            self.log_buffer = self.log_buffer[-self.max_buffer_size:]
+        with self._buffer_lock:
+            self._seq += 1
+            seq = self._seq
+            self.log_buffer.append(log_entry)
+            
+            # 限制缓存大小
+            if len(self.log_buffer) > self.max_buffer_size:
+                self.log_buffer = self.log_buffer[-self.max_buffer_size:]
         
-        # 触发回调
+        # 触发回调（不持有缓存锁，回调方按序号去重）
         if self.on_log_callback:
-            self.on_log_callback(log_entry)
+            self.on_log_callback(log_entry, seq)
     
     def info(self, message: str):
         """记录信息日志"""
@@ -141,8 +148,20 @@ class DeviceLogger:
     
     def get_logs(self) -> list[str]:
         """获取日志缓存"""
-        return self.log_buffer.copy()
+        with self._buffer_lock:
+            return self.log_buffer.copy()
+    
+    def snapshot_logs(self) -> Tuple[List[str], int]:
+        """
+        获取日志缓存及其中最后一行的序号
+        
+        Returns:
+            (日志列表, 序号)：序号不大于该值的行都已包含在列表中
+        """
+        with self._buffer_lock:
+            return self.log_buffer.copy(), self._seq
     
     def clear_buffer(self):
         """清空日志缓存"""
-        self.log_buffer.clear()
+        with self._buffer_lock:
+            self.log_buffer.clear()
@@ -72,7 +72,7 @@ class MockAutomator:
             self.logger.info(f"[Mock] 设备 {self.device_serial} 已连接")
         return True
     
-    def disconnect(self):
+    def disconnect(self, failed: bool = False):
         """模拟断开连接"""
         self._connected = False
         if self.logger:
@@ -92,7 +92,7 @@ class MockAutomator:
         if self.logger:
             self.logger.debug("[Mock] 美团App已停止")
     
-    def swipe_up(self, duration: float = 0.5):
+    def swipe_up(self, duration: float = 0.5, distance: float = 0.40):
         """模拟向上滑动"""
         self._maybe_fail("滑动")
         time.sleep(random.uniform(0.1, 0.3))
@@ -100,6 +100,15 @@ class MockAutomator:
         if self.logger:
             self.logger.debug(f"[Mock] 向上滑动 (位置: {self._current_scroll_position})")
     
+    def swipe_down(self, duration: float = 0.5, distance: float = 0.40):
+        """模拟向下滑动"""
+        time.sleep(random.uniform(0.1, 0.3))
+        self._current_scroll_position = max(0, self._current_scroll_position - 1)
+    
+    def get_screen_size(self) -> tuple:
+        """模拟屏幕尺寸"""
+        return (self.device.info["displayWidth"], self.device.info["displayHeight"])
+    
     def press_back(self):
         """模拟返回"""
         time.sleep(random.uniform(0.05, 0.1))
@@ -145,3 +145,93 @@ def state_json_path(base_output_dir: str, serial: str) -> str:
         状态文件路径
     """
     return os.path.join(state_dir(base_output_dir, serial), "state.json")
+
+
+def events_log_path(base_output_dir: str, serial: str) -> str:
+    """
+    获取结构化事件日志路径：output/{serial}/logs/events.jsonl
+    
+    Args:
+        base_output_dir: 输出根目录
+        serial: 设备序列号
+        
+    Returns:
+        事件日志文件路径
+    """
+    return os.path.join(logs_dir(base_output_dir, serial), "events.jsonl")
+
+
+def collected_keys_bin_path(base_output_dir: str, serial: str) -> str:
+    """
+    获取紧凑去重key文件路径：output/{serial}/state/collected_keys.bin
+    （紧凑模式下以 array('Q') 保存64位key哈希）
+    
+    Args:
+        base_output_dir: 输出根目录
+        serial: 设备序列号
+        
+    Returns:
+        key哈希文件路径
+    """
+    return os.path.join(state_dir(base_output_dir, serial), "collected_keys.bin")
+
+
+def shop_cache_path(base_output_dir: str, serial: str, shop_name: str) -> str:
+    """
+    获取店铺商品缓存路径：output/{serial}/state/shop_cache/{shop_name}.json
+    
+    Args:
+        base_output_dir: 输出根目录
+        serial: 设备序列号
+        shop_name: 店铺名
+        
+    Returns:
+        店铺缓存文件路径
+    """
+    cache_dir = ensure_dir(os.path.join(state_dir(base_output_dir, serial), "shop_cache"))
+    return os.path.join(cache_dir, f"{sanitize_filename(shop_name)}.json")
+
+
+def sidebar_model_path(base_output_dir: str, serial: str, shop_name: str) -> str:
+    """
+    获取分类栏模型路径：output/{serial}/state/sidebar/{shop_name}.json
+    
+    Args:
+        base_output_dir: 输出根目录
+        serial: 设备序列号
+        shop_name: 店铺名
+        
+    Returns:
+        分类栏模型文件路径
+    """
+    model_dir = ensure_dir(os.path.join(state_dir(base_output_dir, serial), "sidebar"))
+    return os.path.join(model_dir, f"{sanitize_filename(shop_name)}.json")
+
+
+def dataset_dir(base_output_dir: str) -> str:
+    """
+    获取汇总数据集根目录：output/dataset（所有设备共用）
+    
+    Args:
+        base_output_dir: 输出根目录
+        
+    Returns:
+        数据集根目录路径
+    """
+    return ensure_dir(os.path.join(base_output_dir, "dataset"))
+
+
+def dataset_partition_dir(base_output_dir: str, date: str, serial: str) -> str:
+    """
+    获取数据集分区目录：output/dataset/date={date}/device={serial}
+    
+    Args:
+        base_output_dir: 输出根目录
+        date: 日期（YYYY-MM-DD）
+        serial: 设备序列号
+        
+    Returns:
+        分区目录路径
+    """
+    path = os.path.join(dataset_dir(base_output_dir), f"date={date}", f"device={sanitize_filename(serial)}")
+    return ensure_dir(path)
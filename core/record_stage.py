@@ -0,0 +1,183 @@
+"""
+record_stage.py - 记录暂存区
+新采集的记录先进入一个有界的待确认窗口，在随后的帧中继续收集该商品所在分类区间的证据（投票），
+分类由证据决定：证据足够且商品已滚出屏幕时按顺序提交；连续 confirm_frames 帧没有新证据的记录
+（如判定不可靠、票数为0的记录）按现有最高票提交，不会一直阻塞窗口；窗口溢出或店铺结束时强制提交。
+每条记录只在提交时写入一次最终分类；记录以去重key（StateStore.generate_key）标识，
+提交回调负责写出记录并标记该key已采集（暂存中的记录崩溃后会重新采集）。
+全部操作都在工作线程内完成，无需额外线程和锁
+"""
+from collections import deque
+from typing import Callable, Deque, Dict, List, Tuple
+
+from core.exporter import DrugRecord
+
+
+class StagedRecord:
+    """暂存中的记录及其分类证据"""
+
+    __slots__ = ("record", "key", "votes", "last_frame")
+
+    def __init__(self, record: DrugRecord, key: str, frame: int, weight: int = 1):
+        self.record = record
+        self.key = key
+        self.votes: Dict[str, int] = {record.category_name: weight}  # 分类 -> 票数（插入顺序即首次判定顺序）
+        self.last_frame = frame                                   # 最近一次被观察到的帧序号
+
+    @property
+    def category(self) -> str:
+        """当前证据下的分类（票数相同时以先判定的为准）"""
+        return max(self.votes, key=self.votes.get)
+
+    def is_confirmed(self, confirm_frames: int) -> bool:
+        """领先分类票数达到阈值且没有并列"""
+        counts = sorted(self.votes.values(), reverse=True)
+        return counts[0] >= confirm_frames and (len(counts) == 1 or counts[0] > counts[1])
+
+
+class RecordStage:
+    """
+    有界待确认窗口
+    窗口大小即回溯修正能覆盖的最近记录数（与原先"往前查8个"一致）
+    """
+
+    def __init__(self, commit: Callable[[DrugRecord, str], None], window: int = 8, confirm_frames: int = 2):
+        """
+        初始化暂存区
+
+        Args:
+            commit: 提交记录的回调 commit(record, key)（写出记录并标记key已采集）
+            window: 待确认窗口大小
+            confirm_frames: 确认分类所需的帧数（同一帧只计一票）
+        """
+        self.commit = commit
+        self.window = max(1, window)
+        self.confirm_frames = max(1, confirm_frames)
+
+        self.pending: Deque[StagedRecord] = deque()
+        self._by_key: Dict[str, StagedRecord] = {}
+        self.frame = 0
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def __contains__(self, key: str) -> bool:
+        """去重key是否在暂存中（尚未标记为已采集）"""
+        return key in self._by_key
+
+    def begin_frame(self):
+        """开始新的一帧（每次滑动后、采集前调用）：先提交上一帧结束时已确认且已滚出屏幕的记录"""
+        self._commit_ready()
+        self.frame += 1
+
+    def add(self, record: DrugRecord, key: str, weight: int = 1) -> bool:
+        """
+        暂存一条记录（record.category_name 为本帧判定的分类）
+
+        Args:
+            record: 药品记录
+            key: 去重key（与 StateStore 一致）
+            weight: 本帧判定的票数；判定不可靠时传 0，分类完全由后续帧的证据决定（无证据时仍用该分类）
+
+        Returns:
+            是否暂存（同一key已在暂存中时返回 False）
+        """
+        if key in self._by_key:
+            return False
+        entry = StagedRecord(record, key, self.frame, weight)
+        self.pending.append(entry)
+        self._by_key[key] = entry
+        while len(self.pending) > self.window:
+            self._commit_head()
+        return True
+
+    def vote(self, key: str, category: str) -> bool:
+        """
+        记录一帧的分类证据（商品在该帧中位于 category 的区间内）
+
+        Args:
+            key: 商品的去重key
+            category: 该帧判定的分类
+
+        Returns:
+            是否计票（商品不在暂存区或本帧已计票时返回 False）
+        """
+        entry = self._by_key.get(key)
+        if entry is None or entry.last_frame == self.frame or not category:
+            return False
+        entry.votes[category] = entry.votes.get(category, 0) + 1
+        entry.last_frame = self.frame
+        return True
+
+    def _commit_ready(self):
+        """
+        按顺序提交：窗口溢出时强制提交；否则提交已确认且本帧未再出现的记录，
+        以及已连续 confirm_frames 帧没有新证据、无法再确认的记录（按现有最高票）
+        """
+        while self.pending:
+            head = self.pending[0]
+            overflow = len(self.pending) > self.window
+            idle_frames = self.frame - head.last_frame
+            settled = idle_frames > 0 and head.is_confirmed(self.confirm_frames)
+            stale = idle_frames >= self.confirm_frames
+            if not (overflow or settled or stale):
+                break
+            self._commit_head()
+
+    def _commit_head(self):
+        entry = self.pending.popleft()
+        self._by_key.pop(entry.key, None)
+        entry.record.category_name = entry.category
+        self.commit(entry.record, entry.key)
+
+    def correct(self, anchor_name: str, current_category: str, next_category: str) -> Tuple[bool, List[Tuple[str, str]]]:
+        """
+        回溯修正：锚点之后的待确认记录改判为 next_category（作为决定性证据）
+        遇到既不是当前分类也不是下一分类的记录（已进入第三个分类）时停止
+
+        Args:
+            anchor_name: 锚点商品名（当前分类的最后一个商品）
+            current_category: 当前分类（A）
+            next_category: 下一分类（B）
+
+        Returns:
+            (是否找到锚点, [(商品名, 原分类), ...] 被改判的记录)
+        """
+        entries = list(self.pending)
+
+        found_idx = -1
+        for i in range(len(entries) - 1, -1, -1):
+            if entries[i].record.drug_name == anchor_name:
+                found_idx = i
+                break
+
+        if found_idx == -1:
+            return (False, [])
+
+        changes = []
+        for entry in entries[found_idx + 1:]:
+            old_cat = entry.category
+            if old_cat != current_category and old_cat != next_category and old_cat != "未知分类":
+                break
+            if old_cat != next_category:
+                entry.votes[next_category] = max(entry.votes.values()) + self.confirm_frames
+                changes.append((entry.record.drug_name, old_cat))
+
+        return (True, changes)
+
+    def flush(self) -> int:
+        """
+        按当前证据提交全部待确认记录（店铺结束/导出前调用）
+
+        Returns:
+            提交的记录数
+        """
+        count = len(self.pending)
+        while self.pending:
+            self._commit_head()
+        return count
+
+    def clear(self):
+        """丢弃待确认记录（开始新店铺时调用）"""
+        self.pending.clear()
+        self._by_key.clear()
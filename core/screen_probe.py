@@ -0,0 +1,174 @@
+"""
+screen_probe.py - 截图快速探测模块
+设备端按比例缩小截图（takeScreenshot 缩放+低质量JPEG，几KB），用灰度直方图熵和分块边缘能量判断
+白屏 / 内容稀疏（可能是错误页） / 内容正常，用分块均值签名比较前后两帧判断画面是否仍在变化。
+全部计算都在 Pillow 的C实现中完成（直方图、缩放、边缘滤波），比 dump 层级XML快一个数量级；
+只有探测结果不是"内容正常"时才需要 dump 确认
+"""
+import io
+import math
+import time
+import base64
+from typing import Optional, Tuple
+
+
+class ScreenState:
+    """一帧缩略截图的探测结果"""
+
+    __slots__ = ("kind", "entropy", "filled_ratio", "signature", "elapsed_ms")
+
+    BLANK = "blank"        # 白屏/纯色
+    SPARSE = "sparse"      # 内容稀疏（加载中、错误页、弹层）
+    CONTENT = "content"    # 内容正常
+
+    def __init__(self, kind: str, entropy: float, filled_ratio: float, signature: bytes, elapsed_ms: int = 0):
+        self.kind = kind
+        self.entropy = entropy              # 灰度直方图熵（16档，比特）
+        self.filled_ratio = filled_ratio    # 有边缘（文字/图片）的分块比例
+        self.signature = signature          # 分块灰度均值，用于帧间比较
+        self.elapsed_ms = elapsed_ms        # 截图+计算耗时
+
+    def __repr__(self) -> str:
+        return f"ScreenState({self.kind}, entropy={self.entropy:.2f}, filled={self.filled_ratio:.2f}, {self.elapsed_ms}ms)"
+
+
+class ScreenProbe:
+    """
+    截图探测器
+    capture(device) 获取缩略截图并分析；changed(a, b) 比较两帧是否仍在变化
+    """
+
+    def __init__(
+        self,
+        scale: float = 0.1,
+        quality: int = 30,
+        grid: Tuple[int, int] = (9, 16),
+        blank_entropy: float = 0.1,
+        blank_ratio: float = 0.02,
+        content_ratio: float = 0.25,
+        edge_threshold: int = 8,
+        diff_threshold: int = 12
+    ):
+        """
+        初始化探测器
+
+        Args:
+            scale: 设备端截图缩放比例
+            quality: 设备端JPEG质量
+            grid: 分块数 (列, 行)
+            blank_entropy: 熵低于该值视为白屏
+            blank_ratio: 有边缘分块比例低于该值视为白屏（只有加载图标等零星内容）
+            content_ratio: 有边缘分块比例不低于该值视为内容正常
+            edge_threshold: 分块平均边缘强度高于该值视为有内容
+            diff_threshold: 分块灰度均值变化超过该值视为该块有变化
+        """
+        self.scale = scale
+        self.quality = quality
+        self.grid = grid
+        self.blank_entropy = blank_entropy
+        self.blank_ratio = blank_ratio
+        self.content_ratio = content_ratio
+        self.edge_threshold = edge_threshold
+        self.diff_threshold = diff_threshold
+
+    def capture(self, device) -> Optional[ScreenState]:
+        """
+        获取缩略截图并分析
+
+        Args:
+            device: uiautomator2 设备
+
+        Returns:
+            探测结果，截图失败返回None
+        """
+        start_time = time.time()
+        image = self._thumbnail(device)
+        if image is None:
+            return None
+        state = self.analyze(image)
+        state.elapsed_ms = int((time.time() - start_time) * 1000)
+        return state
+
+    def _thumbnail(self, device):
+        """设备端缩放截图（不支持时回退到完整截图后本地缩小）"""
+        from PIL import Image
+
+        try:
+            data = device.jsonrpc.takeScreenshot(self.scale, self.quality)
+            if data:
+                return Image.open(io.BytesIO(base64.b64decode(data)))
+        except Exception:
+            pass
+
+        try:
+            image = device.screenshot()
+            width, height = image.size
+            return image.resize((max(1, int(width * self.scale)), max(1, int(height * self.scale))))
+        except Exception as e:
+            print(f"截图探测失败: {e}")
+            return None
+
+    def analyze(self, image) -> ScreenState:
+        """
+        分析一帧缩略截图
+
+        Args:
+            image: PIL.Image
+
+        Returns:
+            探测结果
+        """
+        from PIL import Image, ImageFilter
+
+        gray = image.convert("L")
+        cols, rows = self.grid
+
+        # 灰度直方图熵：256档合并为16档，纯色/白屏接近0
+        hist = gray.histogram()
+        total = float(sum(hist)) or 1.0
+        entropy = 0.0
+        for i in range(0, 256, 16):
+            p = sum(hist[i:i + 16]) / total
+            if p > 0:
+                entropy -= p * math.log2(p)
+
+        # 分块边缘能量：文字、图标、图片都会产生边缘，留白区域接近0
+        # （滤波在图像外沿产生伪边缘，去掉最外一圈像素）
+        edges = gray.filter(ImageFilter.FIND_EDGES)
+        width, height = edges.size
+        if width > 2 and height > 2:
+            edges = edges.crop((1, 1, width - 1, height - 1))
+        edges = edges.resize((cols, rows), Image.BOX)
+        filled = sum(1 for value in edges.getdata() if value > self.edge_threshold)
+        filled_ratio = filled / float(cols * rows)
+
+        # 分块灰度均值签名
+        signature = gray.resize((cols, rows), Image.BOX).tobytes()
+
+        if entropy < self.blank_entropy or filled_ratio < self.blank_ratio:
+            kind = ScreenState.BLANK
+        elif filled_ratio >= self.content_ratio:
+            kind = ScreenState.CONTENT
+        else:
+            kind = ScreenState.SPARSE
+        return ScreenState(kind, entropy, filled_ratio, signature)
+
+    def changed(self, previous: Optional[ScreenState], current: Optional[ScreenState], max_tiles: int = 1) -> bool:
+        """
+        比较两帧是否仍在变化
+
+        Args:
+            previous: 上一帧
+            current: 当前帧
+            max_tiles: 允许变化的分块数（光标闪烁、角标动画等）
+
+        Returns:
+            变化的分块数超过 max_tiles 返回 True；任一帧缺失视为仍在变化
+        """
+        if previous is None or current is None or len(previous.signature) != len(current.signature):
+            return True
+        diff = sum(
+            1 for a, b in zip(previous.signature, current.signature)
+            if abs(a - b) > self.diff_threshold
+        )
+        return diff > max_tiles
@@ -1,15 +1,14 @@
 """
 selectors.py - 控件选择器工具
-从 config.json 加载选择器，提供通用查找、点击、输入方法
+使用共享配置中预编译的选择器（配置热加载后立即生效），提供通用查找、点击、输入方法
 失败时截图并提示检查配置
 """
-import json
-import os
 import time
-from typing import Optional, Any, Union
+from typing import Optional, Union
 import uiautomator2 as u2
 
 from core.logger import DeviceLogger
+from core.config import AppConfig, ConfigError, SelectorMatcher, get_config
 
 
 class SelectorHelper:
@@ -19,42 +18,50 @@ class SelectorHelper:
     支持多候选选择器和重试机制
     """
     
-    def __init__(self, device: u2.Device, logger: DeviceLogger, config_path: str = "config.json"):
+    def __init__(
+        self,
+        device: u2.Device,
+        logger: DeviceLogger,
+        config: Union[AppConfig, str] = "config.json"
+    ):
         """
         初始化选择器辅助器
         
         Args:
             device: uiautomator2 设备对象
             logger: 设备日志器
-            config_path: 配置文件路径
+            config: 共享配置对象（或配置文件路径，经 get_config 取得共享实例）
         """
         self.device = device
         self.logger = logger
-        self.config = self._load_config(config_path)
-        
-        # 从配置加载参数
-        self.default_timeout = self.config.get("timeouts", {}).get("default_timeout", 10)
-        self.max_retries = self.config.get("retry", {}).get("max_retries", 3)
-        self.retry_delay = self.config.get("retry", {}).get("retry_delay", 2)
-        self.selectors = self.config.get("selectors", {})
+        self.config = config if isinstance(config, AppConfig) else get_config(config)
     
-    def _load_config(self, config_path: str) -> dict:
-        """加载配置文件"""
-        try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            self.logger.error(f"加载配置文件失败: {e}")
-            return {}
+    # 以下参数每次从共享配置读取，热加载后立即生效
+    @property
+    def default_timeout(self) -> float:
+        return self.config.timeouts.default_timeout
     
-    def _build_selector(self, selector_def: dict) -> u2.UiObject:
+    @property
+    def max_retries(self) -> int:
+        return self.config.retry.max_retries
+    
+    @property
+    def retry_delay(self) -> float:
+        return self.config.retry.retry_delay
+    
+    @property
+    def selectors(self) -> dict:
+        """{选择器键名: (SelectorMatcher, ...)}"""
+        return self.config.selectors
+    
+    def _build_selector(self, matcher: SelectorMatcher) -> u2.UiObject:
         """
-        根据选择器定义构建 uiautomator2 选择器
+        根据预编译的选择器构建 uiautomator2 选择器
         
         Args:
-            selector_def: 选择器定义字典，如 {"text": "外卖"} 或 {"resourceId": "xxx"}
+            matcher: 预编译的选择器
         """
-        return self.device(**selector_def)
+        return matcher.build(self.device)
     
     def _take_screenshot(self, step_name: str) -> str:
         """截图并返回路径"""
@@ -77,13 +84,20 @@ class SelectorHelper:
         Args:
             selector_key: 选择器键名(对应config中的key)
             timeout: 超时时间(秒)
-            custom_selectors: 自定义选择器列表(覆盖config)
+            custom_selectors: 自定义选择器定义列表(覆盖config)
             
         Returns:
             找到的控件对象，未找到返回None
         """
         timeout = timeout or self.default_timeout
-        selectors = custom_selectors or self.selectors.get(selector_key, [])
+        if custom_selectors:
+            try:
+                selectors = [SelectorMatcher(selector_def) for selector_def in custom_selectors]
+            except ConfigError as e:
+                self.logger.warning(f"自定义选择器无效: {e}")
+                return None
+        else:
+            selectors = self.selectors.get(selector_key, ())
         
         if not selectors:
             self.logger.warning(f"未找到选择器配置: {selector_key}")
@@ -93,13 +107,13 @@ class SelectorHelper:
         
         # 在超时时间内循环尝试所有选择器
         while time.time() - start_time < timeout:
-            for selector_def in selectors:
+            for matcher in selectors:
                 try:
-                    element = self._build_selector(selector_def)
+                    element = self._build_selector(matcher)
                     if element.exists(timeout=0.5):
                         return element
                 except Exception as e:
-                    self.logger.debug(f"选择器 {selector_def} 查找失败: {e}")
+                    self.logger.debug(f"选择器 {matcher.label} 查找失败: {e}")
             time.sleep(0.5)
         
         return None
@@ -249,15 +263,15 @@ class SelectorHelper:
             控件列表
         """
         timeout = timeout or self.default_timeout
-        selectors = self.selectors.get(selector_key, [])
+        selectors = self.selectors.get(selector_key, ())
         
         if not selectors:
             return []
         
         # 使用第一个有效的选择器
-        for selector_def in selectors:
+        for matcher in selectors:
             try:
-                elements = self._build_selector(selector_def)
+                elements = self._build_selector(matcher)
                 if elements.exists(timeout=1):
                     # 获取所有匹配元素
                     count = elements.count
@@ -0,0 +1,165 @@
+"""
+shop_cache.py - 店铺商品缓存模块
+跨运行保存每个店铺各分类下商品名的顺序序列（及上次的价格/月销）
+再次采集同一店铺时，可据此识别"已知屏幕"，只刷新价格和月销，跳过完整的结构化解析
+"""
+import os
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from core import paths
+
+
+class ShopItemCache:
+    """
+    店铺商品指纹缓存
+    文件结构: {"shop_name", "updated", "categories": {分类名: [[商品名, 价格, 月销], ...]}}
+    """
+
+    def __init__(self, device_serial: str, base_output_dir: str = "output", min_match: int = 2):
+        """
+        初始化店铺缓存
+
+        Args:
+            device_serial: 设备序列号
+            base_output_dir: 输出根目录（如 "output"）
+            min_match: 判定为已知屏幕所需的最少商品数
+        """
+        self.device_serial = device_serial
+        self.base_output_dir = base_output_dir
+        self.min_match = min_match
+
+        self.shop_name = ""
+        self.cache_file = ""
+        self.categories: Dict[str, List[List[str]]] = {}
+
+        # 商品名 -> [(分类名, 序号), ...]（同一商品可能出现在多个分类中）
+        self._index: Dict[str, List[Tuple[str, int]]] = {}
+
+    @property
+    def loaded(self) -> bool:
+        """当前店铺是否有可用缓存"""
+        return bool(self._index)
+
+    def load(self, shop_name: str) -> bool:
+        """
+        加载店铺缓存
+
+        Args:
+            shop_name: 店铺名
+
+        Returns:
+            是否加载到缓存
+        """
+        self.shop_name = shop_name
+        self.cache_file = paths.shop_cache_path(self.base_output_dir, self.device_serial, shop_name)
+        self.categories = {}
+        self._index = {}
+
+        if not os.path.exists(self.cache_file):
+            return False
+
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.categories = data.get("categories", {})
+            self._rebuild_index()
+            return self.loaded
+        except Exception as e:
+            print(f"加载店铺缓存失败: {e}")
+            self.categories = {}
+            return False
+
+    def _rebuild_index(self):
+        """重建商品名索引"""
+        self._index = {}
+        for category, items in self.categories.items():
+            for pos, item in enumerate(items):
+                self._index.setdefault(item[0], []).append((category, pos))
+
+    def get_item(self, category: str, name: str) -> Optional[List[str]]:
+        """
+        获取缓存中的商品条目
+
+        Returns:
+            [商品名, 价格, 月销]，不存在返回 None
+        """
+        for cat, pos in self._index.get(name, ()):
+            if cat == category:
+                return self.categories[cat][pos]
+        return None
+
+    def match_screen(self, names: List[str], category_hint: str = "") -> Optional[str]:
+        """
+        判断屏幕上的商品名序列是否为已知屏幕
+        要求所有商品名在同一分类的缓存序列中按顺序连续出现
+
+        Args:
+            names: 屏幕上从上到下的商品名（已清理）
+            category_hint: 优先匹配的分类（当前分类）
+
+        Returns:
+            匹配到的分类名，未匹配返回 None
+        """
+        if len(names) < self.min_match or not self._index:
+            return None
+
+        first = self._index.get(names[0])
+        if not first:
+            return None
+
+        # 当前分类优先
+        candidates = sorted(first, key=lambda entry: entry[0] != category_hint)
+        for category, start in candidates:
+            items = self.categories[category]
+            if start + len(names) > len(items):
+                continue
+            if all(items[start + i][0] == name for i, name in enumerate(names)):
+                return category
+
+        return None
+
+    def update_from_records(self, records: list) -> int:
+        """
+        用本次采集结果更新缓存（按分类整体替换，未采集到的分类保留旧数据）
+
+        Args:
+            records: DrugRecord 列表（按采集顺序）
+
+        Returns:
+            更新的分类数
+        """
+        fresh: Dict[str, List[List[str]]] = {}
+        seen = set()
+        for record in records:
+            if (record.category_name, record.drug_name) in seen:
+                continue
+            seen.add((record.category_name, record.drug_name))
+            fresh.setdefault(record.category_name, []).append(
+                [record.drug_name, record.price, record.monthly_sales]
+            )
+
+        self.categories.update(fresh)
+        self._rebuild_index()
+        return len(fresh)
+
+    def save(self) -> bool:
+        """保存缓存（临时文件 + 重命名，原子替换）"""
+        if not self.cache_file or not self.categories:
+            return False
+
+        data = {
+            "shop_name": self.shop_name,
+            "updated": datetime.now().isoformat(),
+            "categories": self.categories
+        }
+        tmp_file = self.cache_file + ".tmp"
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_file, self.cache_file)
+            return True
+        except Exception as e:
+            print(f"保存店铺缓存失败: {e}")
+            return False
@@ -0,0 +1,159 @@
+"""
+sidebar_model.py - 左侧分类栏模型
+每个店铺记录一次分类名、所在滚动页及页内Y坐标、选中指示条相对分类项的偏移，并随状态持久化
+再次进入同一店铺时，分类列表/点击定位/选中分类检测都可直接由模型回答，不一致时再回退到实际扫描
+"""
+import os
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from core import paths
+
+
+class SidebarModel:
+    """
+    分类栏模型
+    文件结构: {"shop_name", "updated", "indicator_offset", "item_pitch",
+              "categories": [{"name", "page", "y"}, ...]}
+    """
+
+    def __init__(self, device_serial: str, base_output_dir: str = "output"):
+        """
+        初始化分类栏模型
+
+        Args:
+            device_serial: 设备序列号
+            base_output_dir: 输出根目录（如 "output"）
+        """
+        self.device_serial = device_serial
+        self.base_output_dir = base_output_dir
+
+        self.shop_name = ""
+        self.model_file = ""
+        self.entries: List[Dict] = []
+        self.indicator_offset = 0      # 指示条中心Y - 分类项中心Y（像素）
+        self.item_pitch = 0            # 相邻分类项间距（像素）
+
+    @property
+    def loaded(self) -> bool:
+        """当前店铺是否已有分类栏模型"""
+        return bool(self.entries)
+
+    @property
+    def categories(self) -> List[str]:
+        """按顺序的分类名列表"""
+        return [entry["name"] for entry in self.entries]
+
+    def load(self, shop_name: str) -> bool:
+        """
+        加载店铺的分类栏模型
+
+        Args:
+            shop_name: 店铺名
+
+        Returns:
+            是否加载到模型
+        """
+        self.shop_name = shop_name
+        self.model_file = paths.sidebar_model_path(self.base_output_dir, self.device_serial, shop_name)
+        self.entries = []
+        self.indicator_offset = 0
+        self.item_pitch = 0
+
+        if not os.path.exists(self.model_file):
+            return False
+
+        try:
+            with open(self.model_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.entries = data.get("categories", [])
+            self.indicator_offset = data.get("indicator_offset", 0)
+            self.item_pitch = data.get("item_pitch", 0)
+            return self.loaded
+        except Exception as e:
+            print(f"加载分类栏模型失败: {e}")
+            self.entries = []
+            return False
+
+    def record_scan(self, pages: List[List[Tuple[str, int]]]):
+        """
+        记录一次完整的分类栏扫描结果
+
+        Args:
+            pages: 每个滚动页上可见的分类 [[(分类名, 中心Y), ...], ...]，第0页为列表顶部
+        """
+        entries = []
+        seen = set()
+        pitches = []
+        for page, items in enumerate(pages):
+            ys = [y for _, y in items]
+            pitches.extend(b - a for a, b in zip(ys, ys[1:]) if b > a)
+            for name, y in items:
+                if name in seen:
+                    continue
+                seen.add(name)
+                entries.append({"name": name, "page": page, "y": y})
+
+        self.entries = entries
+        if pitches:
+            pitches.sort()
+            self.item_pitch = pitches[len(pitches) // 2]
+
+    def entry(self, name: str) -> Optional[Dict]:
+        """获取分类项记录，不存在返回 None"""
+        for entry in self.entries:
+            if entry["name"] == name:
+                return entry
+        return None
+
+    def first_page(self) -> List[str]:
+        """列表顶部（不滚动时）应可见的分类名"""
+        return [entry["name"] for entry in self.entries if entry["page"] == 0]
+
+    def learn_indicator(self, indicator_y: int, item_y: int):
+        """记录指示条相对分类项的偏移（由完整XML结构检测得到）"""
+        self.indicator_offset = indicator_y - item_y
+
+    def match_indicator(self, indicator_y: int, items: List[Tuple[str, int]]) -> str:
+        """
+        根据指示条位置找出选中的分类项
+
+        Args:
+            indicator_y: 指示条中心Y
+            items: 当前可见的分类项 [(分类名, 中心Y), ...]
+
+        Returns:
+            选中的分类名；无法可靠判断时返回空字符串
+        """
+        if not items:
+            return ""
+
+        target_y = indicator_y - self.indicator_offset
+        name, y = min(items, key=lambda item: abs(item[1] - target_y))
+        tolerance = self.item_pitch // 2 if self.item_pitch else 60
+        if abs(y - target_y) > tolerance:
+            return ""
+        return name
+
+    def save(self) -> bool:
+        """保存模型（临时文件 + 重命名，原子替换）"""
+        if not self.model_file or not self.entries:
+            return False
+
+        data = {
+            "shop_name": self.shop_name,
+            "updated": datetime.now().isoformat(),
+            "indicator_offset": self.indicator_offset,
+            "item_pitch": self.item_pitch,
+            "categories": self.entries
+        }
+        tmp_file = self.model_file + ".tmp"
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.model_file)
+            return True
+        except Exception as e:
+            print(f"保存分类栏模型失败: {e}")
+            return False
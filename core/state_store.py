@@ -1,10 +1,15 @@
 """
 state_store.py - 状态持久化模块
 使用JSON保存采集进度，支持暂停后继续不重复
+写入采用脏标记 + 后台合并刷盘，文件通过 临时文件+重命名 原子替换
+紧凑模式下去重key只保存64位哈希（内存为int集合，磁盘为 array('Q') 二进制文件）
 """
 import os
 import json
-from typing import Set, Optional, Dict, Any
+import hashlib
+import threading
+from array import array
+from typing import Set, Optional, Dict, Any, Union
 from datetime import datetime
 
 from core import paths
@@ -16,13 +21,23 @@ class StateStore:
     保存采集进度到JSON文件，支持断点续跑
     """
     
-    def __init__(self, device_serial: str, base_output_dir: str = "output"):
+    def __init__(
+        self,
+        device_serial: str,
+        base_output_dir: str = "output",
+        flush_interval: float = 2.0,
+        flush_every: int = 50,
+        compact_keys: bool = False
+    ):
         """
         初始化状态存储器
         
         Args:
             device_serial: 设备序列号
             base_output_dir: 输出根目录（如 "output"）
+            flush_interval: 后台刷盘间隔(秒)，脏数据最多延迟这么久写入
+            flush_every: 累计多少次变更后立即刷盘
+            compact_keys: 是否启用紧凑key模式（只保存key的64位哈希，完整字符串仅保留在导出记录中）
         """
         self.device_serial = device_serial
         self.base_output_dir = base_output_dir
@@ -32,6 +47,8 @@ class StateStore:
         
         # 状态文件路径: output/{serial}/state/state.json（固定文件名，不再用 serial 前缀）
         self.state_file = paths.state_json_path(base_output_dir, device_serial)
+        self.keys_bin_file = paths.collected_keys_bin_path(base_output_dir, device_serial)
+        self.compact_keys = compact_keys
         
         # 当前状态
         self.state: Dict[str, Any] = {
@@ -40,7 +57,8 @@ class StateStore:
             "current_category_index": 0,       # 当前分类序号
             "current_category_name": "",       # 当前分类名
             "scroll_round": 0,                 # 当前分类已滑动次数
-            "collected_keys": [],              # 已采集的去重key列表
+            "collected_keys": [],              # 已采集的去重key列表（紧凑模式下为空）
+            "key_mode": "compact" if compact_keys else "full",  # key存储模式: full/compact
             "collected_count": 0,              # 已采集条数
             "last_update": "",                 # 最后更新时间
             "status": "idle",                  # 状态: idle/running/paused/completed/error
@@ -51,11 +69,24 @@ class StateStore:
             "next_category": "",               # 下一个分类名
             "boundary_divider_y": 0,           # 边界分割线Y坐标
             "boundary_products": [],           # 边界商品key列表
-            "verify_screen_count": 0           # 验证模式已滑动屏数
+            "verify_screen_count": 0,          # 验证模式已滑动屏数
+            "run_date": ""                     # 本轮任务开始日期（汇总数据集分区，恢复/跨天不变）
         }
         
-        # 去重集合（内存中使用set加速查找）
-        self.collected_keys_set: Set[str] = set()
+        # 去重集合（内存中使用set加速查找；紧凑模式下元素为64位哈希）
+        self.collected_keys_set: Set[Union[str, int]] = set()
+        
+        # 合并刷盘控制
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
+        self._lock = threading.Lock()          # 保护脏标记/快照
+        self._write_lock = threading.Lock()    # 串行化文件写入
+        self._snapshot_seq = 0                 # 快照序号（持有 _lock 时递增）
+        self._written_seq = 0                  # 已落盘的最新快照序号（持有 _write_lock 时更新）
+        self._dirty = False
+        self._pending_mutations = 0
+        self._flusher: Optional[threading.Thread] = None
+        self._flusher_stop = threading.Event()
     
     def generate_key(
         self,
@@ -83,6 +114,24 @@ class StateStore:
         ]
         return "|".join(parts)
     
+    @staticmethod
+    def hash_key(key: str) -> int:
+        """
+        计算key的64位哈希（紧凑模式使用）
+        
+        Args:
+            key: 去重key
+            
+        Returns:
+            64位无符号整数
+        """
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'little')
+    
+    def _key_token(self, key: str) -> Union[str, int]:
+        """去重集合中实际保存的元素"""
+        return self.hash_key(key) if self.compact_keys else key
+    
     def is_collected(self, key: str) -> bool:
         """
         检查key是否已采集
@@ -93,7 +142,7 @@ class StateStore:
         Returns:
             是否已采集
         """
-        return key in self.collected_keys_set
+        return self._key_token(key) in self.collected_keys_set
     
     def add_collected(self, key: str):
         """
@@ -102,20 +151,109 @@ class StateStore:
         Args:
             key: 去重key
         """
-        if key not in self.collected_keys_set:
-            self.collected_keys_set.add(key)
-            self.state["collected_keys"].append(key)
-            self.state["collected_count"] = len(self.collected_keys_set)
+        token = self._key_token(key)
+        if token not in self.collected_keys_set:
+            with self._lock:
+                self.collected_keys_set.add(token)
+                if not self.compact_keys:
+                    self.state["collected_keys"].append(key)
+                self.state["collected_count"] = len(self.collected_keys_set)
+                self._dirty = True
     
     def save(self):
-        """保存状态到文件"""
+        """
+        请求保存状态（合并写入）
+        仅标记为脏，由后台线程按间隔刷盘；累计变更达到 flush_every 次时立即刷盘
+        """
+        with self._lock:
+            self._dirty = True
+            self._pending_mutations += 1
+            flush_now = self._pending_mutations >= self.flush_every
+        
+        if flush_now:
+            self.flush()
+        else:
+            self._ensure_flusher()
+    
+    def flush(self):
+        """立即把状态持久化到文件（暂停/停止/风控等关键节点调用）"""
+        with self._lock:
+            self._dirty = False
+            self._pending_mutations = 0
+            snapshot = self._snapshot()
+            key_hashes = array('Q', self.collected_keys_set) if self.compact_keys else None
+            self._snapshot_seq += 1
+            seq = self._snapshot_seq
+        
+        self._write_atomic(snapshot, key_hashes, seq)
+    
+    def close(self):
+        """停止后台刷盘线程，并写入剩余的脏数据"""
+        self._flusher_stop.set()
+        if self._flusher and self._flusher.is_alive() and self._flusher is not threading.current_thread():
+            self._flusher.join(timeout=self.flush_interval + 1)
+        self._flusher = None
+        
+        if self._dirty:
+            self.flush()
+    
+    def _snapshot(self) -> Dict[str, Any]:
+        """生成状态快照（需持有 self._lock）"""
         self.state["last_update"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        # dict()/list() 为C层整体拷贝，不会与工作线程的写入交错
+        snapshot = dict(self.state)
+        for name, value in snapshot.items():
+            if isinstance(value, list):
+                snapshot[name] = list(value)
+        return snapshot
+    
+    def _write_atomic(self, snapshot: Dict[str, Any], key_hashes: Optional[array] = None, seq: int = 0):
+        """
+        写临时文件并 fsync 后重命名，崩溃时不会留下半截的 state.json
+        后台刷盘与显式 flush() 可能并发：序号不大于已写入快照的旧快照直接丢弃，避免旧状态覆盖新状态
+        """
+        tmp_file = self.state_file + ".tmp"
         
-        try:
-            with open(self.state_file, 'w', encoding='utf-8') as f:
-                json.dump(self.state, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"保存状态失败: {e}")
+        with self._write_lock:
+            if seq and seq <= self._written_seq:
+                return
+            try:
+                # 先写key哈希文件，再写state.json，保证state引用的key一定已落盘
+                if key_hashes is not None:
+                    tmp_bin = self.keys_bin_file + ".tmp"
+                    with open(tmp_bin, 'wb') as f:
+                        key_hashes.tofile(f)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_bin, self.keys_bin_file)
+                
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f, ensure_ascii=False, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_file, self.state_file)
+                if seq:
+                    self._written_seq = seq
+            except Exception as e:
+                print(f"保存状态失败: {e}")
+    
+    def _ensure_flusher(self):
+        """按需启动后台刷盘线程"""
+        if self._flusher and self._flusher.is_alive():
+            return
+        self._flusher_stop.clear()
+        self._flusher = threading.Thread(
+            target=self._flush_loop,
+            name=f"state_flusher_{self.device_serial}",
+            daemon=True
+        )
+        self._flusher.start()
+    
+    def _flush_loop(self):
+        """后台刷盘循环：每 flush_interval 秒检查一次脏标记"""
+        while not self._flusher_stop.wait(self.flush_interval):
+            if self._dirty:
+                self.flush()
     
     def load(self) -> bool:
         """
@@ -134,8 +272,25 @@ class StateStore:
             # 合并加载的状态
             self.state.update(loaded_state)
             
+            # 旧状态是紧凑模式时无法还原完整key，沿用紧凑模式
+            if loaded_state.get("key_mode") == "compact" and not self.compact_keys:
+                print("状态文件为紧凑key模式，已自动切换为紧凑模式")
+                self.compact_keys = True
+            
             # 重建去重集合
-            self.collected_keys_set = set(self.state.get("collected_keys", []))
+            if self.compact_keys:
+                key_hashes = array('Q')
+                if loaded_state.get("key_mode") == "compact" and os.path.exists(self.keys_bin_file):
+                    with open(self.keys_bin_file, 'rb') as f:
+                        key_hashes.frombytes(f.read())
+                self.collected_keys_set = set(key_hashes)
+                # 兼容完整key格式的旧状态：迁移为哈希
+                for key in self.state.get("collected_keys", []):
+                    self.collected_keys_set.add(self.hash_key(key))
+                self.state["collected_keys"] = []
+                self.state["key_mode"] = "compact"
+            else:
+                self.collected_keys_set = set(self.state.get("collected_keys", []))
             
             return True
         except Exception as e:
@@ -144,6 +299,10 @@ class StateStore:
     
     def reset(self):
         """重置状态"""
+        with self._lock:
+            self._dirty = False
+            self._pending_mutations = 0
+        
         self.state = {
             "current_task_index": 0,
             "current_shop_name": "",
@@ -151,6 +310,7 @@ class StateStore:
             "current_category_name": "",
             "scroll_round": 0,
             "collected_keys": [],
+            "key_mode": "compact" if self.compact_keys else "full",
             "collected_count": 0,
             "last_update": "",
             "status": "idle",
@@ -161,16 +321,18 @@ class StateStore:
             "next_category": "",
             "boundary_divider_y": 0,
             "boundary_products": [],
-            "verify_screen_count": 0
+            "verify_screen_count": 0,
+            "run_date": ""
         }
         self.collected_keys_set.clear()
         
         # 删除状态文件
-        if os.path.exists(self.state_file):
-            try:
-                os.remove(self.state_file)
-            except:
-                pass
+        for file_path in (self.state_file, self.keys_bin_file):
+            if os.path.exists(file_path):
+                try:
+                    os.remove(file_path)
+                except:
+                    pass
     
     def reset_for_new_shop(self, shop_name: str, poi: str = ""):
         """
@@ -185,11 +347,12 @@ class StateStore:
         self.state["current_category_index"] = 0
         self.state["current_category_name"] = ""
         self.state["scroll_round"] = 0
-        self.state["collected_keys"] = []
-        self.state["collected_count"] = 0
-        self.state["all_categories"] = []
-        self.state["risk_control_hit"] = False
-        self.collected_keys_set.clear()
+        with self._lock:
+            self.state["collected_keys"] = []
+            self.state["collected_count"] = 0
+            self.state["all_categories"] = []
+            self.state["risk_control_hit"] = False
+            self.collected_keys_set.clear()
     
     def mark_risk_control(self, categories: list):
         """
@@ -200,12 +363,12 @@ class StateStore:
         """
         self.state["risk_control_hit"] = True
         self.state["all_categories"] = categories
-        self.save()
+        self.flush()
     
     def clear_risk_control(self):
         """清除风控标记（恢复采集时调用）"""
         self.state["risk_control_hit"] = False
-        self.save()
+        self.flush()
     
     # 属性访问器
     @property
@@ -260,6 +423,14 @@ class StateStore:
     def all_categories(self) -> list:
         return self.state.get("all_categories", [])
     
+    @property
+    def run_date(self) -> str:
+        return self.state.get("run_date", "")
+    
+    @run_date.setter
+    def run_date(self, value: str):
+        self.state["run_date"] = value
+    
     @property
     def current_poi(self) -> str:
         return self.state.get("current_poi", "")
@@ -0,0 +1,158 @@
+"""
+swipe_controller.py - 自适应滑动距离控制
+根据相邻两帧测得的卡片高度和实际滚动位移，选择"仍能保留至少一张完整卡片重叠"的最大滑动距离
+检测到帧间断档（没有任何重叠卡片）时回退并反向补滑，直到补滑后的帧与断档前一帧重新重叠，保证覆盖完整
+"""
+from statistics import median
+from typing import Dict, List, Tuple
+
+# 滑动距离下限（占屏幕高度比例），更短的滑动可能被识别为点击
+MIN_SWIPE_STEP = 0.05
+
+
+class SwipeController:
+    """
+    滑动距离控制器
+    卡片以 (价格Y坐标, 商品名) 表示，Y坐标单位为像素
+    """
+
+    def __init__(
+        self,
+        distance: float = 0.40,
+        min_distance: float = 0.20,
+        max_distance: float = 0.60,
+        min_overlap_cards: int = 1,
+        smoothing: float = 0.3,
+        max_recover_swipes: int = 3
+    ):
+        """
+        初始化控制器
+
+        Args:
+            distance: 初始滑动距离（占屏幕高度比例）
+            min_distance: 最小滑动距离（保留重叠所允许的距离更小时以重叠为准）
+            max_distance: 最大滑动距离
+            min_overlap_cards: 相邻两帧至少保留的重叠卡片数
+            smoothing: 卡片高度/位移增益的平滑系数（0~1，越大越跟随最新观测）
+            max_recover_swipes: 一次断档最多补滑次数（仍未与断档前一帧重叠则放弃）
+        """
+        self.default_distance = distance
+        self.distance = distance
+        self.min_distance = min_distance
+        self.max_distance = max_distance
+        self.min_overlap_cards = max(1, min_overlap_cards)
+        self.smoothing = smoothing
+        self.max_recover_swipes = max(1, max_recover_swipes)
+
+        self.card_pitch = 0.0      # 卡片高度（相邻卡片价格Y坐标间距，像素）
+        self.gain = 1.0            # 实际位移 / 指令位移（惯性滑动 > 1，触摸阈值损耗 < 1）
+        self.gap_count = 0         # 检测到的断档次数
+        self.recover_distance = 0.0  # 非0时下一次改为向下补滑该距离
+        self.recover_swipes = 0      # 本次断档已补滑次数
+
+        self._prev_positions: Dict[str, int] = {}
+        self._anchor_positions: Dict[str, int] = {}  # 断档前最后一帧（补滑后须与之重叠）
+        self._recover_step = 0.0
+        self._last_command_px = 0.0
+
+    def reset(self):
+        """清除上一帧（点击分类、跳转页面等非滑动操作之后调用），保留已学习的卡片高度和增益"""
+        self._prev_positions = {}
+        self._last_command_px = 0.0
+        self.recover_distance = 0.0
+        self._end_recovery()
+
+    @property
+    def recovering(self) -> bool:
+        """是否处于断档补滑中（尚未确认与断档前一帧重叠）"""
+        return bool(self._anchor_positions)
+
+    def observe(self, cards: List[Tuple[int, str]], screen_height: int, view_top: int) -> bool:
+        """
+        记录本帧卡片位置并规划下一次滑动
+
+        Args:
+            cards: 本帧从上到下的完整卡片 [(价格Y坐标, 商品名), ...]
+            screen_height: 屏幕高度（像素）
+            view_top: 商品列表可视区域上边界（像素）
+
+        Returns:
+            是否检测到断档（上一帧滑动后没有任何重叠卡片，或补滑后仍未与断档前一帧重叠）
+        """
+        positions = {name: y for y, name in cards}
+        ys = [y for y, _ in cards]
+        gap = False
+
+        # 1. 卡片高度
+        pitches = [b - a for a, b in zip(ys, ys[1:]) if b > a]
+        if pitches:
+            self.card_pitch = self._smooth(self.card_pitch, median(pitches))
+
+        # 2. 补滑后的帧：与断档前一帧有重叠卡片才算恢复，否则继续补滑
+        if self._anchor_positions:
+            if positions and any(name in self._anchor_positions for name in positions):
+                self._end_recovery()
+            elif self.recover_swipes < self.max_recover_swipes:
+                gap = True
+                self.recover_distance = self._recover_step
+            else:
+                self._end_recovery()
+
+        # 3. 实际位移 / 指令位移
+        elif self._last_command_px > 0 and self._prev_positions and positions:
+            moves = [
+                self._prev_positions[name] - y
+                for name, y in positions.items()
+                if name in self._prev_positions
+            ]
+            if moves:
+                displacement = median(moves)
+                if displacement > 0:
+                    self.gain = self._smooth(self.gain, displacement / self._last_command_px)
+            else:
+                # 没有重叠卡片：滑过头了，保守地放大增益并向下补滑
+                gap = True
+                self.gap_count += 1
+                self.gain = min(self.gain * 1.25, 3.0)
+                self.recover_distance = self._last_command_px * 0.5 / screen_height
+                self._recover_step = self.recover_distance
+                self._anchor_positions = self._prev_positions
+
+        self._prev_positions = positions
+        self._plan(ys, screen_height, view_top)
+        return gap
+
+    def _plan(self, ys: List[int], screen_height: int, view_top: int):
+        """本帧最后一张完整卡片在下一帧仍需完整可见：位移 <= 末卡Y - 顶部 - N张卡片高度"""
+        if not ys or self.card_pitch <= 0 or screen_height <= 0:
+            self.distance = self.default_distance
+            return
+
+        allowed_px = ys[-1] - view_top - self.card_pitch * self.min_overlap_cards
+        distance = allowed_px / self.gain / screen_height
+        if distance < self.min_distance:
+            # 卡片过高/可见卡片过少时，按最小距离滑动会滑过末卡：以保留重叠为准
+            self.distance = max(MIN_SWIPE_STEP, distance)
+        else:
+            self.distance = min(self.max_distance, distance)
+
+    def on_swipe(self, screen_height: int):
+        """记录实际执行的滑动指令（向上滑动之后调用）"""
+        self._last_command_px = self.distance * screen_height
+
+    def on_recover(self):
+        """向下补滑之后调用：补滑后的帧不参与位移测量，由下一次 observe 确认是否已与断档前一帧重叠"""
+        self.recover_distance = 0.0
+        self.recover_swipes += 1
+        self._prev_positions = {}
+        self._last_command_px = 0.0
+
+    def _end_recovery(self):
+        self._anchor_positions = {}
+        self._recover_step = 0.0
+        self.recover_swipes = 0
+
+    def _smooth(self, current: float, sample: float) -> float:
+        if current <= 0:
+            return sample
+        return current + self.smoothing * (sample - current)
@@ -1,11 +1,15 @@
 """
 task_loader.py - xlsx 任务加载器
 读取任务文件，解析 poi, shop_name, note 字段
+支持 xlsx（只读流式遍历全部工作表）和 CSV/TSV；按 (poi, shop_name) 去重，
+可按任务序号区间或哈希分片，每台设备只保留自己分片内的任务
 """
 import os
-from typing import List, Dict, Optional
+import csv
+import codecs
+import zlib
+from typing import List, Dict, Optional, Iterator, Tuple
 from dataclasses import dataclass
-from openpyxl import load_workbook
 
 from core.logger import DeviceLogger
 
@@ -25,7 +29,7 @@ class Task:
 class TaskLoader:
     """
     任务加载器
-    从xlsx文件读取任务列表
+    从xlsx/csv/tsv文件读取任务列表
     """
     
     # 支持的列名映射（中文 -> 英文）
@@ -43,6 +47,9 @@ class TaskLoader:
     # 必需的字段（英文key）
     REQUIRED_FIELDS = ['poi', 'shop_name']
     
+    # 支持的文件格式
+    SUPPORTED_EXTENSIONS = ('.xlsx', '.csv', '.tsv')
+    
     def __init__(self, logger: Optional[DeviceLogger] = None):
         """
         初始化任务加载器
@@ -59,12 +66,23 @@ class TaskLoader:
         if self.logger:
             getattr(self.logger, level)(message)
     
-    def load(self, file_path: str) -> bool:
+    def load(
+        self,
+        file_path: str,
+        start: int = 0,
+        stop: Optional[int] = None,
+        shard_count: int = 1,
+        shard_index: int = 0
+    ) -> bool:
         """
-        加载xlsx任务文件
+        加载任务文件（只保留本设备分片内的任务）
         
         Args:
-            file_path: xlsx文件路径
+            file_path: 任务文件路径（xlsx/csv/tsv）
+            start: 任务序号区间起点（去重后的全局序号，从0开始）
+            stop: 任务序号区间终点（不含；None 表示到文件末尾）
+            shard_count: 哈希分片总数（1 表示不分片）
+            shard_index: 本设备的哈希分片编号（0 ~ shard_count-1）
             
         Returns:
             是否加载成功
@@ -72,94 +90,187 @@ class TaskLoader:
         self.tasks = []
         self.file_path = file_path
         
-        # 检查文件是否存在
-        if not os.path.exists(file_path):
-            self._log(f"任务文件不存在: {file_path}", "error")
+        try:
+            self._log(f"正在加载任务文件: {file_path}")
+            self.tasks = list(self.iter_tasks(file_path, start, stop, shard_count, shard_index))
+            
+            shard_desc = ""
+            if start or stop is not None:
+                shard_desc += f" 区间[{start}, {stop if stop is not None else 'end'})"
+            if shard_count > 1:
+                shard_desc += f" 分片{shard_index}/{shard_count}"
+            self._log(f"成功加载 {len(self.tasks)} 个任务{shard_desc}")
+            return True
+            
+        except Exception as e:
+            self._log(f"加载任务文件失败: {e}", "error")
             return False
+    
+    def iter_tasks(
+        self,
+        file_path: str,
+        start: int = 0,
+        stop: Optional[int] = None,
+        shard_count: int = 1,
+        shard_index: int = 0
+    ) -> Iterator[Task]:
+        """
+        流式读取任务（校验、去重、分片都在读取过程中完成，不会一次性加载整个文件）
         
-        # 检查文件扩展名
-        if not file_path.lower().endswith('.xlsx'):
-            self._log(f"文件格式错误，必须是xlsx格式: {file_path}", "error")
-            return False
+        Args:
+            file_path: 任务文件路径（xlsx/csv/tsv）
+            start: 任务序号区间起点（去重后的全局序号）
+            stop: 任务序号区间终点（不含）
+            shard_count: 哈希分片总数
+            shard_index: 本设备的哈希分片编号
+            
+        Yields:
+            任务对象（index 为在本分片内的序号）
+            
+        Raises:
+            ValueError: 文件不存在、格式不支持或没有包含必需列的表
+        """
+        seen = set()
+        global_index = 0
+        task_index = 0
+        duplicates = 0
         
-        try:
-            self._log(f"正在加载任务文件: {file_path}")
-            wb = load_workbook(file_path, read_only=True)
-            ws = wb.active
+        for poi, shop_name, note in self._iter_rows(file_path):
+            # 按 (poi, shop_name) 去重
+            key = (poi, shop_name)
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
             
-            if ws is None:
-                self._log("xlsx文件中没有工作表", "error")
-                return False
+            index = global_index
+            global_index += 1
             
-            # 读取表头（第一行）
-            header_row = next(ws.iter_rows(min_row=1, max_row=1, values_only=True))
-            if not header_row:
-                self._log("xlsx文件表头为空", "error")
-                return False
+            # 序号区间分片
+            if index < start:
+                continue
+            if stop is not None and index >= stop:
+                break
             
-            # 转换表头：保留原始值（用于匹配中文）
-            headers_raw = [str(h).strip() if h else "" for h in header_row]
+            # 哈希分片（与行顺序无关，任务文件追加行后原有任务仍落在同一设备）
+            if shard_count > 1 and self.shard_of(poi, shop_name, shard_count) != shard_index:
+                continue
             
-            # 建立列索引映射（原始列索引 -> 英文字段名）
-            col_indices = {}
-            for col_idx, header in enumerate(headers_raw):
-                # 尝试匹配列名
-                header_lower = header.lower()
-                if header_lower in self.COLUMN_MAPPING:
-                    field_name = self.COLUMN_MAPPING[header_lower]
-                    col_indices[field_name] = col_idx
-                elif header in self.COLUMN_MAPPING:
-                    field_name = self.COLUMN_MAPPING[header]
-                    col_indices[field_name] = col_idx
+            yield Task(index=task_index, poi=poi, shop_name=shop_name, note=note)
+            task_index += 1
+        
+        if duplicates:
+            self._log(f"跳过 {duplicates} 个重复任务（定位点+店铺名相同）", "warning")
+    
+    @staticmethod
+    def shard_of(poi: str, shop_name: str, shard_count: int) -> int:
+        """任务所属的哈希分片（CRC32，跨进程稳定）"""
+        return zlib.crc32(f"{poi}|{shop_name}".encode('utf-8')) % shard_count
+    
+    def _iter_rows(self, file_path: str) -> Iterator[Tuple[str, str, str]]:
+        """
+        逐行读取任务文件并校验
+        
+        Yields:
+            (poi, shop_name, note)
+        """
+        if not os.path.exists(file_path):
+            raise ValueError(f"任务文件不存在: {file_path}")
+        
+        ext = os.path.splitext(file_path)[1].lower()
+        if ext not in self.SUPPORTED_EXTENSIONS:
+            raise ValueError(f"文件格式错误，必须是xlsx/csv/tsv格式: {file_path}")
+        
+        if ext == '.xlsx':
+            sheets = self._iter_xlsx_sheets(file_path)
+        else:
+            sheets = self._iter_csv_sheets(file_path, '\t' if ext == '.tsv' else ',')
+        
+        valid_sheets = 0
+        for sheet_name, rows in sheets:
+            # 读取表头（第一行）
+            header_row = next(rows, None)
+            if not header_row:
+                self._log(f"[{sheet_name}] 表头为空，跳过", "warning")
+                continue
             
-            # 检查必需字段
-            for field_name in self.REQUIRED_FIELDS:
-                if field_name not in col_indices:
-                    self._log(f"缺少必需列: {field_name}（支持的列名: 定位点/poi, 店铺名字/店铺名/shop_name）", "error")
-                    return False
+            col_indices = self._map_columns(header_row)
+            missing = [field for field in self.REQUIRED_FIELDS if field not in col_indices]
+            if missing:
+                self._log(
+                    f"[{sheet_name}] 缺少必需列: {', '.join(missing)}"
+                    f"（支持的列名: 定位点/poi, 店铺名字/店铺名/shop_name），跳过", "warning"
+                )
+                continue
+            valid_sheets += 1
             
             # 读取数据行（从第2行开始）
-            task_index = 0
-            for row in ws.iter_rows(min_row=2, values_only=True):
+            for row_num, row in enumerate(rows, 2):
                 # 跳过空行
                 if not row or all(cell is None or str(cell).strip() == "" for cell in row):
                     continue
                 
-                # 获取各列值
-                poi = ""
-                shop_name = ""
-                note = ""
-                
-                if 'poi' in col_indices and col_indices['poi'] < len(row):
-                    poi = str(row[col_indices['poi']]).strip() if row[col_indices['poi']] else ""
-                if 'shop_name' in col_indices and col_indices['shop_name'] < len(row):
-                    shop_name = str(row[col_indices['shop_name']]).strip() if row[col_indices['shop_name']] else ""
-                if 'note' in col_indices and col_indices['note'] < len(row):
-                    note = str(row[col_indices['note']]).strip() if row[col_indices['note']] else ""
+                poi = self._cell(row, col_indices.get('poi'))
+                shop_name = self._cell(row, col_indices.get('shop_name'))
+                note = self._cell(row, col_indices.get('note'))
                 
                 # 验证必需字段
                 if not poi or not shop_name:
-                    self._log(f"第{task_index + 2}行数据不完整，跳过: poi={poi}, shop_name={shop_name}", "warning")
+                    self._log(f"[{sheet_name}] 第{row_num}行数据不完整，跳过: poi={poi}, shop_name={shop_name}", "warning")
                     continue
                 
-                # 创建任务
-                task = Task(
-                    index=task_index,
-                    poi=poi,
-                    shop_name=shop_name,
-                    note=note
-                )
-                self.tasks.append(task)
-                task_index += 1
-            
+                yield poi, shop_name, note
+        
+        if valid_sheets == 0:
+            raise ValueError(f"没有包含必需列（定位点/poi, 店铺名字/店铺名/shop_name）的工作表: {file_path}")
+    
+    @staticmethod
+    def _iter_xlsx_sheets(file_path: str):
+        """只读模式遍历xlsx的全部工作表: (表名, 行迭代器)"""
+        from openpyxl import load_workbook
+        
+        wb = load_workbook(file_path, read_only=True)
+        try:
+            for ws in wb.worksheets:
+                yield ws.title, ws.iter_rows(values_only=True)
+        finally:
             wb.close()
-            
-            self._log(f"成功加载 {len(self.tasks)} 个任务")
-            return True
-            
-        except Exception as e:
-            self._log(f"加载任务文件失败: {e}", "error")
-            return False
+    
+    @staticmethod
+    def _iter_csv_sheets(file_path: str, delimiter: str):
+        """CSV/TSV 视为单个工作表（UTF-8/UTF-8 BOM，解码失败时按 GBK 读取）"""
+        encoding = 'utf-8-sig'
+        with open(file_path, 'rb') as f:
+            head = f.read(64 * 1024)
+        try:
+            codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+        except UnicodeDecodeError:
+            encoding = 'gbk'
+        
+        with open(file_path, 'r', encoding=encoding, newline='') as f:
+            yield os.path.basename(file_path), csv.reader(f, delimiter=delimiter)
+    
+    def _map_columns(self, header_row) -> Dict[str, int]:
+        """建立列索引映射（英文字段名 -> 列索引）"""
+        # 转换表头：保留原始值（用于匹配中文）
+        headers_raw = [str(h).strip() if h else "" for h in header_row]
+        
+        col_indices = {}
+        for col_idx, header in enumerate(headers_raw):
+            # 尝试匹配列名
+            header_lower = header.lower()
+            if header_lower in self.COLUMN_MAPPING:
+                col_indices[self.COLUMN_MAPPING[header_lower]] = col_idx
+            elif header in self.COLUMN_MAPPING:
+                col_indices[self.COLUMN_MAPPING[header]] = col_idx
+        return col_indices
+    
+    @staticmethod
+    def _cell(row, col_idx: Optional[int]) -> str:
+        """读取单元格文本（列不存在或为空时返回空字符串）"""
+        if col_idx is None or col_idx >= len(row) or row[col_idx] is None:
+            return ""
+        return str(row[col_idx]).strip()
     
     def get_tasks(self) -> List[Task]:
         """获取所有任务"""
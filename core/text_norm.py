@@ -0,0 +1,185 @@
+"""
+text_norm.py - 商品文本规范化
+商品名清理/有效性判断、价格与月售解析集中在这里，按原始文本做有界 LRU 缓存：
+相邻帧大部分文本重复出现，命中缓存后不再跑正则。cache_stats() 给出各缓存的命中率
+"""
+import re
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional
+
+
+# 文本类别
+PRICE = "price"
+SALES = "sales"
+NAME = "name"
+
+_PRICE_RE = re.compile(r"^¥?\d+\.?\d*$")
+_SALES_RE = re.compile(r'月售\s*(\d+)')
+_DIGITS_RE = re.compile(r'(\d+)')
+_NAME_START_RE = re.compile(r'[\[\u4e00-\u9fa5]')
+_CHINESE_RE = re.compile(r'[\u4e00-\u9fa5]')
+_PRICE_ONLY_RE = re.compile(r'^[¥￥\d.]+$')
+
+# 商品名前的干扰前缀
+_NAME_PREFIXES = ("健康年",)
+# 含 [ 的营销文案（不是商品标题）
+_MARKETING_WORDS = ("优惠仅剩", "已优惠", "券后", "起送", "配送费")
+# 无效商品名（分类名、标签等，均从开头匹配），合并为一个正则
+_INVALID_NAME_RE = re.compile("|".join("(?:%s)" % p for p in (
+    r'^推荐$', r'^健康年$', r'^活动$', r'^医保$',
+    r'^咳嗽用药$', r'^五官用药$', r'^儿科用药$', r'^常用药品$',
+    r'^问.*医生$', r'^已优惠', r'^优惠仅剩', r'^\d+人',
+    r'^月售', r'^已售', r'^超\d+人', r'^近期', r'^最近',
+    r'^\d+元\*', r'^满\d+减', r'^减\d+元', r'起送',
+    r'^搜索', r'^约\d+分钟', r'^刚刚有',
+)))
+
+
+class TextInfo(NamedTuple):
+    """一条原始文本的规范化结果"""
+    kind: str              # PRICE / SALES / NAME / ""（其他文本）
+    name: str = ""         # 清理后的商品名（NAME）
+    price: str = ""        # 去掉货币符号的价格文本，如 "19.8"（PRICE）
+    price_cents: Optional[int] = None  # 价格（分）（PRICE），None 表示无价格
+    sales: int = 0         # 月售数量（SALES）
+
+    @property
+    def valid(self) -> bool:
+        """是否可作为商品名（NAME 已排除标题特征不符和无效商品名，调用方无需再单独校验）"""
+        return self.kind == NAME
+
+
+@lru_cache(maxsize=4096)
+def clean_product_name(name: str) -> str:
+    """
+    清理商品名中的前缀乱码和营销标签
+    例如:
+    - TTTTT[力度伸]维生素C... -> [力度伸]维生素C...
+    - 健康年 [健安适]... -> [健安适]...
+    """
+    if not name:
+        return name
+
+    for prefix in _NAME_PREFIXES:
+        if prefix in name:
+            name = name.replace(prefix, "").strip()
+
+    # 商品名通常以 [品牌名] 或中文开头，从第一个 [ 或中文字符处截取
+    match = _NAME_START_RE.search(name)
+    if match:
+        return name[match.start():]
+    return name
+
+
+def _is_title_candidate(text: str) -> bool:
+    """含 [ 或 【 且靠近开头的标题文本（允许 "健康年 [健安适]..." 这类前缀），排除营销文案"""
+    if not ('[' in text or '【' in text) or len(text) <= 5:
+        return False
+    if any(word in text for word in _MARKETING_WORDS):
+        return False
+    idx = text.find('[') if '[' in text else text.find('【')
+    return idx <= 10
+
+
+@lru_cache(maxsize=4096)
+def is_invalid_product_name(text: str) -> bool:
+    """检查文本是否是无效的商品名（太短、中文太少、价格、分类名/标签等）"""
+    if len(text) < 5:
+        return True
+    if len(_CHINESE_RE.findall(text)) < 3:
+        return True
+    if _PRICE_ONLY_RE.match(text):
+        return True
+    return bool(_INVALID_NAME_RE.match(text))
+
+
+@lru_cache(maxsize=2048)
+def price_to_cents(price: str) -> Optional[int]:
+    """价格文本转为分（"19.8" -> 1980，"0" -> 0），无价格/无法解析返回 None"""
+    try:
+        return int(round(float(price) * 100))
+    except (TypeError, ValueError):
+        return None
+
+
+def format_price(cents: Optional[int]) -> str:
+    """分转为价格文本，去掉末尾的0（1980 -> "19.8"，1900 -> "19"，0 -> "0"），None 表示无价格返回空串"""
+    if cents is None:
+        return ""
+    yuan, fen = divmod(cents, 100)
+    if fen == 0:
+        return str(yuan)
+    if fen % 10 == 0:
+        return f"{yuan}.{fen // 10}"
+    return f"{yuan}.{fen:02d}"
+
+
+@lru_cache(maxsize=8192)
+def normalize_text(text: str) -> TextInfo:
+    """
+    规范化商品区的一条原始文本（已去首尾空白）
+
+    Args:
+        text: 节点文本
+
+    Returns:
+        TextInfo：价格 / 月售 / 有效商品名（清理后）/ 其他
+    """
+    if _PRICE_RE.match(text):
+        price = text.replace('¥', '').replace('￥', '')
+        return TextInfo(PRICE, price=price, price_cents=price_to_cents(price))
+    if '月售' in text:
+        m = _SALES_RE.search(text)
+        return TextInfo(SALES, sales=int(m.group(1))) if m else TextInfo("")
+    if _is_title_candidate(text):
+        name = clean_product_name(text)
+        if not is_invalid_product_name(name):
+            return TextInfo(NAME, name=name)
+    return TextInfo("")
+
+
+@lru_cache(maxsize=2048)
+def parse_sales(text: str) -> int:
+    """从月销文本中提取数量（"月售123" / "123" -> 123），无数字返回 0"""
+    if not text:
+        return 0
+    m = _DIGITS_RE.search(text)
+    return int(m.group(1)) if m else 0
+
+
+@lru_cache(maxsize=2048)
+def clean_price(text: str) -> str:
+    """去掉价格中的空白和货币符号"""
+    if not text:
+        return text
+    return text.strip().replace('¥', '').replace('￥', '')
+
+
+_CACHED = {
+    "normalize_text": normalize_text,
+    "clean_product_name": clean_product_name,
+    "is_invalid_product_name": is_invalid_product_name,
+    "parse_sales": parse_sales,
+    "clean_price": clean_price,
+    "price_to_cents": price_to_cents,
+}
+
+
+def cache_stats() -> Dict[str, Dict]:
+    """
+    各缓存的命中统计（进程内累计）
+
+    Returns:
+        {函数名: {"hits", "misses", "size", "hit_rate"}}
+    """
+    stats = {}
+    for name, func in _CACHED.items():
+        info = func.cache_info()
+        total = info.hits + info.misses
+        stats[name] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "hit_rate": round(info.hits / total, 3) if total else 0.0
+        }
+    return stats
@@ -0,0 +1,165 @@
+"""
+ui_index.py - UI节点空间索引
+对一次 dump 得到的扁平节点按中心点Y坐标排序，区域查询先用二分截出Y条带，
+其余几何条件（中心X、左边界、宽高）在条带上筛选：有 numpy 时用 bounds 列存整列比较得到掩码，
+否则逐节点比较（结果一致）。各检测器只通过 region 查询自己关心的区域，而不是每次全量扫描 ui_nodes
+"""
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, List, Optional
+
+# numpy 可选：未安装时逐节点比较
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+class UiNodeIndex:
+    """
+    单帧UI节点索引（只读，随快照创建，随快照丢弃）
+    坐标均使用节点 bounds 的 center_x / center_y，默认闭区间；
+    节点按中心Y排序（同一Y保持文档顺序），查询结果即从上到下
+    """
+
+    def __init__(self, ui_nodes: list):
+        """
+        建立索引
+
+        Args:
+            ui_nodes: DeviceAutomator.parse_hierarchy() 返回的节点列表
+        """
+        self.nodes = ui_nodes
+
+        located = [node for node in ui_nodes if node.get('bounds')]
+        self._by_y = sorted(located, key=lambda n: n['bounds']['center_y'])
+        self._ys = [n['bounds']['center_y'] for n in self._by_y]
+
+        # 文本 -> 节点（按Y排序）
+        self._by_text: Dict[str, List[dict]] = {}
+        for node in self._by_y:
+            text = node.get('text', '').strip()
+            if text:
+                self._by_text.setdefault(text, []).append(node)
+
+        # 同一快照上的派生结果缓存（如商品卡片扫描结果）
+        self.memo: Dict[str, object] = {}
+
+        # bounds 列存（首次区域查询时建立）
+        self.use_numpy = HAS_NUMPY
+        self._bounds = None
+
+    def _columns(self):
+        """按Y排序的 (N, 4) bounds 数组（left, top, right, bottom）及派生的中心X/宽/高列"""
+        if self._bounds is None:
+            self._bounds = np.array(
+                [(b['left'], b['top'], b['right'], b['bottom']) for b in (n['bounds'] for n in self._by_y)],
+                dtype=np.int32
+            ).reshape(-1, 4)
+            left, top, right, bottom = self._bounds.T
+            # 与 parse_hierarchy 一致：中心点整除
+            self._center_x = (left + right) // 2
+            self._width = right - left
+            self._height = bottom - top
+        return self._bounds
+
+    def region(
+        self,
+        min_x: Optional[float] = None,
+        max_x: Optional[float] = None,
+        min_y: Optional[float] = None,
+        max_y: Optional[float] = None,
+        min_left: Optional[float] = None,
+        min_width: Optional[float] = None,
+        max_height: Optional[float] = None,
+        strict: bool = False,
+        predicate: Optional[Callable[[dict], bool]] = None
+    ) -> List[dict]:
+        """
+        查询中心点落在矩形区域内、且满足几何条件的节点（按Y坐标从上到下）
+
+        Args:
+            min_x/max_x/min_y/max_y: 中心点区域边界（None 表示不限）
+            min_left: 左边界下限
+            min_width: 最小宽度（含）
+            max_height: 最大高度（含）
+            strict: 中心点范围和左边界是否为开区间（默认闭区间）
+            predicate: 额外的过滤条件
+
+        Returns:
+            节点列表
+        """
+        # Y条带：[lo, hi)
+        if min_y is None:
+            lo = 0
+        else:
+            lo = bisect_right(self._ys, min_y) if strict else bisect_left(self._ys, min_y)
+        if max_y is None:
+            hi = len(self._ys)
+        else:
+            hi = bisect_left(self._ys, max_y) if strict else bisect_right(self._ys, max_y)
+        if lo >= hi:
+            return []
+
+        if self.use_numpy:
+            bounds = self._columns()
+            mask = np.ones(hi - lo, dtype=bool)
+            lower = np.greater if strict else np.greater_equal
+            upper = np.less if strict else np.less_equal
+            if min_x is not None:
+                mask &= lower(self._center_x[lo:hi], min_x)
+            if max_x is not None:
+                mask &= upper(self._center_x[lo:hi], max_x)
+            if min_left is not None:
+                mask &= lower(bounds[lo:hi, 0], min_left)
+            if min_width is not None:
+                mask &= self._width[lo:hi] >= min_width
+            if max_height is not None:
+                mask &= self._height[lo:hi] <= max_height
+            result = [self._by_y[lo + i] for i in np.flatnonzero(mask)]
+        else:
+            def above(value, limit):
+                return value > limit if strict else value >= limit
+
+            def below(value, limit):
+                return value < limit if strict else value <= limit
+
+            result = []
+            for node in self._by_y[lo:hi]:
+                b = node['bounds']
+                if min_x is not None and not above(b['center_x'], min_x):
+                    continue
+                if max_x is not None and not below(b['center_x'], max_x):
+                    continue
+                if min_left is not None and not above(b['left'], min_left):
+                    continue
+                if min_width is not None and b['width'] < min_width:
+                    continue
+                if max_height is not None and b['height'] > max_height:
+                    continue
+                result.append(node)
+
+        if predicate is not None:
+            result = [node for node in result if predicate(node)]
+        return result
+
+    def with_text(self, text: str) -> List[dict]:
+        """查询文本（去首尾空白后）完全相等的节点（按Y坐标从上到下）"""
+        return self._by_text.get(text, [])
+
+    def with_texts(self, texts) -> List[dict]:
+        """查询文本属于给定集合的节点（按Y坐标从上到下）"""
+        if len(texts) > len(self._by_text):
+            matched = [nodes for text, nodes in self._by_text.items() if text in texts]
+        else:
+            matched = [self._by_text[text] for text in texts if text in self._by_text]
+        result = [node for nodes in matched for node in nodes]
+        result.sort(key=lambda n: n['bounds']['center_y'])
+        return result
+
+    def with_resource(self, fragment: str) -> List[dict]:
+        """查询 resourceId 包含指定片段的节点（文档顺序，同一快照内结果缓存）"""
+        key = "rid:" + fragment
+        if key not in self.memo:
+            self.memo[key] = [node for node in self.nodes if fragment in node.get('resourceId', '')]
+        return self.memo[key]
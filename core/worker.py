@@ -5,17 +5,29 @@ worker.py - 单设备任务执行器
 """
 import threading
 import time
-import json
+from datetime import datetime
 from typing import Optional, Callable, List
 from enum import Enum
 
 from core.logger import DeviceLogger
+from core.config import get_config
+from core.event_log import EventLogger
 from core.automator import DeviceAutomator
 from core.mock_automator import MockAutomator
 from core.selectors import SelectorHelper
 from core.task_loader import TaskLoader, Task
 from core.state_store import StateStore
-from core.exporter import ExcelExporter, create_drug_record, DrugRecord
+from core.shop_cache import ShopItemCache
+from core.frame_overlap import FrameOverlapDetector
+from core.swipe_controller import SwipeController
+from core.ui_index import UiNodeIndex
+from core.category_zones import CategoryZoneTable
+from core import text_norm
+from core.sidebar_model import SidebarModel
+from core.record_stage import RecordStage
+from core.exporter import ExcelExporter, ShopExport, create_drug_record, DrugRecord
+from core.export_service import get_export_service
+from core.dataset import ResultDataset
 
 
 class WorkerStatus(Enum):
@@ -45,11 +57,13 @@ class DeviceWorker:
         self.base_output_dir = base_output_dir
         self.config_path = config_path
         
-        # 加载配置
-        self.config = self._load_config()
+        # 加载配置（进程内共享，热加载后 scroll/features 等配置段整体替换）
+        self.config = get_config(config_path)
+        self._config_version = self.config.version
         
         # 初始化组件（传递 base_output_dir，由各模块自行拼接设备隔离路径）
         self.logger = DeviceLogger(device_serial, base_output_dir)
+        self.events = EventLogger(device_serial, base_output_dir, self.config.get("event_log", {}))
         
         # Mock 模式：serial 以 MOCK- 开头则使用 MockAutomator
         if device_serial.startswith("MOCK-"):
@@ -60,8 +74,69 @@ class DeviceWorker:
             self._is_mock = False
         self.selector: Optional[SelectorHelper] = None
         self.task_loader = TaskLoader(self.logger)
-        self.state_store = StateStore(device_serial, base_output_dir)
-        self.exporter = ExcelExporter(device_serial, base_output_dir, self.logger)
+        state_config = self.config.get("state", {})
+        self.state_store = StateStore(
+            device_serial,
+            base_output_dir,
+            flush_interval=state_config.get("flush_interval", 2.0),
+            flush_every=state_config.get("flush_every_mutations", 50),
+            compact_keys=state_config.get("compact_keys", False)
+        )
+        export_config = self.config.get("export", {})
+        self.exporter = ExcelExporter(
+            device_serial,
+            base_output_dir,
+            self.logger,
+            file_format=export_config.get("format", "xlsx"),
+            xlsx_copy=export_config.get("xlsx_copy", False)
+        )
+        
+        # 汇总数据集：所有设备的店铺记录按 任务开始日期/设备 分区增量写入 output/dataset
+        dataset_config = self.config.get("dataset", {})
+        self.dataset = ResultDataset(
+            base_output_dir, dataset_config.get("format", "auto")
+        ) if dataset_config.get("enabled", True) else None
+        
+        # 记录暂存区：分类由多帧的区间证据决定，确认后（或移出待确认窗口时）才提交到导出器
+        features = self.config.features
+        self.record_stage = RecordStage(
+            self._commit_record,
+            window=features.correction_window,
+            confirm_frames=features.category_confirm_frames
+        )
+        
+        # 店铺商品缓存：再次采集同一店铺时识别已知屏幕
+        self.shop_cache_enabled = features.enable_shop_cache
+        self.shop_cache = ShopItemCache(
+            device_serial,
+            base_output_dir,
+            min_match=features.shop_cache_min_match
+        )
+        
+        # 分类栏模型：分类列表/点击/选中检测优先由模型回答
+        self.sidebar_model_enabled = features.enable_sidebar_model
+        self.sidebar_model = SidebarModel(device_serial, base_output_dir)
+        
+        # 后台导出：店铺结束后xlsx交给共享线程池写出，设备直接进入下一个店铺
+        self.background_export = export_config.get("background", True)
+        self.export_service = get_export_service(export_config.get("max_workers", 2)) if self.background_export else None
+        self._export_futures: List = []
+        # 最近一个店铺的后台导出 (future, job)：落盘后才把任务进度推进到下一个店铺
+        self._last_export: Optional[tuple] = None
+        
+        # 帧间重叠检测：只提取新滚入屏幕的卡片
+        scroll = self.config.scroll
+        self.overlap_enabled = scroll.enable_overlap_detection
+        self.frame_overlap = FrameOverlapDetector()
+        
+        # 自适应滑动：保证相邻两帧至少重叠 min_overlap_cards 张卡片
+        self.adaptive_swipe = scroll.adaptive_swipe
+        self.swipe_controller = SwipeController(
+            distance=scroll.swipe_distance,
+            min_distance=scroll.min_swipe_distance,
+            max_distance=scroll.max_swipe_distance,
+            min_overlap_cards=scroll.min_overlap_cards
+        )
         
         # 线程控制
         self._thread: Optional[threading.Thread] = None
@@ -82,14 +157,38 @@ class DeviceWorker:
         self.total_tasks = 0
         self.current_category = ""
         self.collected_count = 0
+        
+        # 当前快照的UI节点索引（同一份 ui_nodes 只建一次）
+        self._ui_node_index: Optional[UiNodeIndex] = None
     
-    def _load_config(self) -> dict:
-        try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"加载配置失败: {e}")
-            return {}
+    def _commit_record(self, record: DrugRecord, key: str):
+        """暂存区提交回调：写出记录后才标记key已采集（暂存中的记录在崩溃恢复后重新采集）"""
+        self.exporter.add_record(record)
+        self.state_store.add_collected(key)
+    
+    @property
+    def zone_min_confidence(self) -> float:
+        """区间判定置信度低于该值的商品延后判定（暂存时不计票，由后续帧的证据决定分类）"""
+        return self.config.features.zone_min_confidence
+    
+    def _scroll_settings(self):
+        """
+        当前滚动参数（滚动循环每轮调用）
+        配置热加载后返回新的配置段，并同步滑动距离范围
+        """
+        config = self.config
+        if config.version != self._config_version:
+            self._config_version = config.version
+            scroll = config.scroll
+            self.swipe_controller.min_distance = scroll.min_swipe_distance
+            self.swipe_controller.max_distance = scroll.max_swipe_distance
+            self.swipe_controller.distance = min(max(self.swipe_controller.distance, scroll.min_swipe_distance), scroll.max_swipe_distance)
+            self.logger.info(
+                f"配置已更新(v{config.version}): 滚动间隔{scroll.scroll_pause}s, "
+                f"无新数据阈值{scroll.no_new_data_threshold}, 最大滚动{scroll.max_scroll_times}"
+            )
+            self.events.emit("config_reload", version=config.version, scroll_pause=scroll.scroll_pause)
+        return config.scroll
     
     @property
     def status(self) -> WorkerStatus:
@@ -121,7 +220,15 @@ class DeviceWorker:
             )
     
     def load_tasks(self, task_file: str) -> bool:
-        if self.task_loader.load(task_file):
+        # 多设备分片：config.tasks.shards.{serial} = {start, stop, shard_count, shard_index}
+        shard = self.config.get("tasks", {}).get("shards", {}).get(self.device_serial, {})
+        if self.task_loader.load(
+            task_file,
+            start=shard.get("start", 0),
+            stop=shard.get("stop"),
+            shard_count=shard.get("shard_count", 1),
+            shard_index=shard.get("shard_index", 0)
+        ):
             self.total_tasks = self.task_loader.count()
             return True
         return False
@@ -143,7 +250,7 @@ class DeviceWorker:
         if self.status == WorkerStatus.RUNNING:
             self._pause_event.clear()
             self.status = WorkerStatus.PAUSED
-            self.state_store.save()
+            self.state_store.flush()
             self.logger.info("任务已暂停")
     
     def resume(self):
@@ -156,7 +263,7 @@ class DeviceWorker:
         self._stop_event.set()
         self._pause_event.set()
         self.status = WorkerStatus.STOPPING
-        self.state_store.save()
+        self.state_store.flush()
         self.logger.info("正在停止任务...")
     
     def _check_control(self) -> bool:
@@ -178,7 +285,7 @@ class DeviceWorker:
             self.selector = SelectorHelper(
                 self.automator.device,
                 self.logger,
-                self.config_path
+                self.config
             )
             
             # 加载状态
@@ -193,6 +300,11 @@ class DeviceWorker:
                 else:
                     self.logger.info(f"从上次进度继续: 任务{self.current_task_index + 1}")
             
+            # 本轮任务的开始日期（汇总数据集按它分区，断点续跑/跨天后重新导出的店铺原地替换）
+            if not self.state_store.run_date:
+                self.state_store.run_date = datetime.now().strftime("%Y-%m-%d")
+                self.state_store.save()
+            
             tasks = self.task_loader.get_tasks()
             
             # 风控恢复模式：重新进入店铺并继续采集
@@ -215,12 +327,16 @@ class DeviceWorker:
                     break
                 
                 task = tasks[i]
+                # 上一个店铺导出落盘后才记录进度，否则中途崩溃/写出失败会丢失该店铺
+                if not self._settle_last_export():
+                    raise RuntimeError(f"店铺[{self._last_export[1].shop_name}]导出失败，停止任务（进度保留在该店铺）")
                 self.current_task_index = i
                 self.state_store.current_task_index = i
                 self.state_store.save()
                 self._update_progress()
                 
                 self.logger.step(f"开始任务 {i + 1}/{len(tasks)}", str(task))
+                self.events.emit("task_start", task_index=i, total_tasks=len(tasks))
                 
                 success = self._process_shop(task)
                 
@@ -239,11 +355,39 @@ class DeviceWorker:
             self._error_message = str(e)
             self.logger.exception("任务执行", e)
         finally:
-            self.automator.disconnect()
+            self._settle_last_export()
+            self._wait_exports()
+            self.state_store.close()
+            self.automator.disconnect(failed=self.status == WorkerStatus.ERROR)
+            # 关闭事件日志当前分段（再次启动时处理器按需重新打开）
+            self.events.close()
     
     def _process_shop(self, task: Task, resume_mode: bool = False) -> bool:
         """
-        处理单个店铺
+        处理单个店铺（记录店铺级开始/结束事件）
+        
+        Args:
+            task: 任务对象
+            resume_mode: 是否为恢复模式（跳过导航，直接进入采集）
+        """
+        self.events.bind(shop=task.shop_name, poi=task.poi, task_id=self.current_task_index + 1)
+        self.events.emit("shop_start", resume_mode=resume_mode)
+        start_time = time.time()
+        
+        success = self._process_shop_steps(task, resume_mode)
+        
+        self.events.emit(
+            "shop_end",
+            success=success,
+            collected=self.collected_count,
+            elapsed_ms=int((time.time() - start_time) * 1000),
+            text_cache_hit_rate=text_norm.cache_stats()["normalize_text"]["hit_rate"]
+        )
+        return success
+    
+    def _process_shop_steps(self, task: Task, resume_mode: bool = False) -> bool:
+        """
+        处理单个店铺的完整步骤
         
         Args:
             task: 任务对象
@@ -253,6 +397,7 @@ class DeviceWorker:
             # 恢复模式不重置店铺数据
             if not resume_mode:
                 self.state_store.reset_for_new_shop(task.shop_name, task.poi)
+                self.record_stage.clear()
                 self.exporter.start_shop(task.shop_name, poi=task.poi, task_id=self.current_task_index + 1)
                 self.collected_count = 0
             else:
@@ -260,6 +405,12 @@ class DeviceWorker:
                 self.collected_count = self.state_store.collected_count
                 self.logger.info(f"恢复模式: 已采集 {self.collected_count} 条，从分类 '{self.state_store.current_category_name}' 继续")
             
+            if self.shop_cache_enabled and self.shop_cache.load(task.shop_name):
+                self.logger.info(f"已加载店铺缓存: {len(self.shop_cache.categories)} 个分类，已知屏幕将只刷新价格/月销")
+            
+            if self.sidebar_model_enabled and self.sidebar_model.load(task.shop_name):
+                self.logger.info(f"已加载分类栏模型: {len(self.sidebar_model.entries)} 个分类")
+            
             self._update_progress()
             
             # Mock 模式：使用简化采集流程
@@ -295,7 +446,7 @@ class DeviceWorker:
             self.logger.step("进入外卖")
             
             # 获取屏幕尺寸并计算坐标
-            screen_info = self.automator.device.info
+            screen_info = self._screen_info()
             screen_width = screen_info.get('displayWidth', 1096)
             screen_height = screen_info.get('displayHeight', 2560)
             
@@ -389,10 +540,10 @@ class DeviceWorker:
             if not self._collect_all_categories(resume_mode=resume_mode):
                 self.logger.warning("分类采集未完全成功")
             
-            # Step 8: 导出结果
-            filepath = self.exporter.export()
+            # Step 8: 导出结果（后台写出，不阻塞下一个店铺）
+            filepath = self._export_current_shop(background=True)
             if filepath:
-                self.logger.info(f"店铺数据已导出: {filepath}")
+                self.logger.info(f"店铺数据已提交导出: {filepath}")
             
             self.automator.press_back()
             time.sleep(1)
@@ -406,6 +557,115 @@ class DeviceWorker:
             self.logger.exception(f"处理店铺[{task.shop_name}]", e)
             return False
     
+    def _export_current_shop(self, background: bool = False) -> Optional[str]:
+        """
+        导出当前店铺数据（先提交暂存区，同时更新店铺缓存），并记录导出事件
+        
+        Args:
+            background: 是否交给后台导出服务（记录列表随任务移交，返回的是将要写出的路径）
+            
+        Returns:
+            导出文件路径，失败或无数据返回None
+        """
+        self.record_stage.flush()
+        
+        if self.shop_cache_enabled and self.exporter.records:
+            self.shop_cache.update_from_records(self.exporter.records)
+            self.shop_cache.save()
+        
+        if background and self.export_service:
+            job = self.exporter.build_job(detach=True)
+            if job is None:
+                return None
+            future = self.export_service.submit(self._write_shop_outputs, job, self._on_export_done)
+            self._export_futures = [f for f in self._export_futures if not f.done()]
+            self._export_futures.append(future)
+            self._last_export = (future, job)
+            return job.filepath
+        
+        start_time = time.time()
+        job = self.exporter.build_job()
+        filepath = self._write_shop_outputs(job) if job else None
+        self.events.emit(
+            "export",
+            path=filepath,
+            records=self.exporter.get_record_count(),
+            elapsed_ms=int((time.time() - start_time) * 1000)
+        )
+        return filepath
+    
+    def _write_shop_outputs(self, job: ShopExport) -> Optional[str]:
+        """
+        写出一个店铺的结果：店铺xlsx + 汇总数据集分段（可在导出线程中执行）
+        
+        Args:
+            job: 导出任务
+            
+        Returns:
+            xlsx文件路径，失败返回None
+        """
+        filepath = self.exporter.write(job)
+        if self.dataset:
+            part_path = self.dataset.append(self.device_serial, job, date=self.state_store.run_date or None)
+            if part_path:
+                self.logger.debug(f"已写入汇总数据集: {part_path}")
+        return filepath
+    
+    def _on_export_done(self, job: ShopExport, filepath: Optional[str], elapsed_ms: int):
+        """后台导出完成回调（在导出线程中执行，只写日志和事件）"""
+        if filepath:
+            self.logger.info(f"店铺数据已导出: {filepath} (后台写出 {elapsed_ms}ms)")
+        else:
+            self.logger.error(f"店铺[{job.shop_name}]后台导出失败: {job.filepath}")
+        self.events.emit(
+            "export",
+            shop=job.shop_name,
+            path=filepath,
+            records=len(job.records),
+            elapsed_ms=elapsed_ms,
+            background=True
+        )
+    
+    def _settle_last_export(self, timeout: float = 120) -> bool:
+        """
+        等待最近一个店铺的后台导出落盘（一级流水线：导出与下一个店铺的返回/导航重叠，
+        但任务进度只在导出成功后推进）；后台写出失败时在当前线程重试一次
+        
+        Args:
+            timeout: 等待超时(秒)
+            
+        Returns:
+            是否已落盘（没有待确认的导出也返回True）
+        """
+        if self._last_export is None:
+            return True
+        future, job = self._last_export
+        if not self.export_service.wait([future], timeout):
+            self.logger.error(f"店铺[{job.shop_name}]后台导出等待超时({timeout}s)")
+            return False
+        if future.result() is None:
+            self.logger.warning(f"店铺[{job.shop_name}]后台导出失败，重试写出")
+            try:
+                filepath = self._write_shop_outputs(job)
+            except Exception as e:
+                self.logger.error(f"店铺[{job.shop_name}]重试导出失败: {e}")
+                filepath = None
+            if not filepath:
+                return False
+            self.logger.info(f"店铺数据已导出: {filepath} (重试)")
+        self._last_export = None
+        return True
+    
+    def _wait_exports(self, timeout: float = 120):
+        """等待本设备提交的后台导出全部完成（任务结束/停止时调用）"""
+        pending = [f for f in self._export_futures if not f.done()]
+        if not pending:
+            return
+        self.logger.info(f"等待 {len(pending)} 个后台导出完成...")
+        if not self.export_service.wait(pending, timeout):
+            self.logger.warning(f"后台导出等待超时({timeout}s)，未完成的导出将在后台继续")
+        self._export_futures = []
+    
     def _process_shop_mock(self, task: Task) -> bool:
         """
         Mock模式采集流程（简化版，不涉及真实设备操作）
@@ -465,7 +725,7 @@ class DeviceWorker:
                                 shop_name, category, prod["drug_name"], prod["price"]
                             )
                             
-                            if self.state_store.is_collected(key):
+                            if self.state_store.is_collected(key) or key in self.record_stage:
                                 continue
                             
                             # 创建记录
@@ -476,8 +736,15 @@ class DeviceWorker:
                                 price=prod["price"]
                             )
                             
-                            self.exporter.add_record(record)
-                            self.state_store.add_collected(key)
+                            self.record_stage.add(record, key)
+                            self.events.emit(
+                                "item",
+                                key=key,
+                                category=category,
+                                mode="NORMAL",
+                                price=record.price,
+                                sales=record.monthly_sales
+                            )
                             self.collected_count += 1
                             self._update_progress()
                     
@@ -487,7 +754,7 @@ class DeviceWorker:
                     time.sleep(0.05)
             
             # 导出结果
-            filepath = self.exporter.export()
+            filepath = self._export_current_shop()
             if filepath:
                 self.logger.info(f"[Mock] 店铺数据已导出: {filepath}")
             
@@ -498,7 +765,7 @@ class DeviceWorker:
             self.logger.exception(f"[Mock] 处理店铺[{task.shop_name}]", e)
             # 即使异常也尝试导出已采集的数据
             try:
-                filepath = self.exporter.export()
+                filepath = self._export_current_shop()
                 if filepath:
                     self.logger.info(f"[Mock] 异常恢复: 已导出部分数据到 {filepath}")
             except:
@@ -529,7 +796,7 @@ class DeviceWorker:
             time.sleep(5)  # 等待首页加载
             
             # 获取屏幕尺寸
-            screen_info = self.automator.device.info
+            screen_info = self._screen_info()
             screen_width = screen_info.get('displayWidth', 1096)
             screen_height = screen_info.get('displayHeight', 2560)
             
@@ -595,7 +862,7 @@ class DeviceWorker:
     def _search_location(self, poi: str) -> bool:
         """定位搜索：点击顶部定位入口，输入地址"""
         try:
-            screen_info = self.automator.device.info
+            screen_info = self._screen_info()
             screen_width = screen_info.get("displayWidth", 1096)
             screen_height = screen_info.get("displayHeight", 2560)
             
@@ -719,7 +986,7 @@ class DeviceWorker:
         """店铺搜索：输入店名，点击搜索按钮，然后点击第一个搜索结果"""
         try:
             # 获取屏幕尺寸
-            screen_info = self.automator.device.info
+            screen_info = self._screen_info()
             w = screen_info.get("displayWidth", 1096)
             h = screen_info.get("displayHeight", 2560)
             
@@ -880,6 +1147,8 @@ class DeviceWorker:
                 self.logger.warning(f"点击分类失败: {start_category}，尝试继续")
             
             time.sleep(1)
+            self.frame_overlap.reset()
+            self.swipe_controller.reset()
             
             # 初始化当前分类
             current_category = start_category
@@ -889,11 +1158,8 @@ class DeviceWorker:
             self.state_store.current_category_index = current_category_index
             self._update_progress()
             
-            # 采集配置
-            scroll_config = self.config.get("scroll", {})
-            max_scroll = scroll_config.get("max_scroll_times", 100)
-            scroll_pause = scroll_config.get("pause_seconds", 1.5)
-            no_new_threshold = scroll_config.get("no_new_data_threshold", 3)
+            # 采集配置（滚动参数每轮重新读取，热加载后立即生效）
+            scroll = self._scroll_settings()
             
             no_new_count = 0
             scroll_count = 0
@@ -907,8 +1173,8 @@ class DeviceWorker:
 
             # === 边界模式状态机 ===
             # 检查是否启用边界模式
-            enable_boundary_mode = self.config.get("features", {}).get("enable_boundary_mode", True)
-            verify_threshold = self.config.get("features", {}).get("verify_screen_threshold", 10)
+            enable_boundary_mode = self.config.features.enable_boundary_mode
+            verify_threshold = self.config.features.verify_screen_threshold
 
             # 状态变量
             switch_mode = "NORMAL"
@@ -916,13 +1182,19 @@ class DeviceWorker:
             divider_y = 0
             verify_screen_count = 0
 
-            while scroll_count < max_scroll:
+            while scroll_count < scroll.max_scroll_times:
                 if not self._check_control():
                     return False
+                scroll = self._scroll_settings()
 
                 # === 优化核心：一次获取，本地解析 ===
+                frame_start = time.time()
                 xml_content = self.automator.get_page_source()
                 ui_nodes = self.automator.parse_hierarchy(xml_content)
+                dump_ms = int((time.time() - frame_start) * 1000)
+
+                # 帧间对齐：上一帧已处理的卡片不再提取（截止位置由采集器在自己的快照上计算）
+                incremental = self._align_frame(ui_nodes)
 
                 # === 边界检测（方案1）===
                 # 每次滚动后检测是否出现分类边界
@@ -930,47 +1202,31 @@ class DeviceWorker:
                     ui_nodes, current_category, categories
                 )
 
-                # 如果检测到边界，触发异步修正逻辑（用户强制要求）
+                # 本帧的分类区间证据（暂存区内的商品再次出现时投票）
+                self._stage_frame_evidence(
+                    ui_nodes, current_category,
+                    boundary_y if has_boundary else 0, next_category_candidate
+                )
+
+                # 如果检测到边界，进入边界模式
                 if has_boundary and next_category_candidate:
-                    # 1. 找到分界线之上的最后一个商品（锚点）
-                    anchor_product_name = self._find_last_product_above_boundary(ui_nodes, boundary_y)
+                    next_category = next_category_candidate
+                    divider_y = boundary_y
 
+                    # 找到分界线之上的最后一个商品（锚点），本帧采集完成后在暂存区内修正
+                    anchor_product_name = self._find_last_product_above_boundary(ui_nodes, boundary_y)
                     if anchor_product_name:
                         self.logger.info(f"【锚点定位】分类 {current_category} 的最后一个商品是: {anchor_product_name}")
-
-                        # 2. 启动异步线程，5秒后执行修正
-                        # 注意：需要传递当前的记录列表快照或索引，但由于是引用传递，直接传 next_category 即可
-                        # 修正逻辑：在 records 中找到 anchor_product_name，将其后的所有商品重置为 next_category_candidate
-
-                        def async_correction_task(worker_ref, anchor_name, target_category, log_category_from):
-                            try:
-                                time.sleep(5)  # 等待5秒
-                                worker_ref.logger.info(f"【异步修正启动】开始执行分类修正: {log_category_from} -> {target_category}")
-
-                                # 锁定记录列表（虽然GIL保证了列表操作原子性，但为了逻辑安全）
-                                # 在 worker 实例中执行修正
-                                count = worker_ref._perform_retroactive_correction(anchor_name, log_category_from, target_category)
-
-                                if count > 0:
-                                    worker_ref.logger.info(f"【异步修正完成】已将锚点 '{anchor_name}' 之后的 {count} 个商品归属修正为 {target_category}")
-                                else:
-                                    worker_ref.logger.info(f"【异步修正跳过】未找到需要修正的商品 (锚点: {anchor_name})")
-
-                            except Exception as e:
-                                worker_ref.logger.error(f"【异步修正异常】{e}")
-
-                        # 启动守护线程
-                        t = threading.Thread(
-                            target=async_correction_task,
-                            args=(self, anchor_product_name, next_category_candidate, current_category),
-                            daemon=True
-                        )
-                        t.start()
                     else:
                         self.logger.warning(f"检测到边界但未找到上方锚点商品 (Y={boundary_y})")
 
-                # 如果检测到边界，进入边界模式
-                if has_boundary and next_category_candidate:
+                    self.events.emit(
+                        "boundary",
+                        category=current_category,
+                        next_category=next_category_candidate,
+                        divider_y=boundary_y,
+                        mode="BOUNDARY"
+                    )
                     self.logger.info(f"🔄 进入边界模式: {current_category} → {next_category} (分界线Y={boundary_y})")
 
                     # === 边界模式采集逻辑优化 ===
@@ -979,10 +1235,14 @@ class DeviceWorker:
 
                     self.logger.info(f"边界模式采集: {current_category} (上) vs {next_category} (下)")
                     curr_new, next_new = self._collect_visible_products_with_boundary(
-                        current_category, ui_nodes, "BOUNDARY", boundary_y, next_category
+                        current_category, ui_nodes, "BOUNDARY", boundary_y, next_category, incremental
                     )
                     new_count = curr_new + next_new
 
+                    # 回溯修正：锚点之后仍在待确认窗口内的记录归入下一分类（工作线程内同步执行）
+                    if anchor_product_name:
+                        self._perform_retroactive_correction(anchor_product_name, current_category, next_category)
+
                     # 重新获取UI状态，检测左侧是否已切换
                     xml_content_check = self.automator.get_page_source()
                     ui_nodes_check = self.automator.parse_hierarchy(xml_content_check)
@@ -991,6 +1251,7 @@ class DeviceWorker:
                     if detected_category == next_category:
                         # 左侧已切换
                         self.logger.info(f"✅ 左侧已切换完成: {current_category} → {next_category}")
+                        self.events.emit("category_switch", from_category=current_category, to_category=next_category, mode="BOUNDARY")
                         current_category = next_category
                         current_category_index += 1
                         self.current_category = current_category
@@ -1011,6 +1272,7 @@ class DeviceWorker:
                         detected_category_after = self._detect_selected_category_from_nodes(ui_nodes_check)
                         if detected_category_after == next_category:
                             self.logger.info(f"✅ 左侧分类已切换: {current_category} → {next_category}")
+                            self.events.emit("category_switch", from_category=current_category, to_category=next_category, mode="BOUNDARY")
                             current_category = next_category
                             current_category_index += 1
                             self.current_category = current_category
@@ -1023,11 +1285,24 @@ class DeviceWorker:
                             is_last_category = (current_category_index == len(categories) - 1)
                 else:
                     # 正常模式：使用当前分类采集
-                    new_count = self._collect_visible_products(current_category, ui_nodes)
+                    new_count = self._collect_visible_products(current_category, ui_nodes, incremental)
+                
+                self.events.emit(
+                    "frame",
+                    category=current_category,
+                    mode="BOUNDARY" if (has_boundary and next_category_candidate) else "NORMAL",
+                    new=new_count,
+                    overlap=self.frame_overlap.last_overlap,
+                    swipe=round(self.swipe_controller.distance, 3),
+                    scroll=scroll_count,
+                    dump_ms=dump_ms,
+                    xml_bytes=self.automator.last_xml_bytes,
+                    frame_ms=int((time.time() - frame_start) * 1000)
+                )
                 
                 # 动态阈值：如果是最后一个分类，使用更严格的判定标准（10次无数据）
                 # 否则使用配置的阈值（通常较小，用于快速检测风控）
-                current_threshold = 10 if is_last_category else no_new_threshold
+                current_threshold = 10 if is_last_category else scroll.no_new_data_threshold
                 
                 if new_count == 0:
                     no_new_count += 1
@@ -1040,6 +1315,12 @@ class DeviceWorker:
                             
                             # 标记风控并保存状态
                             self.state_store.mark_risk_control(categories)
+                            self.events.emit(
+                                "risk_control",
+                                category=current_category,
+                                no_new_count=no_new_count,
+                                remaining_categories=len(categories) - current_category_index - 1
+                            )
                             
                             # 暂停任务等待人工介入
                             self._pause_event.clear()
@@ -1066,13 +1347,13 @@ class DeviceWorker:
                     no_new_count = 0
                 
                 # 向上滚动
-                self.automator.swipe_up()
+                self._swipe_next_frame()
                 scroll_count += 1
                 
-                time.sleep(scroll_pause)
+                time.sleep(scroll.scroll_pause)
             
-            if scroll_count >= max_scroll:
-                self.logger.warning(f"达到最大滚动次数({max_scroll})停止，可能未采集完所有商品")
+            if scroll_count >= scroll.max_scroll_times:
+                self.logger.warning(f"达到最大滚动次数({scroll.max_scroll_times})停止，可能未采集完所有商品")
 
             self.logger.info(f"采集完成: 滚动{scroll_count}次, 覆盖{len(collected_categories)}个分类")
             return True
@@ -1129,6 +1410,8 @@ class DeviceWorker:
         try:
             self.logger.info(">>> 触发指定目录采集 <<<")
             self.logger.info("保持当前页面状态，直接开始采集...")
+            self.frame_overlap.reset()
+            self.swipe_controller.reset()
             
             # 1. 初始化状态
             # 优先尝试识别左侧选中的分类
@@ -1148,11 +1431,8 @@ class DeviceWorker:
             self.state_store.current_category_name = current_category
             self._update_progress()
             
-            # 2. 采集配置
-            scroll_config = self.config.get("scroll", {})
-            max_scroll = scroll_config.get("max_scroll_times", 100)
-            scroll_pause = scroll_config.get("pause_seconds", 1.5)
-            no_new_threshold = scroll_config.get("no_new_data_threshold", 5)
+            # 2. 采集配置（滚动参数每轮重新读取，热加载后立即生效）
+            scroll = self._scroll_settings()
             
             no_new_count = 0
             scroll_count = 0
@@ -1179,7 +1459,7 @@ class DeviceWorker:
                 ui_nodes = self.automator.parse_hierarchy(xml_content)
 
                 # 获取屏幕尺寸
-                screen_info = self.automator.device.info
+                screen_info = self._screen_info()
                 w = screen_info.get("displayWidth", 1096)
                 h = screen_info.get("displayHeight", 2560)
 
@@ -1379,15 +1659,21 @@ class DeviceWorker:
                 return True
 
             # 3. 循环采集（正常模式）
-            while scroll_count < max_scroll:
+            while scroll_count < scroll.max_scroll_times:
                 if not self._check_control():
                     self.logger.info("检测到停止信号，正在保存数据...")
                     manual_stop = True
                     break
+                scroll = self._scroll_settings()
 
                 # === 优化核心：一次获取，本地解析 ===
+                frame_start = time.time()
                 xml_content = self.automator.get_page_source()
                 ui_nodes = self.automator.parse_hierarchy(xml_content)
+                dump_ms = int((time.time() - frame_start) * 1000)
+
+                # 帧间对齐：上一帧已处理的卡片不再提取（截止位置由采集器在自己的快照上计算）
+                incremental = self._align_frame(ui_nodes)
 
                 # 获取已知分类列表
                 categories = list(self.state_store.state.get("categories", []))
@@ -1402,6 +1688,12 @@ class DeviceWorker:
                     ui_nodes, current_category, categories
                 )
 
+                # 本帧的分类区间证据（暂存区内的商品再次出现时投票）
+                self._stage_frame_evidence(
+                    ui_nodes, current_category,
+                    boundary_y if has_boundary else 0, next_cat_candidate
+                )
+
                 if has_boundary:
                     # 即使没有识别出下一分类名，只要有边界线，就尝试从分类列表推断
                     if not next_cat_candidate and current_category in categories:
@@ -1411,6 +1703,13 @@ class DeviceWorker:
 
                     next_cat_display = next_cat_candidate if next_cat_candidate else "未知分类"
                     self.logger.info(f"🛑 [严格边界控制] 检测到分界线 Y={boundary_y} | 上方: {current_category} | 下方: {next_cat_display}")
+                    self.events.emit(
+                        "boundary",
+                        category=current_category,
+                        next_category=next_cat_candidate,
+                        divider_y=boundary_y,
+                        mode="BOUNDARY"
+                    )
 
                     # === 核心逻辑：回溯修正 (Retroactive Correction) ===
                     # 1. 立即查找分界线上方最后一个商品（锚点）
@@ -1425,13 +1724,14 @@ class DeviceWorker:
 
                     # 边界模式采集：严格按照 Y 坐标切分
                     curr_new, next_new = self._collect_visible_products_with_boundary(
-                        current_category, ui_nodes, "BOUNDARY", boundary_y, next_cat_candidate
+                        current_category, ui_nodes, "BOUNDARY", boundary_y, next_cat_candidate, incremental
                     )
                     new_count = curr_new + next_new
 
                     # 如果采集到了下方分类的数据，说明已经实质性进入了下一个分类
                     if next_cat_candidate and next_new > 0:
                         self.logger.info(f"✅ [严格边界] 采集到下方新分类数据 ({next_new}条)，执行分类切换")
+                        self.events.emit("category_switch", from_category=current_category, to_category=next_cat_candidate, mode="BOUNDARY")
                         # 立即切换分类
                         current_category = next_cat_candidate
                         self.current_category = current_category
@@ -1457,6 +1757,7 @@ class DeviceWorker:
 
                     if detected_category and detected_category != current_category:
                         self.logger.info(f"✅ [常规模式] 检测到分类切换: {current_category} → {detected_category}")
+                        self.events.emit("category_switch", from_category=current_category, to_category=detected_category, mode="NORMAL")
                         current_category = detected_category
                         self.current_category = current_category
                         self.state_store.current_category_name = current_category
@@ -1465,13 +1766,26 @@ class DeviceWorker:
                         no_new_count = 0
 
                     # 采集
-                    new_count = self._collect_visible_products(current_category, ui_nodes)
+                    new_count = self._collect_visible_products(current_category, ui_nodes, incremental)
+
+                self.events.emit(
+                    "frame",
+                    category=current_category,
+                    mode="BOUNDARY" if has_boundary else "NORMAL",
+                    new=new_count,
+                    overlap=self.frame_overlap.last_overlap,
+                    swipe=round(self.swipe_controller.distance, 3),
+                    scroll=scroll_count,
+                    dump_ms=dump_ms,
+                    xml_bytes=self.automator.last_xml_bytes,
+                    frame_ms=int((time.time() - frame_start) * 1000)
+                )
 
                 if new_count == 0:
                     no_new_count += 1
                     # 动态阈值：如果是最后一个分类，使用更严格的判定标准
                     is_last = (categories and current_category == categories[-1])
-                    current_threshold = 10 if is_last else no_new_threshold
+                    current_threshold = 10 if is_last else scroll.no_new_data_threshold
 
                     if no_new_count >= current_threshold:
                         if not is_last:
@@ -1483,17 +1797,17 @@ class DeviceWorker:
                     no_new_count = 0
 
                 # C. 滚动
-                self.automator.swipe_up()
+                self._swipe_next_frame()
                 scroll_count += 1
-                time.sleep(scroll_pause)
+                time.sleep(scroll.scroll_pause)
             
             # 4. 结束处理
             self.logger.info(f"指定目录采集结束: 滚动{scroll_count}次, 涉及分类: {list(collected_categories)}")
             
-            # 导出数据 (无论是正常结束还是手动停止，都导出)
-            filepath = self.exporter.export()
+            # 导出数据 (无论是正常结束还是手动停止，都导出；后台写出)
+            filepath = self._export_current_shop(background=True)
             if filepath:
-                self.logger.info(f"店铺数据已导出: {filepath}")
+                self.logger.info(f"店铺数据已提交导出: {filepath}")
             
             # 如果是手动停止，返回True以避免触发外层的错误恢复逻辑
             if manual_stop:
@@ -1505,11 +1819,30 @@ class DeviceWorker:
             self.logger.exception("指定目录采集", e)
             # 即使发生异常，也尝试导出
             try:
-                self.exporter.export()
+                self._export_current_shop()
             except:
                 pass
             return False
 
+    def _screen_info(self) -> dict:
+        """屏幕尺寸（由 automator 在连接时缓存，避免每次检测都通过RPC读取 device.info）"""
+        width, height = self.automator.get_screen_size()
+        return {"displayWidth": width, "displayHeight": height}
+
+    def _ui_index(self, ui_nodes: list) -> UiNodeIndex:
+        """
+        获取当前快照的空间索引（同一份 ui_nodes 复用同一个索引）
+
+        Args:
+            ui_nodes: 预解析的UI节点列表
+
+        Returns:
+            UiNodeIndex
+        """
+        if self._ui_node_index is None or self._ui_node_index.nodes is not ui_nodes:
+            self._ui_node_index = UiNodeIndex(ui_nodes)
+        return self._ui_node_index
+
     def _detect_category_from_known_list(self, ui_nodes: list, known_categories: set) -> str:
         """
         从已知分类列表中匹配商品区的文本
@@ -1524,7 +1857,7 @@ class DeviceWorker:
         """
         try:
             # 获取屏幕尺寸
-            screen_info = self.automator.device.info
+            screen_info = self._screen_info()
             w = screen_info.get("displayWidth", 1096)
             h = screen_info.get("displayHeight", 2560)
 
@@ -1538,18 +1871,10 @@ class DeviceWorker:
 
             candidates = []
 
-            for node in ui_nodes:
-                text = node.get('text', '').strip()
-                if not text:
-                    continue
-
-                # 关键：只匹配已知分类名
-                if text not in known_categories:
-                    continue
-
-                bounds = node.get('bounds')
-                if not bounds:
-                    continue
+            # 关键：只匹配已知分类名
+            for node in self._ui_index(ui_nodes).with_texts(known_categories):
+                text = node['text'].strip()
+                bounds = node['bounds']
 
                 cx = bounds['center_x']
                 cy = bounds['center_y']
@@ -1577,12 +1902,19 @@ class DeviceWorker:
         策略：仅通过XML层级结构查找橙色竖条indicator
         橙色竖条位置：父3 (FrameLayout) 的子节点
         resourceId: category_item_indicator_left
+        有分类栏模型时先用扁平节点中的指示条位置判断，结果不在模型中时再重新获取XML树
         """
         try:
-            # 使用device.dump_hierarchy()获取完整XML并解析父子关系
+            if self.sidebar_model_enabled and self.sidebar_model.loaded:
+                detected = self._detect_selected_from_indicator(ui_nodes)
+                if detected and detected in self.sidebar_model.categories:
+                    self.logger.info(f"✅ 检测到选中分类: {detected}")
+                    return detected
+
+            # 获取完整层级XML并解析父子关系（不使用精简层级，避免父容器被折叠）
             import xml.etree.ElementTree as ET
 
-            xml_content = self.automator.device.dump_hierarchy()
+            xml_content = self.automator.get_page_source(full_tree=True)
             root = ET.fromstring(xml_content)
 
             # 查找所有 resourceId=txt_category_name_1 的分类TextView
@@ -1626,22 +1958,21 @@ class DeviceWorker:
                         if 'category_item_indicator' in sibling_id:
                             # 找到橙色竖条，说明这个分类是选中的
                             self.logger.info(f"✅ 检测到选中分类: {text}")
+                            self._learn_indicator_offset(sibling, cat_info['element'])
                             return text
 
             # 兼容性检测：如果没有找到橙色竖条，检查 selected="true" 属性
             # 但仅限左侧分类区域
-            screen_info = self.automator.device.info
+            screen_info = self._screen_info()
             w = screen_info.get("displayWidth", 1096)
 
-            for node in ui_nodes:
+            # 仅限左侧分类区域
+            for node in self._ui_index(ui_nodes).region(max_x=w * 0.25, strict=True):
                 if node.get('selected') == 'true':
-                    # 检查是否在左侧区域
-                    bounds = node.get('bounds')
-                    if bounds and bounds['center_x'] < w * 0.25:
-                        text = node.get('text', '').strip()
-                        if text and len(text) >= 2 and text not in ["推荐", "活动", "品牌"]:
-                            self.logger.info(f"✅ 检测到选中分类(selected属性): {text}")
-                            return text
+                    text = node.get('text', '').strip()
+                    if text and len(text) >= 2 and text not in ["推荐", "活动", "品牌"]:
+                        self.logger.info(f"✅ 检测到选中分类(selected属性): {text}")
+                        return text
 
             return ""
 
@@ -1649,6 +1980,46 @@ class DeviceWorker:
             self.logger.error(f"分类检测失败: {e}")
             return ""
 
+    def _detect_selected_from_indicator(self, ui_nodes: list) -> str:
+        """
+        从扁平节点中按指示条位置检测选中分类（不重新获取XML）
+
+        Args:
+            ui_nodes: UI节点列表
+
+        Returns:
+            选中的分类名，无法判断返回空字符串
+        """
+        w = self._screen_info().get("displayWidth", 1096)
+        index = self._ui_index(ui_nodes)
+
+        indicator = next(
+            (n for n in index.with_resource('category_item_indicator')
+             if n.get('bounds') and n['bounds']['center_x'] < w * 0.25),
+            None
+        )
+        if not indicator:
+            return ""
+
+        excluded = {"推荐", "活动", "品牌", "常用清单", "全部商品", "首页", "商家", "全部", "综合", "销量", "价格"}
+        items = []
+        for node in index.with_resource('txt_category_name_1'):
+            text = node.get('text', '').strip()
+            if node.get('bounds') and len(text) >= 2 and text not in excluded:
+                items.append((text, node['bounds']['center_y']))
+
+        return self.sidebar_model.match_indicator(indicator['bounds']['center_y'], items)
+
+    def _learn_indicator_offset(self, indicator_element, category_element):
+        """由XML结构检测结果记录指示条相对分类项的偏移"""
+        if not (self.sidebar_model_enabled and self.sidebar_model.loaded):
+            return
+        indicator_y = self._get_center_y(indicator_element)
+        category_y = self._get_center_y(category_element)
+        if indicator_y and category_y and indicator_y - category_y != self.sidebar_model.indicator_offset:
+            self.sidebar_model.learn_indicator(indicator_y, category_y)
+            self.sidebar_model.save()
+
     def _detect_selected_by_orange_bar(self, ui_nodes: list) -> str:
         """已弃用：不再使用不准确的坐标推断"""
         return ""
@@ -1658,7 +2029,7 @@ class DeviceWorker:
         检测左侧导航栏当前选中的分类
         仅使用XML结构检测，不再进行位置推断
         """
-        return self._detect_selected_category_from_nodes(self.automator.parse_hierarchy(self.automator.device.dump_hierarchy()))
+        return self._detect_selected_category_from_nodes(self.automator.parse_hierarchy(self.automator.get_page_source()))
 
     def _detect_category_header_seamless(self, ui_nodes: list = None) -> str:
         """
@@ -1670,7 +2041,7 @@ class DeviceWorker:
         """
         try:
             # 获取屏幕尺寸
-            screen_info = self.automator.device.info
+            screen_info = self._screen_info()
             w = screen_info.get("displayWidth", 1096)
             h = screen_info.get("displayHeight", 2560)
             
@@ -1683,21 +2054,19 @@ class DeviceWorker:
             
             # 尝试从节点中找到"全部"或"全部商品"来调整min_y
             if ui_nodes:
-                for node in ui_nodes:
-                    text = node.get('text', '')
-                    if text in ["全部", "全部商品"]:
-                        bounds = node.get('bounds')
-                        if bounds and bounds['bottom'] < h * 0.3:
-                            min_y = bounds['bottom'] + 10
-                            break
+                for node in self._ui_index(ui_nodes).with_texts(["全部", "全部商品"]):
+                    bounds = node['bounds']
+                    if bounds['bottom'] < h * 0.3:
+                        min_y = bounds['bottom'] + 10
+                        break
             
             max_y = h * 0.6
             
             candidates = []
             
             if ui_nodes is not None:
-                # 使用本地节点
-                for node in ui_nodes:
+                # 使用本地节点（只遍历标题区域）
+                for node in self._ui_index(ui_nodes).region(min_x=min_x, min_y=min_y, max_y=max_y):
                     text = node.get('text', '')
                     if not text: continue
                     text = text.strip()
@@ -1739,31 +2108,28 @@ class DeviceWorker:
         2. 在侧边栏列表中找到位于当前分类下方的第一个有效分类名
         """
         try:
-            screen_info = self.automator.device.info
+            screen_info = self._screen_info()
             w = screen_info.get("displayWidth", 1096)
             sidebar_max_x = w * 0.25
 
+            index = self._ui_index(ui_nodes)
+
             # 1. 寻找橙色指示条的位置
             indicator_y = -1
-            for node in ui_nodes:
-                rid = node.get('resourceId', '')
-                if 'category_item_indicator' in rid:
-                    bounds = node.get('bounds')
-                    if bounds:
-                        indicator_y = bounds['center_y']
-                        break
+            for node in index.with_resource('category_item_indicator'):
+                bounds = node.get('bounds')
+                if bounds:
+                    indicator_y = bounds['center_y']
+                    break
 
             # 2. 收集所有侧边栏分类项
             sidebar_items = []
-            for node in ui_nodes:
+            # 必须在侧边栏区域 (收紧范围至20%，排除右侧筛选栏)
+            for node in index.region(max_x=w * 0.20):
                 text = node.get('text', '').strip()
-                bounds = node.get('bounds')
-
-                if not text or not bounds:
-                    continue
+                bounds = node['bounds']
 
-                # 必须在侧边栏区域 (收紧范围至20%，排除右侧筛选栏)
-                if bounds['center_x'] > w * 0.20:
+                if not text:
                     continue
 
                 # 排除无效文本
@@ -1827,34 +2193,21 @@ class DeviceWorker:
         2. 下一分类优先通过侧边栏动态检测 (Strict Single Mode)
         """
         try:
-            screen_info = self.automator.device.info
+            screen_info = self._screen_info()
             w = screen_info.get("displayWidth", 1096)
             h = screen_info.get("displayHeight", 2560)
 
             # 1. 查找分割线（商品区域的横线）
-            dividers = []
-            for node in ui_nodes:
-                bounds = node.get('bounds')
-                if not bounds:
-                    continue
-
-                # 分割线特征：高度<=5px, 宽度>=50%屏宽, 在商品区域
-                if (bounds['height'] <= 5 and
-                    bounds['width'] >= w * 0.50 and
-                    bounds['left'] > w * 0.20 and
-                    w * 0.15 < bounds['center_y'] < h * 0.85):
-
-                    dividers.append({
-                        'y': bounds['center_y'],
-                        'height': bounds['height'],
-                        'width': bounds['width']
-                    })
+            # 分割线特征：高度<=5px, 宽度>=50%屏宽, 在商品区域（结果已按Y排序）
+            dividers = self._ui_index(ui_nodes).region(
+                min_left=w * 0.20, min_y=w * 0.15, max_y=h * 0.85, strict=True,
+                min_width=w * 0.50, max_height=5
+            )
 
-            # 按Y坐标排序，取最上面的分割线
+            # 取最上面的分割线
             divider_y = None
             if dividers:
-                dividers.sort(key=lambda x: x['y'])
-                divider_y = dividers[0]['y']
+                divider_y = dividers[0]['bounds']['center_y']
                 self.logger.debug(f"边界检测: 找到 {len(dividers)} 条分割线, 选择 Y={divider_y}")
 
             if not divider_y:
@@ -1893,7 +2246,7 @@ class DeviceWorker:
         
         try:
             # 获取屏幕尺寸
-            screen_info = self.automator.device.info
+            screen_info = self._screen_info()
             screen_width = screen_info.get("displayWidth", 1096)
             screen_height = screen_info.get("displayHeight", 2560)
             
@@ -1978,7 +2331,7 @@ class DeviceWorker:
         """
         try:
             # 获取屏幕尺寸
-            screen_info = self.automator.device.info
+            screen_info = self._screen_info()
             screen_width = screen_info.get("displayWidth", 1096)
             screen_height = screen_info.get("displayHeight", 2560)
 
@@ -1997,43 +2350,19 @@ class DeviceWorker:
             search_min_y = max(0, category_title_y - 200)
             search_max_y = category_title_y
 
-            candidates = []
-
-            for node in ui_nodes:
-                class_name = node.get('className', '')
-                if 'View' not in class_name:
-                    continue
-
-                bounds = node.get('bounds')
-                if not bounds:
-                    continue
-
-                # 检查尺寸
-                if bounds['height'] > max_height:
-                    continue
-                if bounds['width'] < min_width:
-                    continue
-
-                # 检查位置
-                if bounds['left'] < min_x:
-                    continue
-
-                center_y = bounds['center_y']
-                if not (search_min_y <= center_y <= search_max_y):
-                    continue
-
-                # 符合条件的候选分割线
-                candidates.append({
-                    'y': center_y,
-                    'distance': category_title_y - center_y
-                })
+            candidates = [
+                node for node in self._ui_index(ui_nodes).region(
+                    min_left=min_x, min_y=search_min_y, max_y=search_max_y,
+                    min_width=min_width, max_height=max_height
+                )
+                if 'View' in node.get('className', '')
+            ]
 
             if not candidates:
                 return 0
 
-            # 返回最接近分类标题的分割线
-            candidates.sort(key=lambda x: x['distance'])
-            return candidates[0]['y']
+            # 返回最接近分类标题的分割线（结果按Y排序，最后一条离标题最近）
+            return candidates[-1]['bounds']['center_y']
 
         except Exception as e:
             self.logger.debug(f"分割线检测失败: {e}")
@@ -2052,7 +2381,7 @@ class DeviceWorker:
         """
         try:
             # 获取屏幕尺寸
-            screen_info = self.automator.device.info
+            screen_info = self._screen_info()
             screen_width = screen_info.get("displayWidth", 1096)
             screen_height = screen_info.get("displayHeight", 2560)
 
@@ -2061,10 +2390,9 @@ class DeviceWorker:
             min_y = screen_height * 0.15
             max_y = screen_height * 0.90
 
-            # 方法1：从ui_nodes查找 selected='true' 且文本匹配的节点
-            for node in ui_nodes:
-                selected = node.get('selected', 'false')
-                if selected != 'true':
+            # 方法1：从左侧区域的节点查找 selected='true' 且文本匹配的节点
+            for node in self._ui_index(ui_nodes).region(max_x=max_x, min_y=min_y, max_y=max_y, strict=True):
+                if node.get('selected', 'false') != 'true':
                     continue
 
                 text = node.get('text', '').strip()
@@ -2072,18 +2400,7 @@ class DeviceWorker:
                     continue
 
                 # 检查文本是否匹配（完整匹配或部分匹配）
-                if text != expected_category and expected_category not in text:
-                    continue
-
-                bounds = node.get('bounds')
-                if not bounds:
-                    continue
-
-                # 检查位置
-                center_x = bounds['center_x']
-                center_y = bounds['center_y']
-
-                if center_x < max_x and min_y < center_y < max_y:
+                if text == expected_category or expected_category in text:
                     self.logger.debug(f"检测到左侧选中分类: {text}")
                     return True
 
@@ -2120,25 +2437,17 @@ class DeviceWorker:
         """
         try:
             # 获取屏幕尺寸
-            screen_info = self.automator.device.info
+            screen_info = self._screen_info()
             screen_width = screen_info.get("displayWidth", 1096)
 
             # 分类标题区域: X: 20%-50%
             min_x = screen_width * 0.20
             max_x = screen_width * 0.50
 
-            for node in ui_nodes:
-                text = node.get('text', '').strip()
-                if text != category_name:
-                    continue
-
-                bounds = node.get('bounds')
-                if not bounds:
-                    continue
-
-                center_x = bounds['center_x']
+            for node in self._ui_index(ui_nodes).with_text(category_name):
+                center_x = node['bounds']['center_x']
                 if min_x < center_x < max_x:
-                    return bounds['center_y']
+                    return node['bounds']['center_y']
 
             return 0
 
@@ -2166,9 +2475,15 @@ class DeviceWorker:
     def _click_category(self, category_name: str) -> bool:
         """
         点击分类：先尝试完整文本匹配，失败则尝试部分匹配（解决换行分类问题）
+        有分类栏模型时优先按模型定位，点击后校验不一致再回退到逐轮查找
         """
+        if self.sidebar_model_enabled and self.sidebar_model.entry(category_name):
+            if self._click_category_from_model(category_name):
+                return True
+            self.logger.debug(f"按分类栏模型点击'{category_name}'未确认，回退到查找点击")
+
         # 获取屏幕尺寸
-        screen_info = self.automator.device.info
+        screen_info = self._screen_info()
         screen_width = screen_info.get("displayWidth", 1096)
         screen_height = screen_info.get("displayHeight", 2560)
         category_center_x = int(screen_width * 0.10)
@@ -2225,6 +2540,60 @@ class DeviceWorker:
         # 最后一次尝试
         return self.selector.click_by_text(category_name, timeout=3)
     
+    def _click_category_from_model(self, category_name: str) -> bool:
+        """
+        按分类栏模型定位并点击分类：不可见时按模型中的先后顺序决定滚动方向
+
+        Args:
+            category_name: 分类名
+
+        Returns:
+            是否点击成功且选中分类校验通过
+        """
+        screen_width, screen_height = self.automator.get_screen_size()
+        category_center_x = int(screen_width * 0.10)
+        max_x = screen_width * 0.20
+        order = {name: i for i, name in enumerate(self.sidebar_model.categories)}
+        target_index = order[category_name]
+
+        for _ in range(4):
+            ui_nodes = self.automator.parse_hierarchy(self.automator.get_page_source())
+            if not ui_nodes:
+                return False
+            index = self._ui_index(ui_nodes)
+
+            target = next(
+                (n for n in index.with_text(category_name) if n['bounds']['center_x'] < max_x),
+                None
+            )
+            if target:
+                self.automator.device.click(target['bounds']['center_x'], target['bounds']['center_y'])
+                time.sleep(0.5)
+                # 校验：选中分类与目标不一致时交给调用方回退
+                check_nodes = self.automator.parse_hierarchy(self.automator.get_page_source())
+                selected = self._detect_selected_category_from_nodes(check_nodes) if check_nodes else ""
+                if selected and selected != category_name:
+                    self.logger.debug(f"点击后选中分类为'{selected}'，与目标'{category_name}'不一致")
+                    return False
+                return True
+
+            # 不可见：根据当前可见分类在模型中的位置决定滚动方向
+            visible = [
+                order[n['text'].strip()]
+                for n in index.region(max_x=max_x)
+                if n.get('text', '').strip() in order
+            ]
+            if not visible:
+                return False
+            if target_index > max(visible):
+                start_y, end_y = int(screen_height * 0.70), int(screen_height * 0.40)
+            else:
+                start_y, end_y = int(screen_height * 0.40), int(screen_height * 0.70)
+            self.automator.device.swipe(category_center_x, start_y, category_center_x, end_y, duration=0.3)
+            time.sleep(0.5)
+
+        return False
+
     def _get_category_list(self, scroll_rounds: int = 5) -> List[str]:
         """
         获取左侧分类列表
@@ -2239,7 +2608,7 @@ class DeviceWorker:
             import re
 
             # 获取屏幕尺寸
-            screen_info = self.automator.device.info
+            screen_info = self._screen_info()
             screen_width = screen_info.get("displayWidth", 1096)
             screen_height = screen_info.get("displayHeight", 2560)
 
@@ -2258,16 +2627,28 @@ class DeviceWorker:
                 '入会领5元券', '¥20起送'
             }
 
+            # 分类栏模型命中：列表顶部与模型一致时直接使用模型，无需滚动扫描
+            if scroll_rounds > 0 and self.sidebar_model_enabled and self.sidebar_model.loaded:
+                visible = self._get_visible_categories(max_x, min_y, max_y, blacklist)
+                if visible and visible == self.sidebar_model.first_page():
+                    all_categories = self.sidebar_model.categories
+                    self.logger.info(f"分类栏与模型一致，跳过滚动扫描: 共 {len(all_categories)} 个分类")
+                    return all_categories
+                self.logger.info("分类栏与模型不一致，重新扫描")
+
             # 滚动获取所有分类
             scroll_count = 0
+            pages = []
             # 如果 scroll_rounds 为 0，则 range(1) 只执行一次不滚动
             loop_count = scroll_rounds + 1 if scroll_rounds > 0 else 1
 
             for scroll_round in range(loop_count):
                 # 获取当前可见的分类
-                round_categories = self._get_visible_categories(
-                    max_x, min_y, max_y, blacklist
+                round_items = self._get_visible_categories(
+                    max_x, min_y, max_y, blacklist, with_positions=True
                 )
+                pages.append(round_items)
+                round_categories = [name for name, _ in round_items]
 
                 # 记录新发现的分类
                 new_count = 0
@@ -2311,6 +2692,11 @@ class DeviceWorker:
                     )
                     time.sleep(0.5)
 
+            # 完整扫描结果写入分类栏模型
+            if scroll_rounds > 0 and all_categories and self.sidebar_model_enabled and self.sidebar_model.shop_name:
+                self.sidebar_model.record_scan(pages)
+                self.sidebar_model.save()
+
             self.logger.info(f"共获取到 {len(all_categories)} 个分类")
             return all_categories
 
@@ -2318,53 +2704,41 @@ class DeviceWorker:
             self.logger.warning(f"获取分类列表失败: {e}")
             return []
     
-    def _get_visible_categories(self, max_x: float, min_y: float, max_y: float, blacklist: set) -> List[str]:
-        """获取当前可见的分类列表，合并换行文本"""
-        elements = self.automator.device(className="android.widget.TextView")
-        
-        if not elements.exists(timeout=2):
+    def _get_visible_categories(self, max_x: float, min_y: float, max_y: float, blacklist: set, with_positions: bool = False) -> list:
+        """
+        获取当前可见的分类列表，合并换行文本（一次dump，只遍历左侧区域的节点）
+
+        Args:
+            with_positions: 为 True 时返回 [(分类名, 中心Y), ...]
+        """
+        ui_nodes = self.automator.parse_hierarchy(self.automator.get_page_source())
+        if not ui_nodes:
             return []
         
         # 收集左侧区域的文本及其坐标
         text_items = []
         
-        for i in range(elements.count):
-            try:
-                elem = elements[i]
-                text = elem.get_text()
-                
-                if not text or not text.strip():
-                    continue
-                
-                text = text.strip()
-                
-                # 跳过黑名单
-                if text in blacklist:
-                    continue
-                
-                # 获取坐标
-                bounds = elem.info.get('bounds')
-                if not bounds:
-                    continue
-                
-                center_x = (bounds['left'] + bounds['right']) // 2
-                center_y = (bounds['top'] + bounds['bottom']) // 2
-                
-                # 只保留左侧分类区域的元素
-                if center_x < max_x and min_y < center_y < max_y:
-                    text_items.append({
-                        'text': text,
-                        'x': center_x,
-                        'y': center_y,
-                        'top': bounds['top'],
-                        'bottom': bounds['bottom']
-                    })
-                    
-            except:
+        # 只保留左侧分类区域的元素（结果已按Y排序）
+        for node in self._ui_index(ui_nodes).region(max_x=max_x, min_y=min_y, max_y=max_y, strict=True):
+            if 'TextView' not in node.get('className', ''):
                 continue
-        
-        # 按Y坐标排序
-        text_items.sort(key=lambda x: x['y'])
+            
+            text = node.get('text', '').strip()
+            if not text:
+                continue
+            
+            # 跳过黑名单
+            if text in blacklist:
+                continue
+            
+            bounds = node['bounds']
+            text_items.append({
+                'text': text,
+                'x': bounds['center_x'],
+                'y': bounds['center_y'],
+                'top': bounds['top'],
+                'bottom': bounds['bottom']
+            })
         
         # 合并相邻的短文本（处理换行问题）
         # 如果两个文本Y坐标接近（间距 < 50px），且第一个文本很短（< 5字），尝试合并
@@ -2373,6 +2747,7 @@ class DeviceWorker:
         while i < len(text_items):
             item = text_items[i]
             merged_text = item['text']
+            first_y = item['y']
             
             # 检查是否需要与下一个合并
             while i + 1 < len(text_items):
@@ -2389,31 +2764,31 @@ class DeviceWorker:
             
             # 过滤掉太短的（单字）
             if len(merged_text) >= 2:
-                categories.append(merged_text)
+                categories.append((merged_text, first_y))
             
             i += 1
         
-        return categories
+        if with_positions:
+            return categories
+        return [name for name, _ in categories]
     
     def _collect_products_in_category(self, category_name: str):
-        scroll_config = self.config.get("scroll", {})
-        max_scroll = scroll_config.get("max_scroll_times", 30)
-        scroll_pause = scroll_config.get("scroll_pause", 1.0)
-        no_new_threshold = scroll_config.get("no_new_data_threshold", 2)
+        scroll = self._scroll_settings()
         
         no_new_count = 0
         scroll_count = 0
         
-        while scroll_count < max_scroll:
+        while scroll_count < scroll.max_scroll_times:
             if not self._check_control():
                 return
+            scroll = self._scroll_settings()
             
             new_count = self._collect_visible_products(category_name)
             
             if new_count == 0:
                 no_new_count += 1
-                if no_new_count >= no_new_threshold:
-                    self.logger.info(f"分类[{category_name}]采集完成，连续{no_new_threshold}次无新数据")
+                if no_new_count >= scroll.no_new_data_threshold:
+                    self.logger.info(f"分类[{category_name}]采集完成，连续{no_new_count}次无新数据")
                     break
             else:
                 no_new_count = 0
@@ -2422,7 +2797,7 @@ class DeviceWorker:
             scroll_count += 1
             self.state_store.scroll_round = scroll_count
             
-            time.sleep(scroll_pause)
+            time.sleep(scroll.scroll_pause)
         
         self.logger.info(f"分类[{category_name}]采集结束: 滑动{scroll_count}次, 本分类采集{self.collected_count}条")
     
@@ -2447,7 +2822,7 @@ class DeviceWorker:
         """
         try:
             # 获取屏幕尺寸，用于区分左侧导航栏和右侧商品区域
-            screen_info = self.automator.device.info
+            screen_info = self._screen_info()
             screen_width = screen_info.get("displayWidth", 1096)
             screen_height = screen_info.get("displayHeight", 2560)
 
@@ -2460,18 +2835,10 @@ class DeviceWorker:
 
             category_titles = []
 
-            for node in ui_nodes:
-                text = node.get('text', '').strip()
-                if not text:
-                    continue
-
-                # 检查是否为分类标题
-                if text not in category_set:
-                    continue
-
-                bounds = node.get('bounds')
-                if not bounds:
-                    continue
+            # 只查找文本为已知分类名的节点
+            for node in self._ui_index(ui_nodes).with_texts(category_set):
+                text = node['text'].strip()
+                bounds = node['bounds']
 
                 center_x = bounds['center_x']
                 center_y = bounds['center_y']
@@ -2500,80 +2867,52 @@ class DeviceWorker:
             self.logger.warning(f"检测分类标题失败: {e}")
             return []
 
-    def _build_category_zones(self, category_titles: list, screen_height: int) -> list:
+    def _zone_table(self, ui_nodes: list, current_category: str, boundary_y: int = 0, next_category: str = "") -> CategoryZoneTable:
         """
-        根据分类标题构建分类区间表
+        获取本帧的分类区间表（结构化采集、降级采集、分类证据共用；同一快照只检测一次分类标题）
 
         Args:
-            category_titles: 分类标题列表 [{"name": "儿童用药", "y": 300}, ...]
-            screen_height: 屏幕高度
-
-        Returns:
-            [
-                {"name": "儿童用药", "y_start": 0, "y_end": 1200},
-                {"name": "肿瘤用药", "y_start": 1200, "y_end": 2560}
-            ]
-        """
-        if not category_titles:
-            return []
-
-        zones = []
-
-        for i, title in enumerate(category_titles):
-            y_start = 0 if i == 0 else category_titles[i - 1]['y']
-            y_end = category_titles[i + 1]['y'] if i + 1 < len(category_titles) else screen_height
-
-            # 使用当前标题的Y坐标作为起始点（标题下方才是该分类的商品）
-            # 区间为：当前标题Y坐标 到 下一个标题Y坐标
-            zones.append({
-                "name": title['name'],
-                "y_start": title['y'],
-                "y_end": y_end
-            })
-
-        return zones
-
-    def _find_category_by_y(self, y: int, category_zones: list, fallback_category: str) -> str:
-        """
-        根据Y坐标查找商品所属分类
-
-        Args:
-            y: 商品的Y坐标
-            category_zones: 分类区间表
-            fallback_category: 兜底分类（当没有匹配区间时使用）
+            ui_nodes: 预解析的UI节点列表
+            current_category: 当前分类
+            boundary_y: 分界线Y坐标（0 表示无分界线）
+            next_category: 分界线下方的分类
 
         Returns:
-            分类名称
+            CategoryZoneTable
         """
-        if not category_zones:
-            return fallback_category
-
-        # 查找匹配的区间
-        for zone in category_zones:
-            if zone['y_start'] <= y < zone['y_end']:
-                return zone['name']
-
-        # 如果没有匹配，使用最后一个分类（可能是滚动到底部了）
-        if y >= category_zones[-1]['y_start']:
-            return category_zones[-1]['name']
-
-        # 兜底：使用传入的分类
-        return fallback_category
+        index = self._ui_index(ui_nodes)
+        titles = index.memo.get('zone_titles')
+        if titles is None:
+            category_set = set(self.state_store.state.get("categories", []))
+            titles = self._detect_all_category_titles_on_screen(ui_nodes, category_set)
+            index.memo['zone_titles'] = titles
+
+        return CategoryZoneTable(
+            titles,
+            current_category,
+            self._screen_info().get("displayHeight", 2560),
+            boundary_y=boundary_y,
+            next_category=next_category
+        )
 
-    def _collect_products_by_structure(self, category_name: str, mode: str = "NORMAL", boundary_y: int = 0, next_category: str = "") -> tuple:
+    def _collect_products_by_structure(self, category_name: str, mode: str = "NORMAL", boundary_y: int = 0, next_category: str = "", incremental: bool = False) -> tuple:
         """
         【重构核心】基于XML树形结构的商品采集
         不再依赖坐标推断，而是通过父子节点关系定位商品卡片
+        incremental 为 True 时在本次获取的快照上与上一帧对齐，只提取新滚入屏幕的卡片；
+        本帧跳过的卡片（无法归类、找不到容器）之后的部分不记为已处理，下一帧会重新提取
         """
         import xml.etree.ElementTree as ET
         import re
 
         current_new_count = 0
         next_new_count = 0
+        min_price_y = 0
+        first_skipped_y = None
 
         try:
-            # 1. 获取完整XML树
-            xml_content = self.automator.get_page_source()
+            # 1. 获取完整XML树（向上查找卡片容器依赖层级结构，不使用精简层级）
+            xml_content = self.automator.get_page_source(full_tree=True)
             if not xml_content:
                 return (0, 0)
 
@@ -2586,23 +2925,20 @@ class DeviceWorker:
 
             root = ET.fromstring(xml_content)
 
-            # === 恢复智能区间检测逻辑 ===
-            # 1. 解析扁平化节点用于标题检测
+            # === 智能区间：本帧的分类标题区间表（无标题时退回分界线规则） ===
             ui_nodes = self.automator.parse_hierarchy(xml_content)
-            category_set = set(self.state_store.state.get("categories", []))
-
-            # 2. 检测屏幕上的分类标题
-            category_titles = self._detect_all_category_titles_on_screen(ui_nodes, category_set)
-
-            # 3. 构建Y坐标区间
-            screen_height = self.automator.device.info.get("displayHeight", 2560)
-            category_zones = self._build_category_zones(category_titles, screen_height)
-
-            if category_zones:
-                zones_str = [f"{z['name']}({z['y_start']}-{z['y_end']})" for z in category_zones]
-                self.logger.debug(f"智能分区生效: {zones_str}")
+            zone_table = self._zone_table(
+                ui_nodes, category_name,
+                boundary_y if mode == "BOUNDARY" else 0, next_category
+            )
+            if zone_table.zoned:
+                self.logger.debug(f"智能分区生效: {zone_table.describe()}")
             # ============================
 
+            # 增量提取截止位置：与采集使用同一份快照计算
+            if incremental:
+                min_price_y = self._overlap_cutoff(ui_nodes)
+
             # 2. 找到所有价格节点作为锚点
             price_nodes = []
 
@@ -2632,7 +2968,7 @@ class DeviceWorker:
             processed_keys = set()
 
             # 获取屏幕宽高用于过滤
-            screen_width = self.automator.device.info.get("displayWidth", 1096)
+            screen_width = self._screen_info().get("displayWidth", 1096)
             min_x = screen_width * 0.20 # 排除左侧分类栏
 
             for p_node in price_nodes:
@@ -2644,6 +2980,10 @@ class DeviceWorker:
                 if bounds and bounds['center_x'] < min_x:
                     continue
 
+                # 增量提取：跳过与上一帧重叠的卡片
+                if price_y <= min_price_y:
+                    continue
+
                 ancestors = p_node['ancestors']
                 # 从直接父节点开始向上查找，最多找4层（通常卡片在父2或父3）
                 # 倒序遍历祖先: -2是父节点, -3是爷爷...
@@ -2687,32 +3027,22 @@ class DeviceWorker:
                         if t == p_node['text']:
                             continue
 
+                        # 文本规范化（按原始文本缓存，相邻帧重复的文本不再跑正则）
+                        info = text_norm.normalize_text(t)
+
                         # 查找销量 (只采集"月售"，严格排除"已售")
-                        if '月售' in t:
-                            m = re.search(r'月售\s*(\d+)', t)
-                            if m:
-                                sales_found = m.group(1)
+                        if info.kind == text_norm.SALES:
+                            sales_found = str(info.sales)
 
                         # 查找潜在商品名
                         # 1. 必须在价格上方
                         if item['y'] >= price_y:
                             continue
 
-                        # 2. 查找潜在商品名
-                        # 放宽条件：只要包含 [ 或 【 即可，允许前面有标签（如 "健康年 [健安适]..."）
-                        # 并且不能是 "优惠仅剩" 等明显非标题的文本
-                        if ('[' in t or '【' in t) and len(t) > 5:
-                            # 排除特定的营销文案
-                            if any(x in t for x in ["优惠仅剩", "已优惠", "券后", "起送", "配送费"]):
-                                continue
-
-                            # 如果 [ 不在开头，确保它在前面不远处 (比如前10个字符内)
-                            # 避免匹配到 "... [标签] ..." 这种描述性文本
-                            idx = t.find('[') if '[' in t else t.find('【')
-                            if idx > 10:
-                                continue
-
-                            candidates.append(item)
+                        # 2. 商品标题：包含 [ 或 【 且靠近开头（允许 "健康年 [健安适]..." 这类前缀），
+                        # 不能是 "优惠仅剩" 等营销文案
+                        if info.valid:
+                            candidates.append({'text': info.name, 'y': item['y']})
 
                     if candidates:
                         # 找到了！这个 parent 就是卡片容器
@@ -2725,36 +3055,21 @@ class DeviceWorker:
 
                 if not card_found:
                     self.logger.debug(f"⚠️ 价格 {price_text} (Y={price_y}) 未找到对应的商品名容器，跳过")
+                    if first_skipped_y is None or price_y < first_skipped_y:
+                        first_skipped_y = price_y
                     continue
 
-                # === 找到了一组有效数据 ===
-                # 清理商品名
-                best_name = self._clean_product_name(best_name)
-
-                # === 确定归属分类 (优先级：智能区间 > 边界模式 > 默认) ===
-                target_category = category_name
+                # === 找到了一组有效数据（商品名已清理） ===
 
-                if category_zones:
-                    # 优先使用智能区间判断
-                    target_category = self._find_category_by_y(price_y, category_zones, category_name)
-                elif mode == "BOUNDARY" and boundary_y > 0:
-                    # 回退到边界模式
-                    if price_y < boundary_y:
-                        target_category = category_name
-                    else:
-                        target_category = next_category
-                        # 如果是边界模式且位于分界线下方，但不知道下一分类名
-                        # 必须跳过，防止归类到当前分类（Category Drift）
-                        if not target_category:
-                            self.logger.debug(f"⚠️ 价格 {price_text} (Y={price_y}) 位于边界线(Y={boundary_y})下方且无下一分类名，跳过")
-                            continue
-
-                # 前排保护逻辑 (Top 35% 且没有被划分为下一页)
-                # 如果智能区间已经判定了，就不需要这个保护了，或者作为辅助
-                if not category_zones:
-                    screen_height = self.automator.device.info.get("displayHeight", 2560)
-                    if price_y < screen_height * 0.35 and target_category != category_name:
-                         target_category = category_name
+                # === 确定归属分类 (优先级：智能区间 > 边界模式(含顶部保护) > 默认) ===
+                target_category, confidence = zone_table.lookup(price_y)
+                if target_category is None:
+                    # 位于分界线下方但不知道下一分类名，必须跳过，防止归类到当前分类（Category Drift）
+                    self.logger.debug(f"⚠️ 价格 {price_text} (Y={price_y}) 位于边界线(Y={boundary_y})下方且无下一分类名，跳过")
+                    if first_skipped_y is None or price_y < first_skipped_y:
+                        first_skipped_y = price_y
+                    continue
+                deferred = confidence < self.zone_min_confidence
 
                 # 生成唯一键去重
                 shop_name = self.state_store.state.get("current_shop_name", "")
@@ -2764,7 +3079,7 @@ class DeviceWorker:
                     continue
                 processed_keys.add(key)
 
-                if self.state_store.is_collected(key):
+                if self.state_store.is_collected(key) or key in self.record_stage:
                     continue
 
                 # 保存
@@ -2775,21 +3090,37 @@ class DeviceWorker:
                     price=price_text
                 )
 
-                self.exporter.add_record(record)
-                self.state_store.add_collected(key)
+                # 判定不可靠时不计票，分类交给后续帧的证据
+                self.record_stage.add(record, key, weight=0 if deferred else 1)
                 self.collected_count += 1
+                self.events.emit(
+                    "item",
+                    key=key,
+                    category=target_category,
+                    mode=mode,
+                    price=record.price,
+                    sales=record.monthly_sales,
+                    confidence=confidence
+                )
 
                 if target_category == category_name:
                     current_new_count += 1
                 else:
                     next_new_count += 1
 
-                self.logger.info(f"结构化采集[{target_category}]: {best_name} | ¥{price_text} | 月销{monthly_sales}")
+                self.logger.info(
+                    f"结构化采集[{target_category}{'?' if deferred else ''}]: {best_name} | ¥{price_text} | 月销{monthly_sales}"
+                )
 
         except Exception as e:
             self.logger.error(f"结构化采集出错: {e}")
             import traceback
             self.logger.error(traceback.format_exc())
+            # 本帧未完整处理，下一帧全部重新提取
+            first_skipped_y = 0
+
+        if incremental and first_skipped_y is not None:
+            self.frame_overlap.truncate(first_skipped_y)
 
         if current_new_count + next_new_count > 0:
             self.state_store.save()
@@ -2818,8 +3149,14 @@ class DeviceWorker:
     def _find_last_product_above_boundary(self, ui_nodes: list, boundary_y: int) -> str:
         """
         找到分界线上方最近的一个商品名（锚点商品）
+        优先使用同一快照的卡片扫描结果，布局无法识别时才重新获取XML树
         """
         try:
+            cards = self._scan_product_cards(ui_nodes)
+            if cards is not None:
+                above = [c for c in cards if c[3] < boundary_y]
+                return above[-1][0] if above else ""
+
             # 复用 _collect_products_by_structure 的部分逻辑
             # 但这里我们只需要找到 Y < boundary_y 且 Y 最大的那个商品
 
@@ -2840,7 +3177,7 @@ class DeviceWorker:
             # 但 ui_nodes 不包含层级关系。
             # 必须重新获取 XML 进行精准定位（为了准确性，值得牺牲一点性能）
 
-            xml_content = self.automator.get_page_source()
+            xml_content = self.automator.get_page_source(full_tree=True)
             if not xml_content:
                 return ""
 
@@ -2924,7 +3261,8 @@ class DeviceWorker:
 
     def _perform_retroactive_correction(self, anchor_name: str, current_category: str, next_category: str) -> int:
         """
-        回溯修正：检查最近采集的记录，如果包含锚点商品，则将锚点之后的所有商品归类到 next_category
+        回溯修正：在暂存区的待确认窗口中查找锚点商品，将锚点之后的商品归类到 next_category
+        遇到第三方分类（既不是A也不是B，说明已进入C）时停止；窗口外的记录已提交，不再修改
 
         Args:
             anchor_name: 锚点商品名（当前分类的最后一个商品）
@@ -2935,55 +3273,61 @@ class DeviceWorker:
             修正的记录数量
         """
         try:
-            records = self.exporter.records
-            if not records:
-                return 0
-
-            # 往前查8个
-            search_limit = 8
-            start_idx = max(0, len(records) - search_limit)
+            found, changes = self.record_stage.correct(anchor_name, current_category, next_category)
 
-            found_idx = -1
-            # 倒序查找锚点
-            for i in range(len(records) - 1, start_idx - 1, -1):
-                if records[i].drug_name == anchor_name:
-                    found_idx = i
-                    break
+            if not found:
+                self.logger.debug(f"⚠️ [回溯修正] 待确认的 {len(self.record_stage)} 条记录中未找到锚点: {anchor_name}")
+                return 0
 
-            if found_idx != -1:
-                self.logger.info(f"🔄 [回溯修正] 在缓存中找到锚点: {anchor_name} (Index={found_idx})")
+            self.logger.info(f"🔄 [回溯修正] 在暂存区找到锚点: {anchor_name}")
+            for drug_name, old_cat in changes:
+                self.logger.info(f"    -> 修正: {drug_name} | {old_cat} => {next_category}")
+
+            if changes:
+                self.logger.info(f"✅ 回溯修正完成: 修正了 {len(changes)} 条记录")
+                self.events.emit(
+                    "correction",
+                    anchor=anchor_name,
+                    from_category=current_category,
+                    to_category=next_category,
+                    fixed=len(changes)
+                )
+            return len(changes)
 
-                fix_count = 0
-                # 从 found_idx + 1 开始，尝试重置为 next_category
-                # 关键逻辑：一旦遇到不属于 current_category 且也不属于 next_category 的商品（说明是Category C），立即停止
+        except Exception as e:
+            self.logger.error(f"回溯修正异常: {e}")
+            return 0
 
-                for j in range(found_idx + 1, len(records)):
-                    record = records[j]
-                    old_cat = record.category_name
+    def _stage_frame_evidence(self, ui_nodes: list, current_category: str, boundary_y: int = 0, next_category: str = ""):
+        """
+        开始暂存区的新一帧，并为本帧中仍在待确认窗口内的商品记录分类证据
+        判定规则与结构化采集一致（共用区间表），置信度不足的证据不计票
 
-                    # 安全检查：如果该记录的分类已经是"其它分类"（既不是A也不是B），说明已经进入了C，不能覆盖
-                    # 注意：如果是"A"或"B"或"未知"，我们都可以修正为B。
-                    # 但如果之前已经被修正为C，或者本身采集时就是C，则必须停止。
-                    if old_cat != current_category and old_cat != next_category and old_cat != "未知分类":
-                        self.logger.info(f"🛑 [回溯修正] 遇到第三方分类 '{old_cat}' (商品: {record.drug_name})，停止后续修正")
-                        break
+        Args:
+            ui_nodes: 预解析的UI节点列表
+            current_category: 当前分类
+            boundary_y: 分界线Y坐标（0 表示本帧无边界）
+            next_category: 分界线下方的分类
+        """
+        self.record_stage.begin_frame()
+        if not len(self.record_stage):
+            return
 
-                    # 执行修正
-                    if old_cat != next_category:
-                        record.category_name = next_category
-                        fix_count += 1
-                        self.logger.info(f"    -> 修正: {record.drug_name} | {old_cat} => {next_category}")
+        try:
+            cards = self._scan_product_cards(ui_nodes)
+            if not cards:
+                return
 
-                if fix_count > 0:
-                    self.logger.info(f"✅ 回溯修正完成: 修正了 {fix_count} 条记录")
-                    return fix_count
-            else:
-                self.logger.debug(f"⚠️ [回溯修正] 最近 {search_limit} 条记录中未找到锚点: {anchor_name}")
-                return 0
+            zone_table = self._zone_table(ui_nodes, current_category, boundary_y, next_category)
+            shop_name = self.state_store.state.get("current_shop_name", "")
+            for name, price, _, price_y in cards:
+                category, confidence = zone_table.lookup(price_y)
+                if category and confidence >= self.zone_min_confidence:
+                    key = self.state_store.generate_key(shop_name, category, name, price)
+                    self.record_stage.vote(key, category)
 
         except Exception as e:
-            self.logger.error(f"回溯修正异常: {e}")
-            return 0
+            self.logger.debug(f"记录分类证据失败: {e}")
 
     def _collect_visible_products_with_boundary(
         self,
@@ -2991,7 +3335,8 @@ class DeviceWorker:
         ui_nodes: list,
         mode: str = "NORMAL",
         divider_y: int = None,
-        next_category: str = None
+        next_category: str = None,
+        incremental: bool = False
     ) -> tuple:
         """
         采集当前可见区域的商品（支持边界模式）
@@ -3000,9 +3345,210 @@ class DeviceWorker:
         # 兼容性处理
         dy = divider_y if divider_y is not None else 0
         nc = next_category if next_category is not None else ""
-        return self._collect_products_by_structure(current_category, mode, dy, nc)
+        return self._collect_products_by_structure(current_category, mode, dy, nc, incremental)
 
-    def _collect_visible_products(self, category_name: str, ui_nodes: list = None) -> int:
+    def _scan_product_cards(self, ui_nodes: list) -> Optional[list]:
+        """
+        从扁平节点中快速扫描商品卡片（不解析XML树）
+        
+        Args:
+            ui_nodes: 预解析的UI节点列表
+            
+        Returns:
+            从上到下的完整卡片 [(商品名, 价格, 月销, 价格Y坐标), ...]（底部只露出标题的卡片不计入）；
+            中间卡片缺少价格（布局无法识别）时返回 None；同一快照只扫描一次。
+            有卡片含多个价格（促销价 + 原价）时 index.memo['multi_price'] 为 True，
+            此时按Y配对的价格不一定与结构化采集一致
+        """
+        from bisect import bisect_right
+        
+        index = self._ui_index(ui_nodes)
+        if 'cards' in index.memo:
+            return index.memo['cards']
+        
+        screen_width = self._screen_info().get("displayWidth", 1096)
+        min_x = screen_width * 0.20
+        
+        # 1. 按Y坐标收集商品名、价格、月销节点（筛选结果已按Y排序）
+        names, prices, sales = [], [], []
+        for node in index.region(min_x=min_x):
+            text = node.get('text', '').strip()
+            if not text:
+                continue
+            y = node['bounds']['center_y']
+            
+            info = text_norm.normalize_text(text)
+            if info.kind == text_norm.PRICE:
+                prices.append((y, info.price))
+            elif info.kind == text_norm.SALES:
+                sales.append((y, str(info.sales)))
+            elif info.kind == text_norm.NAME:
+                names.append((y, info.name))
+        
+        # 2. 每个商品名与其下方、下一个商品名之前的价格/月销配对
+        price_ys = [y for y, _ in prices]
+        sales_ys = [y for y, _ in sales]
+        cards = []
+        multi_price = False
+        for i, (name_y, name) in enumerate(names):
+            next_y = names[i + 1][0] if i + 1 < len(names) else float('inf')
+            p = bisect_right(price_ys, name_y)
+            if p == len(prices) or prices[p][0] >= next_y:
+                # 最后一张卡片可能只露出标题，留给下一帧
+                if i == len(names) - 1:
+                    break
+                cards = None
+                break
+            if p + 1 < len(prices) and prices[p + 1][0] < next_y:
+                multi_price = True
+            q = bisect_right(sales_ys, name_y)
+            monthly_sales = sales[q][1] if q < len(sales) and sales[q][0] < next_y else "0"
+            cards.append((name, prices[p][1], monthly_sales, prices[p][0]))
+        
+        index.memo['cards'] = cards
+        index.memo['multi_price'] = multi_price
+        return cards
+    
+    def _align_frame(self, ui_nodes: list) -> bool:
+        """
+        为下一次滑动规划距离，并返回本帧是否按帧间重叠增量提取
+        （截止位置由采集器在自己获取的快照上计算，见 _overlap_cutoff）
+        
+        Args:
+            ui_nodes: 预解析的UI节点列表
+            
+        Returns:
+            是否增量提取
+        """
+        if self.adaptive_swipe:
+            cards = self._scan_product_cards(ui_nodes)
+            if cards is None:
+                self.swipe_controller.reset()
+            else:
+                screen_height = self._screen_info().get("displayHeight", 2560)
+                positions = [(c[3], c[0]) for c in cards]
+                recover_swipes = self.swipe_controller.recover_swipes
+                if self.swipe_controller.observe(positions, screen_height, int(screen_height * 0.15)):
+                    if recover_swipes:
+                        self.logger.warning(
+                            f"⚠️ 回滑 {recover_swipes} 次后仍未与断档前一帧重叠，继续回滑补采"
+                        )
+                    else:
+                        self.logger.warning(
+                            f"⚠️ 帧间断档: 与上一帧没有重叠卡片，缩短滑动距离并回滑补采 "
+                            f"(增益={self.swipe_controller.gain:.2f})"
+                        )
+                elif recover_swipes and self.swipe_controller.recover_swipes == 0:
+                    self.logger.info(f"回滑 {recover_swipes} 次后已与断档前一帧重叠")
+        return self.overlap_enabled
+    
+    def _overlap_cutoff(self, ui_nodes: list) -> int:
+        """
+        与上一帧对齐，计算增量提取的截止Y坐标
+        
+        Args:
+            ui_nodes: 采集器使用的UI节点列表
+            
+        Returns:
+            截止Y坐标（价格Y坐标不大于该值的卡片上一帧已处理），0 表示全部提取
+        """
+        cards = self._scan_product_cards(ui_nodes)
+        if cards is None:
+            self.frame_overlap.reset()
+            return 0
+        
+        cutoff_y = self.frame_overlap.align([(c[3], c[0]) for c in cards])
+        if cutoff_y:
+            self.logger.debug(
+                f"帧重叠: {self.frame_overlap.last_overlap}/{len(cards)} 张卡片已处理 (截止Y={cutoff_y}), "
+                f"下次滑动距离 {self.swipe_controller.distance:.2f}"
+            )
+        return cutoff_y
+    
+    def _swipe_next_frame(self):
+        """滑动到下一帧（自适应距离；检测到断档时改为向下补滑）"""
+        if not self.adaptive_swipe:
+            self.automator.swipe_up()
+            return
+        
+        if self.swipe_controller.recover_distance > 0:
+            self.automator.swipe_down(distance=self.swipe_controller.recover_distance)
+            self.swipe_controller.on_recover()
+            self.frame_overlap.reset()
+            return
+        
+        self.automator.swipe_up(distance=self.swipe_controller.distance)
+        self.swipe_controller.on_swipe(self._screen_info().get("displayHeight", 2560))
+    
+    def _collect_known_screen(self, category_name: str, ui_nodes: list) -> Optional[int]:
+        """
+        已知屏幕快速采集（店铺缓存命中时使用）
+        只从扁平节点中读取商品名/价格/月销，商品名序列与缓存一致时跳过结构化解析
+        
+        Args:
+            category_name: 当前分类名
+            ui_nodes: 预解析的UI节点列表
+            
+        Returns:
+            新采集数量；不是已知屏幕时返回 None（由调用方走完整解析）
+        """
+        if not self.shop_cache_enabled or not self.shop_cache.loaded:
+            return None
+        
+        cards = self._scan_product_cards(ui_nodes)
+        if not cards:
+            return None
+        
+        # 卡片含多个价格（促销价 + 原价）时按Y配对的价格可能与结构化采集不一致，走完整解析
+        if self._ui_index(ui_nodes).memo.get('multi_price'):
+            return None
+        
+        # 3. 商品名序列必须与缓存中当前分类的序列一致
+        matched = self.shop_cache.match_screen([c[0] for c in cards], category_name)
+        if matched != category_name:
+            return None
+        
+        # 4. 只刷新价格和月销
+        new_count = 0
+        price_changes = 0
+        shop_name = self.state_store.state.get("current_shop_name", "")
+        for name, price, monthly_sales, _ in cards:
+            key = self.state_store.generate_key(shop_name, category_name, name, price)
+            if self.state_store.is_collected(key) or key in self.record_stage:
+                continue
+            
+            record = create_drug_record(
+                category_name=category_name,
+                drug_name=name,
+                monthly_sales=monthly_sales,
+                price=price
+            )
+            cached = self.shop_cache.get_item(category_name, name)
+            # 缓存/本帧均以分比较（无价格均为 None，"0" 与无价格不相等）
+            if cached and text_norm.price_to_cents(cached[1]) != record.price_cents:
+                price_changes += 1
+            
+            self.record_stage.add(record, key)
+            self.collected_count += 1
+            new_count += 1
+            self.events.emit(
+                "item",
+                key=key,
+                category=category_name,
+                mode="CACHED",
+                price=record.price,
+                sales=record.monthly_sales
+            )
+            self.logger.info(f"缓存采集[{category_name}]: {name} | ¥{price} | 月销{monthly_sales}")
+        
+        if self.overlap_enabled:
+            self.frame_overlap.align([(c[3], c[0]) for c in cards])
+        self.logger.debug(f"已知屏幕命中: {len(cards)} 个商品, 新增 {new_count}, 价格变化 {price_changes}")
+        if new_count > 0:
+            self.state_store.save()
+        return new_count
+
+    def _collect_visible_products(self, category_name: str, ui_nodes: list = None, incremental: bool = False) -> int:
         """
         采集当前可见区域的商品（兼容接口）
         策略：以价格元素(¥XX.XX)为锚点定位商品卡片，通过坐标关联查找商品名
@@ -3010,14 +3556,20 @@ class DeviceWorker:
         Args:
             category_name: 当前分类名
             ui_nodes: 预解析的UI节点列表（如果提供则直接使用，否则查询设备）
+            incremental: 是否按帧间重叠增量提取（见 _overlap_cutoff）
         """
         # 向后兼容：调用新函数的NORMAL模式
         if ui_nodes is None:
             self.logger.warning("未传入ui_nodes，_collect_visible_products 性能将受限")
             return 0
 
+        # 已知屏幕：只刷新价格/月销，跳过结构化解析
+        cached_count = self._collect_known_screen(category_name, ui_nodes)
+        if cached_count is not None:
+            return cached_count
+
         new_count, _ = self._collect_visible_products_with_boundary(
-            category_name, ui_nodes, "NORMAL"
+            category_name, ui_nodes, "NORMAL", incremental=incremental
         )
         return new_count
 
@@ -3031,7 +3583,7 @@ class DeviceWorker:
             import re
             
             # 获取屏幕尺寸
-            screen_info = self.automator.device.info
+            screen_info = self._screen_info()
             screen_width = screen_info.get("displayWidth", 1096)
             screen_height = screen_info.get("displayHeight", 2560)
             
@@ -3046,22 +3598,19 @@ class DeviceWorker:
             text_items = []
             
             if ui_nodes is not None:
-                # 使用本地节点
-                for node in ui_nodes:
+                # 使用本地节点（只遍历商品区域，开区间）
+                product_nodes = self._ui_index(ui_nodes).region(
+                    min_x=product_area_min_x, max_x=product_area_max_x,
+                    min_y=product_area_min_y, max_y=product_area_max_y, strict=True
+                )
+                for node in product_nodes:
                     text = node.get('text', '')
                     if not text: continue
                     
-                    bounds = node.get('bounds')
-                    if not bounds: continue
-                    
+                    bounds = node['bounds']
                     center_x = bounds['center_x']
                     center_y = bounds['center_y']
                     
-                    # 区域过滤
-                    if not (product_area_min_x < center_x < product_area_max_x and
-                            product_area_min_y < center_y < product_area_max_y):
-                        continue
-                    
                     # 识别价格
                     if re.match(r"^¥?\d+\.?\d*$", text):
                         price_items.append({
@@ -3096,14 +3645,17 @@ class DeviceWorker:
             
             self.logger.debug(f"找到 {len(price_items)} 个价格元素")
             
+            # 分类区间表（与结构化采集共用）
+            zone_table = self._zone_table(ui_nodes, category_name)
+            
             # === 第三步：全新重构 - 基于结构特征的匹配 ===
             # 策略：商品名([开头) -> 月售(中间) -> 价格(底部)
 
-            # 1. 识别所有可能的商品名（必须以 [ 或 【 开头）
+            # 1. 识别所有可能的商品名（必须以 [ 或 【 开头，且规范化结果为有效商品名）
             product_name_candidates = []
             for item in text_items:
                 text = item['text']
-                if text.startswith('[') or text.startswith('【'):
+                if (text.startswith('[') or text.startswith('【')) and text_norm.normalize_text(text).valid:
                     product_name_candidates.append(item)
 
             # 2. 为每个价格寻找匹配的商品名
@@ -3174,26 +3726,35 @@ class DeviceWorker:
                 # 清理商品名
                 best_name = self._clean_product_name(best_name)
 
-                # === 根据模式确定商品归属分类 ===
+                # === 根据区间表确定商品归属分类 ===
+                target_category, confidence = zone_table.lookup(price_y)
                 
                 # === 去重检查并保存 ===
                 # generate_key 必须包含 shop_name（从 state_store 获取）
                 shop_name = self.state_store.state.get("current_shop_name", "")
-                key = self.state_store.generate_key(shop_name, category_name, best_name, price_text)
+                key = self.state_store.generate_key(shop_name, target_category, best_name, price_text)
                 
-                if self.state_store.is_collected(key):
+                if self.state_store.is_collected(key) or key in self.record_stage:
                     continue
                 
                 # 创建记录
                 record = create_drug_record(
-                    category_name=category_name,
+                    category_name=target_category,
                     drug_name=best_name,
                     monthly_sales=monthly_sales,
                     price=price_text
                 )
                 
-                self.exporter.add_record(record)
-                self.state_store.add_collected(key)
+                self.record_stage.add(record, key, weight=0 if confidence < self.zone_min_confidence else 1)
+                self.events.emit(
+                    "item",
+                    key=key,
+                    category=target_category,
+                    mode="NORMAL",
+                    price=record.price,
+                    sales=record.monthly_sales,
+                    confidence=confidence
+                )
                 
                 self.collected_count += 1
                 new_count += 1
@@ -3210,67 +3771,14 @@ class DeviceWorker:
             self.logger.warning(f"采集可见商品失败: {e}")
             return 0
     
-    def _is_invalid_product_name(self, text: str) -> bool:
-        """检查文本是否是无效的商品名"""
-        import re
-        
-        # 太短
-        if len(text) < 5:
-            return True
-        
-        # 中文字符太少
-        chinese_chars = re.findall(r'[\u4e00-\u9fa5]', text)
-        if len(chinese_chars) < 3:
-            return True
-        
-        # 价格格式
-        if re.match(r'^[¥￥\d.]+$', text):
-            return True
-        
-        # 分类名、标签等
-        invalid_patterns = [
-            r'^推荐$', r'^健康年$', r'^活动$', r'^医保$',
-            r'^咳嗽用药$', r'^五官用药$', r'^儿科用药$', r'^常用药品$',
-            r'^问.*医生$', r'^已优惠', r'^优惠仅剩', r'^\d+人',
-            r'^月售', r'^已售', r'^超\d+人', r'^近期', r'^最近',
-            r'^\d+元\*', r'^满\d+减', r'^减\d+元', r'起送',
-            r'^搜索', r'^约\d+分钟', r'^刚刚有',
-        ]
-        
-        for pattern in invalid_patterns:
-            if re.match(pattern, text):
-                return True
-        
-        return False
-    
     def _clean_product_name(self, name: str) -> str:
         """
-        清理商品名中的前缀乱码和营销标签
+        清理商品名中的前缀乱码和营销标签（见 text_norm.clean_product_name，带缓存）
         例如:
         - TTTTT[力度伸]维生素C... -> [力度伸]维生素C...
         - 健康年 [健安适]... -> [健安适]...
         """
-        import re
-
-        if not name:
-            return name
-
-        # 移除常见的干扰前缀 (根据用户反馈添加 "健康年")
-        prefixes_to_remove = ["健康年"]
-        for prefix in prefixes_to_remove:
-            if prefix in name:
-                name = name.replace(prefix, "").strip()
-
-        # 查找第一个方括号或中文字符的位置
-        # 商品名通常以 [品牌名] 或中文开头
-        match = re.search(r'[\[\u4e00-\u9fa5]', name)
-
-        if match:
-            # 如果找到了 [ 或 【，直接从这里开始截取
-            cleaned = name[match.start():]
-            return cleaned
-
-        return name
+        return text_norm.clean_product_name(name)
     
     def get_status_text(self) -> str:
         return self.status.value
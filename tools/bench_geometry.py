@@ -0,0 +1,143 @@
+"""
+bench_geometry.py - 几何筛选基准测试
+在录制的页面帧（dump 得到的XML）上对比三种实现的耗时，并校验结果一致：
+  scan    - 全量遍历节点、逐节点读取 bounds 字典比较（不建索引的写法，作为结果基准）
+  python  - UiNodeIndex.region 无 numpy 的逐节点路径
+  numpy   - UiNodeIndex.region 向量化掩码
+覆盖分割线检测、侧边栏区域筛选、商品区筛选三类检测器
+
+用法:
+  录制: python tools/bench_geometry.py frames/ --record --serial SERIAL --count 20
+  测试: python tools/bench_geometry.py frames/ [--repeat 200]
+"""
+import os
+import sys
+import glob
+import time
+import logging
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core import ui_index
+from core.automator import DeviceAutomator
+from core.ui_index import UiNodeIndex
+
+
+def record_frames(out_dir: str, serial: str, count: int, pause: float = 1.0):
+    """在当前页面边滑动边录制 count 帧XML（原样 dump，不过滤属性）"""
+    os.makedirs(out_dir, exist_ok=True)
+    automator = DeviceAutomator(serial, logging.getLogger("bench"), {"dump": {"mode": "full"}})
+    if not automator.connect():
+        print("设备连接失败")
+        return
+    for i in range(count):
+        path = os.path.join(out_dir, f"frame_{i:03d}.xml")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(automator.get_page_source())
+        print(f"已录制 {path} ({automator.last_xml_bytes} 字节)")
+        automator.swipe_up()
+        time.sleep(pause)
+
+
+def scan_detectors(nodes: list, w: int, h: int):
+    """不建索引的写法：全量遍历后逐节点比较，再按Y排序"""
+    located = sorted((n for n in nodes if n.get('bounds')), key=lambda n: n['bounds']['center_y'])
+
+    dividers = []
+    for node in located:
+        b = node['bounds']
+        if b['height'] <= 5 and b['width'] >= w * 0.50 and b['left'] > w * 0.20 and w * 0.15 < b['center_y'] < h * 0.85:
+            dividers.append(b['center_y'])
+
+    sidebar = []
+    for node in located:
+        b = node['bounds']
+        if b['center_x'] < w * 0.20 and h * 0.15 < b['center_y'] < h * 0.90:
+            sidebar.append(b['center_y'])
+
+    products = [node['bounds']['center_y'] for node in located if node['bounds']['center_x'] >= w * 0.20]
+    return dividers, sidebar, products
+
+
+def index_detectors(index: UiNodeIndex, w: int, h: int):
+    """区域查询写法（与 worker 中的检测器一致）"""
+    dividers = [
+        n['bounds']['center_y'] for n in index.region(
+            min_left=w * 0.20, min_y=w * 0.15, max_y=h * 0.85, strict=True, min_width=w * 0.50, max_height=5
+        )
+    ]
+    sidebar = [n['bounds']['center_y'] for n in index.region(max_x=w * 0.20, min_y=h * 0.15, max_y=h * 0.90, strict=True)]
+    products = [n['bounds']['center_y'] for n in index.region(min_x=w * 0.20)]
+    return dividers, sidebar, products
+
+
+def bench(frames_dir: str, repeat: int):
+    files = sorted(glob.glob(os.path.join(frames_dir, "*.xml")))
+    if not files:
+        print(f"未找到录制帧: {frames_dir}")
+        return
+
+    automator = DeviceAutomator("bench", logging.getLogger("bench"), {})
+    frames = []
+    for path in files:
+        with open(path, 'r', encoding='utf-8') as f:
+            nodes = automator.parse_hierarchy(f.read())
+        root = max((n['bounds'] for n in nodes if n.get('bounds')), key=lambda b: b['width'] * b['height'])
+        frames.append((nodes, root['right'], root['bottom']))
+    print(f"{len(frames)} 帧, 平均 {sum(len(n) for n, _, _ in frames) // len(frames)} 个节点")
+
+    def run(name, use_numpy=None):
+        """每帧新建索引（建立索引和列存的开销计入"建立"），再运行检测器；use_numpy 为 None 时不建索引"""
+        build_time = query_time = 0.0
+        results = []
+        for _ in range(repeat):
+            results = []
+            for nodes, w, h in frames:
+                if use_numpy is None:
+                    start_time = time.perf_counter()
+                    results.append(scan_detectors(nodes, w, h))
+                    query_time += time.perf_counter() - start_time
+                    continue
+
+                start_time = time.perf_counter()
+                index = UiNodeIndex(nodes)
+                index.use_numpy = use_numpy
+                if use_numpy:
+                    index._columns()
+                build_time += time.perf_counter() - start_time
+
+                start_time = time.perf_counter()
+                results.append(index_detectors(index, w, h))
+                query_time += time.perf_counter() - start_time
+        count = repeat * len(frames)
+        print(f"{name:7s}: 建立 {build_time / count * 1e6:8.1f} us/帧, 检测 {query_time / count * 1e6:8.1f} us/帧", end="")
+        return results
+
+    baseline = run("scan")
+    print()
+
+    result = run("python", use_numpy=False)
+    print(f"  结果{'一致' if result == baseline else '不一致'}")
+
+    if ui_index.HAS_NUMPY:
+        result = run("numpy", use_numpy=True)
+        print(f"  结果{'一致' if result == baseline else '不一致'}")
+    else:
+        print("numpy  : 未安装，跳过")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="几何筛选基准测试")
+    parser.add_argument("frames_dir", help="录制帧目录（*.xml）")
+    parser.add_argument("--repeat", type=int, default=200, help="重复次数")
+    parser.add_argument("--record", action="store_true", help="从设备录制帧到 frames_dir")
+    parser.add_argument("--serial", default=None, help="录制用设备序列号")
+    parser.add_argument("--count", type=int, default=20, help="录制帧数")
+    args = parser.parse_args()
+
+    if args.record:
+        if not args.serial:
+            parser.error("录制需要指定 --serial")
+        record_frames(args.frames_dir, args.serial, args.count)
+    else:
+        bench(args.frames_dir, args.repeat)
@@ -1,7 +1,12 @@
 import os
+import sys
+import argparse
 import pandas as pd
 import glob
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.dataset import ResultDataset
+
 # === 金标准数据 (Golden Data) ===
 # 来源于用户提供的三张截图
 GOLDEN_DATA = [
@@ -41,29 +46,50 @@ def find_latest_result_file():
         return None
     return max(files, key=os.path.getmtime)
 
-def verify():
+def load_latest_data(device=None, shop=None, date=None):
+    # 优先读取汇总数据集（可按设备/店铺过滤，默认所有设备、所有店铺），没有时回退到最新的 xlsx
+    # 未指定日期时每台设备读取其最近一轮任务的分区（分区日期为任务开始日期，跨天的任务也在同一分区）
+    dataset = ResultDataset("output")
+    if date:
+        latest = {part_device: date for part_date, part_device, _ in dataset.partitions(date, device)}
+    else:
+        latest = dataset.latest_dates(device)
+    if latest:
+        runs = ", ".join(f"{part_device}@{part_date}" for part_device, part_date in sorted(latest.items()))
+        print(f"正在验证汇总数据集: {dataset.root} ({runs}, shop={shop or '全部'})")
+        return pd.concat(
+            [dataset.to_dataframe(date=part_date, device=part_device, shop=shop) for part_device, part_date in latest.items()],
+            ignore_index=True
+        )
+
     file_path = find_latest_result_file()
     if not file_path:
         print("FAILED: 未找到结果文件")
-        return
+        return None
 
     print(f"正在验证文件: {file_path}")
     try:
-        df = pd.read_excel(file_path)
+        return pd.read_excel(file_path)
     except Exception as e:
         print(f"FAILED: 读取Excel失败: {e}")
+        return None
+
+def verify(device=None, shop=None, date=None):
+    df = load_latest_data(device, shop, date)
+    if df is None:
         return
 
     print(f"数据总行数: {len(df)}")
 
-    # 检查是否有重复
+    # 检查是否有重复：同一设备、同一店铺、同一分类下的同名商品（不同店铺/设备各自采集到同一药品不算重复）
     if '商品名字' in df.columns:
-        duplicates = df[df.duplicated(subset=['商品名字'], keep=False)]
+        subset = [c for c in ['device', '店铺名字', '商品分类', '商品名字'] if c in df.columns]
+        duplicates = df[df.duplicated(subset=subset, keep=False)]
         if not duplicates.empty:
-            print(f"FAILED: 发现 {len(duplicates)} 条重复数据 (按商品名):")
-            print(duplicates[['商品分类', '商品名字']].head())
+            print(f"FAILED: 发现 {len(duplicates)} 条重复数据 (按{'+'.join(subset)}):")
+            print(duplicates[subset].head())
         else:
-            print("PASS: 重复性检查通过 (无重复商品名)")
+            print("PASS: 重复性检查通过 (无重复商品)")
 
     print("\n开始【金标准】逐项核对:")
     print("-" * 60)
@@ -117,4 +143,9 @@ def verify():
         print("存在不一致，请检查上述错误。")
 
 if __name__ == "__main__":
-    verify()
+    parser = argparse.ArgumentParser(description="金标准数据核对")
+    parser.add_argument("--device", default=None, help="只核对该设备的数据（汇总数据集）")
+    parser.add_argument("--shop", default=None, help="只核对该店铺的数据（汇总数据集）")
+    parser.add_argument("--date", default=None, help="只核对该任务日期的分区（默认每台设备最近一轮任务）")
+    args = parser.parse_args()
+    verify(args.device, args.shop, args.date)
@@ -4,31 +4,38 @@ main_window.py - PySide6 主界面
 """
 import os
 import sys
-import json
+import threading
 from typing import Dict, Optional
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QTableWidget, QTableWidgetItem,
-    QTextEdit, QFileDialog, QHeaderView, QSplitter,
+    QPlainTextEdit, QFileDialog, QHeaderView, QSplitter,
     QGroupBox, QProgressBar, QMessageBox, QFrame
 )
 from PySide6.QtCore import Qt, Signal, QObject, Slot, QTimer
 from PySide6.QtGui import QColor, QFont
 
 from core.device_manager import DeviceManager, DeviceInfo, DeviceStatus
+from core.connection_pool import get_connection_pool
+from core.config import get_config
 from core.worker import DeviceWorker, WorkerStatus
+from ui.update_bridge import UiUpdateBridge
 
 
 class WorkerSignals(QObject):
-    """Worker信号类，用于线程安全的UI更新"""
-    log_signal = Signal(str, str)  # device_serial, log_message
-    progress_signal = Signal(str, int, int, str, int)  # serial, current, total, category, count
+    """Worker信号类，用于线程安全的UI更新（日志/进度走 UiUpdateBridge 批量投递）"""
     status_signal = Signal(str, object)  # serial, WorkerStatus
+    devices_signal = Signal(list)        # [DeviceInfo, ...] 发生变化的设备
 
 
 class MainWindow(QMainWindow):
     """主窗口"""
     
+    # 日志/进度批量刷新间隔(毫秒)
+    UI_FLUSH_INTERVAL_MS = 150
+    # 日志视图最多保留的行数
+    LOG_MAX_BLOCKS = 2000
+    
     def __init__(self, app_root: str = None):
         super().__init__()
         
@@ -39,6 +46,7 @@ class MainWindow(QMainWindow):
         self.device_manager = DeviceManager()
         self.workers: Dict[str, DeviceWorker] = {}
         self.signals = WorkerSignals()
+        self.ui_bridge = UiUpdateBridge(self.UI_FLUSH_INTERVAL_MS, parent=self)
         
         # 输出目录 (在 exe 同级目录下创建 output)
         self.output_dir = os.path.join(self.app_root, "output")
@@ -57,9 +65,13 @@ class MainWindow(QMainWindow):
         # 连接信号
         self._connect_signals()
         
-        # 刷新设备列表
+        # 刷新设备列表（后台线程执行，结果按变化增量更新表格）
+        self._device_refresh_thread: Optional[threading.Thread] = None
         self._refresh_devices()
         
+        # 设备变化监听（ADB track-devices），不可用时由定时器轮询
+        self.device_manager.watch(self.signals.devices_signal.emit)
+        
         # 定时刷新
         self.refresh_timer = QTimer()
         self.refresh_timer.timeout.connect(self._auto_refresh)
@@ -129,9 +141,7 @@ class MainWindow(QMainWindow):
         try:
             config_path = os.path.join(self.app_root, "config.json")
             if os.path.exists(config_path):
-                with open(config_path, "r", encoding="utf-8") as f:
-                    config = json.load(f)
-                    enable_debug = config.get("enable_debug_features", False)
+                enable_debug = get_config(config_path).get("enable_debug_features", False)
         except Exception as e:
             print(f"Error loading config: {e}")
             
@@ -205,7 +215,7 @@ class MainWindow(QMainWindow):
         self.lbl_task_file.setStyleSheet("color: #666;")
         task_layout.addWidget(self.lbl_task_file, 1)
         
-        self.btn_import_task = QPushButton("📂 导入xlsx任务")
+        self.btn_import_task = QPushButton("📂 导入任务文件")
         self.btn_import_task.clicked.connect(self._import_task)
         self.btn_import_task.setEnabled(False)
         task_layout.addWidget(self.btn_import_task)
@@ -270,8 +280,10 @@ class MainWindow(QMainWindow):
         log_group = QGroupBox("运行日志")
         log_layout = QVBoxLayout(log_group)
         
-        self.log_text = QTextEdit()
+        # 只渲染当前选中设备的日志，行数有上限
+        self.log_text = QPlainTextEdit()
         self.log_text.setReadOnly(True)
+        self.log_text.setMaximumBlockCount(self.LOG_MAX_BLOCKS)
         self.log_text.setFont(QFont("Consolas", 9))
         self.log_text.setStyleSheet("background-color: #1e1e1e; color: #dcdcdc;")
         log_layout.addWidget(self.log_text)
@@ -290,15 +302,16 @@ class MainWindow(QMainWindow):
     
     def _connect_signals(self):
         """连接信号"""
-        self.signals.log_signal.connect(self._on_log_received)
-        self.signals.progress_signal.connect(self._on_progress_received)
+        self.ui_bridge.logs_ready.connect(self._on_logs_received)
+        self.ui_bridge.progress_ready.connect(self._on_progress_received)
         self.signals.status_signal.connect(self._on_status_received)
+        self.signals.devices_signal.connect(self._on_devices_changed)
     
-    @Slot(str, str)
-    def _on_log_received(self, device_serial: str, message: str):
-        """接收日志"""
+    @Slot(str, list)
+    def _on_logs_received(self, device_serial: str, messages: list):
+        """接收一帧内合并的日志"""
         if device_serial == self.current_device:
-            self.log_text.append(message)
+            self.log_text.appendPlainText("\n".join(messages))
             # 自动滚动到底部
             scrollbar = self.log_text.verticalScrollBar()
             scrollbar.setValue(scrollbar.maximum())
@@ -336,15 +349,33 @@ class MainWindow(QMainWindow):
             self.statusBar().showMessage(f"设备 {serial} 任务已完成", 3000)
     
     def _refresh_devices(self):
-        """刷新设备列表"""
-        devices = self.device_manager.refresh_devices()
+        """刷新设备列表（在后台线程查询设备，不阻塞界面；上一次刷新未完成时忽略）"""
+        if self._device_refresh_thread and self._device_refresh_thread.is_alive():
+            return
         
-        # 更新表格
-        self.device_table.setRowCount(len(devices))
+        def run():
+            changes = self.device_manager.refresh_changes()
+            self.signals.devices_signal.emit(changes)
         
-        for row, device in enumerate(devices):
-            # 序列号
-            self.device_table.setItem(row, 0, QTableWidgetItem(device.serial))
+        self._device_refresh_thread = threading.Thread(target=run, daemon=True)
+        self._device_refresh_thread.start()
+    
+    @Slot(list)
+    def _on_devices_changed(self, changes: list):
+        """按变化的设备增量更新表格（并通知连接池：已连接过的设备重新上线时后台预热连接）"""
+        pool = get_connection_pool()
+        for device in changes:
+            pool.on_device_state(device.serial, device.status == DeviceStatus.ONLINE)
+            
+            row = self._find_device_row(device.serial)
+            if row < 0:
+                # 新设备：追加一行
+                row = self.device_table.rowCount()
+                self.device_table.insertRow(row)
+                self.device_table.setItem(row, 0, QTableWidgetItem(device.serial))
+                self.device_table.setItem(row, 3, QTableWidgetItem(device.task_status))
+                self.device_table.setItem(row, 4, QTableWidgetItem(device.progress))
+                self.device_table.setCellWidget(row, 5, self._create_row_buttons(device.serial))
             
             # 型号
             self.device_table.setItem(row, 1, QTableWidgetItem(device.model or "-"))
@@ -358,22 +389,23 @@ class MainWindow(QMainWindow):
             else:
                 status_item.setForeground(QColor("#ffc107"))
             self.device_table.setItem(row, 2, status_item)
-            
-            # 任务状态
-            self.device_table.setItem(row, 3, QTableWidgetItem(device.task_status))
-            
-            # 进度
-            self.device_table.setItem(row, 4, QTableWidgetItem(device.progress))
-            
-            # 操作按钮
-            btn_widget = self._create_row_buttons(device.serial)
-            self.device_table.setCellWidget(row, 5, btn_widget)
         
         # 更新统计
         online_count = self.device_manager.get_online_count()
         self.lbl_device_count.setText(f"设备: {online_count}台在线")
         
-        self.statusBar().showMessage(f"已刷新设备列表，共{len(devices)}台设备，{online_count}台在线")
+        if changes:
+            self.statusBar().showMessage(
+                f"设备列表已更新: {len(changes)}台变化，共{self.device_table.rowCount()}台设备，{online_count}台在线"
+            )
+    
+    def _find_device_row(self, serial: str) -> int:
+        """查找设备所在行，不存在返回 -1"""
+        for row in range(self.device_table.rowCount()):
+            item = self.device_table.item(row, 0)
+            if item and item.text() == serial:
+                return row
+        return -1
     
     def _create_row_buttons(self, serial: str) -> QWidget:
         """创建表格行操作按钮"""
@@ -400,17 +432,15 @@ class MainWindow(QMainWindow):
         if not device:
             return
         
-        for row in range(self.device_table.rowCount()):
-            item = self.device_table.item(row, 0)
-            if item and item.text() == serial:
-                self.device_table.setItem(row, 3, QTableWidgetItem(device.task_status))
-                self.device_table.setItem(row, 4, QTableWidgetItem(device.progress))
-                break
+        row = self._find_device_row(serial)
+        if row >= 0:
+            self.device_table.setItem(row, 3, QTableWidgetItem(device.task_status))
+            self.device_table.setItem(row, 4, QTableWidgetItem(device.progress))
     
     def _auto_refresh(self):
-        """自动刷新设备状态（不刷新整个列表，只更新在线状态）"""
-        # 轻量级刷新
-        pass
+        """自动刷新设备状态（track-devices 监听生效时无需轮询）"""
+        if not self.device_manager.watching:
+            self._refresh_devices()
     
     def _on_device_selected(self):
         """设备选中事件"""
@@ -448,10 +478,11 @@ class MainWindow(QMainWindow):
             self.lbl_task_file.setText(worker.task_loader.file_path or "未导入")
             self._update_control_buttons(worker.status)
             
-            # 加载日志
-            self.log_text.clear()
-            for log in worker.logger.get_logs():
-                self.log_text.append(log)
+            # 加载日志（一次性写入，避免逐行刷新；同时丢弃该设备待投递的日志，避免重复显示）
+            logs = self.ui_bridge.reset_logs(device.serial, worker.logger.snapshot_logs)
+            self.log_text.setPlainText("\n".join(logs))
+            scrollbar = self.log_text.verticalScrollBar()
+            scrollbar.setValue(scrollbar.maximum())
         else:
             self.lbl_task_file.setText("未导入")
             self.btn_import_task.setEnabled(device.status == DeviceStatus.ONLINE)
@@ -482,7 +513,7 @@ class MainWindow(QMainWindow):
             return
         
         file_path, _ = QFileDialog.getOpenFileName(
-            self, "选择任务文件", "", "Excel文件 (*.xlsx)"
+            self, "选择任务文件", "", "任务文件 (*.xlsx *.csv *.tsv);;Excel文件 (*.xlsx);;CSV文件 (*.csv *.tsv)"
         )
         
         if not file_path:
@@ -506,10 +537,10 @@ class MainWindow(QMainWindow):
             
             # 设置回调
             worker.set_log_callback(
-                lambda msg: self.signals.log_signal.emit(serial, msg)
+                lambda msg, seq: self.ui_bridge.push_log(serial, msg, seq)
             )
             worker.set_progress_callback(
-                lambda s, c, t, cat, cnt: self.signals.progress_signal.emit(s, c, t, cat, cnt)
+                lambda s, c, t, cat, cnt: self.ui_bridge.push_progress(s, c, t, cat, cnt)
             )
             worker.set_status_change_callback(
                 lambda s, status: self.signals.status_signal.emit(s, status)
@@ -652,7 +683,9 @@ class MainWindow(QMainWindow):
             if worker.status in [WorkerStatus.RUNNING, WorkerStatus.PAUSED]:
                 worker.stop()
         
-        # 停止定时器
+        # 停止定时器和设备监听
         self.refresh_timer.stop()
+        self.device_manager.stop_watch()
+        self.ui_bridge.stop()
         
         event.accept()
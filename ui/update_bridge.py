@@ -0,0 +1,104 @@
+"""
+update_bridge.py - UI批量更新桥
+工作线程只把日志/进度写入缓冲区，GUI线程按固定帧率批量取出并刷新界面
+避免多设备同时运行时每行日志一个信号，导致Qt事件循环被淹没
+"""
+import threading
+from collections import deque
+from typing import Callable, Dict, Deque, List, Tuple
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+
+class UiUpdateBridge(QObject):
+    """
+    日志与进度的批量投递桥
+    - 日志：按设备合并，每帧一次性投递（每台设备缓冲有上限）
+    - 进度：按设备只保留最新一次
+    """
+
+    logs_ready = Signal(str, list)                     # serial, [log_line, ...]
+    progress_ready = Signal(str, int, int, str, int)   # serial, current, total, category, count
+
+    def __init__(self, interval_ms: int = 150, max_pending_lines: int = 500, parent=None):
+        """
+        初始化批量更新桥（必须在GUI线程创建）
+
+        Args:
+            interval_ms: 刷新帧间隔(毫秒)
+            max_pending_lines: 每台设备单帧最多缓冲的日志行数，超出丢弃最旧的
+        """
+        super().__init__(parent)
+        self.max_pending_lines = max_pending_lines
+
+        self._lock = threading.Lock()
+        self._pending_logs: Dict[str, Deque[str]] = {}
+        self._log_floor: Dict[str, int] = {}     # 每台设备最近一次快照包含的最后序号
+        self._pending_progress: Dict[str, Tuple[int, int, str, int]] = {}
+
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.flush)
+        self._timer.start(interval_ms)
+
+    def push_log(self, serial: str, message: str, seq: int = 0):
+        """
+        写入一行日志（任意线程调用）
+
+        Args:
+            serial: 设备序列号
+            message: 日志行
+            seq: 日志序号（DeviceLogger 分配）；不大于最近一次快照序号的行已在快照中，直接丢弃
+        """
+        with self._lock:
+            if seq and seq <= self._log_floor.get(serial, 0):
+                return
+            lines = self._pending_logs.get(serial)
+            if lines is None:
+                lines = deque(maxlen=self.max_pending_lines)
+                self._pending_logs[serial] = lines
+            lines.append(message)
+
+    def reset_logs(self, serial: str, snapshot: Callable[[], Tuple[List[str], int]]) -> List[str]:
+        """
+        重置某台设备的日志视图（GUI线程调用）：丢弃该设备未投递的日志并取完整日志快照
+        工作线程写入日志缓存与投递到本桥之间不持有同一把锁，因此按序号去重：
+        之后到达的、序号不大于快照序号的行已在快照中，不会在下一帧再次投递
+
+        Args:
+            serial: 设备序列号
+            snapshot: 获取 (完整日志, 最后序号) 的函数（如 DeviceLogger.snapshot_logs）
+
+        Returns:
+            日志快照
+        """
+        with self._lock:
+            self._pending_logs.pop(serial, None)
+            lines, seq = snapshot()
+            self._log_floor[serial] = seq
+            return list(lines)
+
+    def push_progress(self, serial: str, current: int, total: int, category: str, count: int):
+        """写入进度（任意线程调用，同一帧内只保留最新值）"""
+        with self._lock:
+            self._pending_progress[serial] = (current, total, category, count)
+
+    def flush(self):
+        """取出缓冲并投递到界面（GUI线程，由定时器驱动）"""
+        with self._lock:
+            if not self._pending_logs and not self._pending_progress:
+                return
+            pending_logs = self._pending_logs
+            pending_progress = self._pending_progress
+            self._pending_logs = {}
+            self._pending_progress = {}
+
+        for serial, lines in pending_logs.items():
+            if lines:
+                self.logs_ready.emit(serial, list(lines))
+
+        for serial, (current, total, category, count) in pending_progress.items():
+            self.progress_ready.emit(serial, current, total, category, count)
+
+    def stop(self):
+        """停止定时刷新"""
+        self._timer.stop()